@@ -0,0 +1,121 @@
+import hashlib
+import re
+
+import pandas as pd
+
+from carbonsimulator.tracing import traced
+
+SOURCES = ['aliments', 'equipements', 'energie']
+
+
+def file_key(key):
+    """
+    Retourne un nom de fichier sans collision pour une clé (restaurant, shard...) : une version lisible
+    de la clé, suivie d'une empreinte courte de la clé complète. Deux clés différentes ("a/b" et "a_b",
+    ou "A" et "a" sur un système de fichiers insensible à la casse) donnent deux noms différents.
+    """
+    text = str(key)
+    slug = re.sub(r"[^\w.-]+", "_", text).strip("._")[:60] or "cle"
+    return f"{slug}-{hashlib.sha256(text.encode('utf-8')).hexdigest()[:12]}"
+
+
+@traced("batch")
+def build_factor_table(aliments, equipements, energie):
+    """
+    Regroupe les trois tables de facteurs (celles retournées par load_data) en une seule table
+    indexée par (source, nom, french_attribut).
+    Les équipements et l'énergie n'ont pas d'attribut, on utilise donc une chaîne vide.
+    """
+    tables = []
+    for source, data in zip(SOURCES, [aliments, equipements, energie]):
+        # Le fichier energie_filtered.csv garde la colonne french_name au lieu de nom
+        table = data.rename(columns={"french_name": "nom"})
+        table = pd.DataFrame({
+            'source': source,
+            'nom': table['nom'],
+            'french_attribut': table['french_attribut'] if 'french_attribut' in table else '',
+            'CO2': table['CO2'],
+            'main_type': table['main_type'] if 'main_type' in table else None,
+            'sous_type': table['sous_type'] if 'sous_type' in table else None,
+        })
+        tables.append(table)
+
+    factors = pd.concat(tables, ignore_index=True)
+    factors['french_attribut'] = factors['french_attribut'].fillna('')
+
+    # Une même clé ne doit correspondre qu'à un seul facteur
+    factors = factors.drop_duplicates(subset=['source', 'nom', 'french_attribut'])
+
+    return factors.set_index(['source', 'nom', 'french_attribut'])
+
+@traced("batch")
+def resolve_ledger(ledger, factors, errors='raise'):
+    """
+    Associe chaque ligne du registre à son facteur d'émission en une seule jointure
+    et retourne le registre complété des colonnes CO2, main_type, sous_type et emission.
+
+    Le registre doit contenir les colonnes restaurant, source, nom et quantite,
+    la colonne french_attribut n'est utile que pour les aliments.
+    Si errors vaut 'ignore', les lignes dont l'élément est inconnu sont supprimées,
+    sinon une ValueError est levée.
+    """
+    missing = {'restaurant', 'source', 'nom', 'quantite'}.difference(ledger.columns)
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans le registre : {sorted(missing)}")
+
+    if 'french_attribut' in ledger:
+        attributs = ledger['french_attribut'].fillna('')
+    else:
+        attributs = pd.Series('', index=ledger.index)
+
+    keys = pd.MultiIndex.from_arrays([ledger['source'], ledger['nom'], attributs])
+    positions = factors.index.get_indexer(keys)
+
+    unknown = positions == -1
+    if unknown.any():
+        if errors != 'ignore':
+            exemples = list(keys[unknown].unique()[:5])
+            raise ValueError(
+                f"{unknown.sum()} ligne(s) du registre sans facteur d'émission, par exemple : {exemples}")
+        ledger = ledger[~unknown]
+        positions = positions[~unknown]
+
+    resolved = ledger.copy()
+    resolved['CO2'] = factors['CO2'].to_numpy()[positions]
+    resolved['main_type'] = factors['main_type'].to_numpy()[positions]
+    resolved['sous_type'] = factors['sous_type'].to_numpy()[positions]
+    resolved['emission'] = resolved['quantite'].to_numpy(dtype=float) * resolved['CO2'].to_numpy(dtype=float)
+
+    return resolved
+
+@traced("batch")
+def compute_footprints(ledger, aliments, equipements, energie, errors='raise'):
+    """
+    Calcule en une passe l'empreinte carbone de chaque restaurant du registre.
+
+    Retourne deux DataFrames indexées par restaurant :
+    - les totaux par source (aliments, equipements, energie) et le total général,
+    - les totaux des aliments par main_type.
+    """
+    factors = build_factor_table(aliments, equipements, energie)
+    resolved = resolve_ledger(ledger, factors, errors=errors)
+
+    return aggregate_footprints(resolved)
+
+@traced("batch")
+def aggregate_footprints(resolved):
+    """
+    Agrège un registre résolu (voir resolve_ledger) par restaurant et par source,
+    ainsi que par main_type pour les aliments.
+    """
+    totaux = resolved.groupby(['restaurant', 'source'], sort=True)['emission'].sum().unstack(fill_value=0.0)
+    totaux = totaux.reindex(columns=SOURCES, fill_value=0.0)
+    totaux['total'] = totaux.sum(axis=1)
+    totaux.columns.name = None
+
+    aliments = resolved[resolved['source'] == 'aliments']
+    par_main_type = aliments.groupby(['restaurant', 'main_type'], sort=True)['emission'].sum().unstack(fill_value=0.0)
+    par_main_type = par_main_type.reindex(totaux.index, fill_value=0.0)
+    par_main_type.columns.name = None
+
+    return totaux, par_main_type
@@ -0,0 +1,214 @@
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from carbonsimulator import utils
+from carbonsimulator.batch import build_factor_table, compute_footprints
+from carbonsimulator.calculator import load_data
+from carbonsimulator.store import DATA_DIR, open_store
+
+SCALES = [1, 10, 100, 1000]
+LEDGER_ROWS = 10_000
+REGRESSION_THRESHOLD = 0.2
+
+
+def synthetic_raw_aliments(raw, scale, seed=0):
+    """
+    Génère une table brute de même forme qu'aliments.csv, scale fois plus grande.
+    Chaque copie reçoit de nouveaux ids, des noms suffixés (pour multiplier les groupes
+    nom / attributs) et un CO2 légèrement perturbé. La première copie est l'originale.
+    """
+    rng = np.random.default_rng(seed)
+    copies = [raw]
+    for i in range(1, scale):
+        copy = raw.copy()
+        copy['id'] = raw['id'] + i * (raw['id'].max() + 1)
+        copy['french_name'] = raw['french_name'] + f" {i}"
+        copy['CO2'] = (raw['CO2'] * rng.uniform(0.9, 1.1, len(raw))).round(2)
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+def synthetic_ledger(aliments, equipements, energie, rows, restaurants, seed=0):
+    """
+    Génère un registre d'achats aléatoire sur les tables de facteurs.
+    """
+    rng = np.random.default_rng(seed)
+    ids = rng.integers(0, len(aliments), rows)
+    ledger = pd.DataFrame({
+        'restaurant': rng.integers(0, restaurants, rows),
+        'source': 'aliments',
+        'nom': aliments['nom'].to_numpy()[ids],
+        'french_attribut': aliments['french_attribut'].to_numpy()[ids],
+        'quantite': rng.uniform(0.1, 50.0, rows).round(2),
+    })
+    energie_lignes = pd.DataFrame({
+        'restaurant': np.arange(restaurants),
+        'source': 'energie',
+        'nom': energie['french_name'].to_numpy()[rng.integers(0, len(energie), restaurants)],
+        'quantite': rng.uniform(100.0, 5000.0, restaurants).round(1),
+    })
+    equipements_lignes = pd.DataFrame({
+        'restaurant': np.arange(restaurants),
+        'source': 'equipements',
+        'nom': equipements['nom'].to_numpy()[rng.integers(0, len(equipements), restaurants)],
+        'quantite': 1.0,
+    })
+    return pd.concat([ledger, energie_lignes, equipements_lignes], ignore_index=True)
+
+def make_dataset(scale, data_dir, source_dir=DATA_DIR, seed=0):
+    """
+    Écrit dans data_dir un jeu de données synthétique à l'échelle demandée :
+    les CSV bruts et les tables nettoyées correspondantes.
+    """
+    raw_aliments, equipements, energie = utils.load_raw_data(source_dir)
+    raw_aliments = synthetic_raw_aliments(raw_aliments, scale, seed)
+
+    os.makedirs(data_dir, exist_ok=True)
+    raw_aliments.to_csv(os.path.join(data_dir, "aliments.csv"), index=False)
+    equipements.to_csv(os.path.join(data_dir, "equipements.csv"), index=False)
+    energie.to_csv(os.path.join(data_dir, "energie.csv"), index=False)
+    utils.export_to_csv(*utils.build_tables(raw_aliments, equipements, energie), data_dir=data_dir)
+
+def measure(func, *args, repeat=3):
+    """
+    Exécute func et retourne son résultat, le meilleur temps sur repeat exécutions (en secondes)
+    et le pic de mémoire allouée pendant une exécution supplémentaire sous tracemalloc (en Mo).
+    """
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, min(timings), peak / 2**20
+
+def _rows(data):
+    if isinstance(data, pd.DataFrame):
+        return len(data)
+    frames = [d for d in data if isinstance(d, pd.DataFrame)] if isinstance(data, tuple) else []
+    return sum(len(d) for d in frames) if frames else None
+
+def run_scale(scale, work_dir, repeat=3, ledger_rows=LEDGER_ROWS):
+    """
+    Mesure chaque étape (chargement, nettoyage, export, calcul) sur un jeu synthétique.
+    """
+    data_dir = os.path.join(work_dir, f"x{scale}")
+    make_dataset(scale, data_dir)
+    results = []
+
+    def record(stage, func, *args):
+        rows_in = _rows(args)
+        output, seconds, peak_mb = measure(func, *args, repeat=repeat)
+        results.append({
+            'scale': scale, 'stage': stage, 'rows_in': rows_in, 'rows_out': _rows(output),
+            'seconds': seconds, 'peak_mb': peak_mb,
+        })
+        print(f"x{scale:<5} {stage:<28} {seconds * 1000:10.1f} ms {peak_mb:10.1f} Mo", file=sys.stderr)
+        return output
+
+    record('load_data', load_data, False, data_dir)
+    load_data(True, data_dir)
+    aliments, equipements, energie = record('load_data_compiled', load_data, True, data_dir)
+    record('build_factor_table', build_factor_table, aliments, equipements, energie)
+    # Démarrage à froid : le store est rouvert à chaque mesure (la table de chaînes n'est pas déjà décodée)
+    record('factor_table_compiled', lambda: open_store(data_dir, os.path.join(data_dir, ".store")).factor_table())
+
+    raw_aliments, raw_equipements, raw_energie = record('load_raw_data', utils.load_raw_data, data_dir)
+    filtered = record('aliments_filtering', utils.aliments_filtering, raw_aliments)
+    stage = record('aliments_final', utils.aliments_final, filtered)
+    record('glace_sorbets_filtering', utils.glace_sorbets_filtering, stage)
+    record('chocolat_filtering', utils.chocolat_filtering, stage)
+    record('matieres_grasses_filtering', utils.matieres_grasses_filtering, stage)
+    record('the_filtering', utils.the_filtering, stage)
+    final = record('consolidate_aliments', utils.consolidate_aliments, stage)
+    energie_filtered = record('energie_filtering', utils.energie_filtering, raw_energie)
+    equipements_filtered = record('equipements_filtering', utils.equipements_filtering, raw_equipements)
+
+    export_dir = os.path.join(work_dir, f"x{scale}-export")
+    os.makedirs(export_dir, exist_ok=True)
+    record('export_to_csv', lambda *tables: utils.export_to_csv(*tables, data_dir=export_dir) or tables,
+           final, energie_filtered, equipements_filtered)
+
+    ledger = synthetic_ledger(aliments, equipements, energie, ledger_rows * scale, 100 * scale)
+    record('compute_footprints', lambda l: compute_footprints(l, aliments, equipements, energie), ledger)
+
+    return results
+
+def run(scales=SCALES, repeat=3, ledger_rows=LEDGER_ROWS):
+    """
+    Lance le benchmark pour chaque échelle et retourne un rapport sérialisable en JSON.
+    """
+    with tempfile.TemporaryDirectory(prefix="carbonsimulator-bench-") as work_dir:
+        results = [r for scale in scales for r in run_scale(scale, work_dir, repeat, ledger_rows)]
+
+    return {
+        'meta': {
+            'date': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """
+    Compare deux rapports et retourne les étapes dont le temps a augmenté de plus de threshold (en relatif).
+    """
+    reference = {(r['scale'], r['stage']): r['seconds'] for r in baseline['results']}
+    regressions = []
+    for r in current['results']:
+        before = reference.get((r['scale'], r['stage']))
+        if before and r['seconds'] > before * (1 + threshold):
+            regressions.append({'scale': r['scale'], 'stage': r['stage'],
+                                'avant': before, 'apres': r['seconds'], 'ratio': r['seconds'] / before})
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark du chargement, du nettoyage et du calcul")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--ledger-rows", type=int, default=LEDGER_ROWS,
+                        help="Lignes de registre par unité d'échelle")
+    parser.add_argument("--output", help="Fichier JSON de résultats (sortie standard par défaut)")
+    parser.add_argument("--compare", help="Rapport JSON de référence pour détecter les régressions")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    # export_to_csv affiche ses messages sur la sortie standard, réservée au rapport JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run(args.scales, args.repeat, args.ledger_rows)
+    status = 0
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            report['regressions'] = compare(json.load(f), report, args.threshold)
+        status = 1 if report['regressions'] else 0
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+    sys.exit(status)
@@ -1,132 +1,167 @@
+import os
+
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 
+from carbonsimulator.compact import compact_frame
+from carbonsimulator.console import CONSOLE, RecordingIO
+from carbonsimulator.index import FactorIndex, CATEGORIES_SANS_SOUS_TYPE
+from carbonsimulator.store import DATA_DIR, open_store
+from carbonsimulator.tracing import stage, traced, tracing
+
+# En mode headless (CARBONSIMULATOR_HEADLESS=1), aucun graphique n'est affiché
+# et matplotlib/seaborn ne sont jamais importés.
+HEADLESS = os.environ.get("CARBONSIMULATOR_HEADLESS", "") not in ("", "0")
 
-def load_data():
+
+@traced("calculator")
+def load_data(compiled=False, data_dir=DATA_DIR, compact=False):
     """
     Charge les différentes données et les retourne.
+    Si compiled vaut True, les données sont lues depuis le store binaire compilé (voir store.py)
+    plutôt que depuis les CSV.
+    Si compact vaut True, les colonnes texte sont des colonnes category (voir compact.py).
     """
-    aliments = pd.read_csv("../data/aliments_final.csv")
-    equipements = pd.read_csv("../data/equipements_filtered.csv")
-    energie = pd.read_csv("../data/energie_filtered.csv")
+    if compiled:
+        return open_store(data_dir, os.path.join(data_dir, ".store")).to_frames(compact)
+
+    aliments = pd.read_csv(os.path.join(data_dir, "aliments_final.csv"))
+    equipements = pd.read_csv(os.path.join(data_dir, "equipements_filtered.csv"))
+    energie = pd.read_csv(os.path.join(data_dir, "energie_filtered.csv"))
 
+    if compact:
+        return compact_frame(aliments), compact_frame(equipements), compact_frame(energie)
     return aliments, equipements, energie
 
-def get_user_selection_energie(data):
+@traced("calculator")
+def get_user_selection_energie(data, io=None):
     """
     Retourne le total de co2 émis par l'utilisateur en fonction de l'énergie qu'il utilise.
+    io fournit les entrées et sorties (la console par défaut, voir console.py).
     """
-    print("\nSélectionnez le type d'énergie et entrez la quantité correspondante :")
+    io = io or CONSOLE
+    io.print("\nSélectionnez le type d'énergie et entrez la quantité correspondante :")
     total_co2 = 0
     options = list(data['french_name'])
     units = list(data['CO2'])
 
     for idx, option in enumerate(options, 1):
-        print(f"{idx}. {option} ({units[idx-1]} kgCO₂/unité)")
-    print("0. Terminer la sélection")
+        io.print(f"{idx}. {option} ({units[idx-1]} kgCO₂/unité)")
+    io.print("0. Terminer la sélection")
 
     while True:
         try:
-            choice = int(input("Entrez le numéro de l'élément ou 0 pour terminer : "))
+            choice = int(io.input("Entrez le numéro de l'élément ou 0 pour terminer : "))
             if choice == 0:
                 break
             if 1 <= choice <= len(options):
-                quantity = float(input(f"Quantité en unités ({options[choice-1]}) : "))
+                quantity = float(io.input(f"Quantité en unités ({options[choice-1]}) : "))
                 total_co2 += quantity * units[choice-1]
             else:
-                print("Numéro invalide, réessayez.")
+                io.print("Numéro invalide, réessayez.")
         except ValueError:
-            print("Entrée invalide, réessayez.")
+            io.print("Entrée invalide, réessayez.")
     return total_co2
 
-def get_user_selection_aliments(data):
+@traced("calculator")
+def get_user_selection_aliments(data, io=None):
     """
     Retourne le total de co2 émis par l'utilisateur en fonction des aliments qu'il utilise.
+    data peut être la table des aliments ou un FactorIndex déjà construit.
+    io fournit les entrées et sorties (la console par défaut, voir console.py).
     """
+    io = io or CONSOLE
+    index = data if isinstance(data, FactorIndex) else FactorIndex(data)
     total_co2 = 0
     selected_categories = []
+    categories = index.main_types()
     while True:
-        print("\n === Sélection des Aliments ===")
-        categories = data['main_type'].unique()
+        io.print("\n === Sélection des Aliments ===")
         for idx, cat in enumerate(categories, 1):
-            print(f"{idx}. {cat}")
-        print("0. Terminer la sélection")
+            io.print(f"{idx}. {cat}")
+        io.print("0. Terminer la sélection")
 
         try:
-            choice_cat = int(input("Choisissez une catégorie : "))
+            choice_cat = int(io.input("Choisissez une catégorie : "))
             if choice_cat == 0:
                 break
             selected_cat = categories[choice_cat - 1]
             selected_categories.append(selected_cat)
 
             # Exceptions pour certaines catégories
-            if selected_cat in ['Glaces et sorbets', 'Matières grasses', 'Aliments infantiles']:
-                produits = data[data['main_type'] == selected_cat]
-                options = list(produits['nom'])
-                co2_values = list(produits['CO2'])
-                attributs = list(produits['french_attribut'])
-
-                for idx, option in enumerate(options, 1):
-                    print(f"{idx}. {option} - {attributs[idx-1]} ({co2_values[idx-1]} kgCO2/unité)")
-                choice_prod = int(input("Choisissez un produit : "))
-                quantity = float(input(f"Quantité en unité du produit ({options[choice_prod-1]}) : "))
-                total_co2 += quantity * co2_values[choice_prod - 1]
+            if selected_cat in CATEGORIES_SANS_SOUS_TYPE:
+                produits = index.produits(selected_cat)
+
+                for idx, produit_id in enumerate(produits, 1):
+                    io.print(f"{idx}. {index.noms[produit_id]} - {index.attributs[produit_id]} "
+                             f"({index.co2(produit_id)} kgCO2/unité)")
+                produit_id = produits[int(io.input("Choisissez un produit : ")) - 1]
+                quantity = float(io.input(f"Quantité en unité du produit ({index.noms[produit_id]}) : "))
+                total_co2 += quantity * index.co2(produit_id)
                 continue
 
             # Processus normal pour les sous_catégories
-            sous_categories = data[data['main_type'] == selected_cat]['sous_type'].unique()
+            sous_categories = index.sous_types(selected_cat)
 
             for idx, sous_cat in enumerate(sous_categories, 1):
-                print(f"{idx}. {sous_cat}")
-            choice_sous_cat = int(input("Choisissez un sous_type : "))
+                io.print(f"{idx}. {sous_cat if sous_cat is not None else 'Autres'}")
+            choice_sous_cat = int(io.input("Choisissez un sous_type : "))
             selected_sous_cat = sous_categories[choice_sous_cat - 1]
 
-            produits = data[(data['main_type'] == selected_cat) & (data['sous_type'] == selected_sous_cat)]
-            options = list(produits['nom'])
-            co2_values = list(produits['CO2'])
-            attributs = list(produits['french_attribut'])
+            produits = index.produits(selected_cat, selected_sous_cat)
 
-            for idx, option in enumerate(options, 1):
-                print(f"{idx}. {option} - {attributs[idx-1]} ({co2_values[idx-1]} kgCO2/unité)")
-            choice_prod = int(input("Choisissez un produit : "))
-            quantity = float(input(f"Quantité en unités ({options[choice_prod-1]}) : "))
-            total_co2 += quantity * co2_values[choice_prod - 1]
+            for idx, produit_id in enumerate(produits, 1):
+                io.print(f"{idx}. {index.noms[produit_id]} - {index.attributs[produit_id]} "
+                         f"({index.co2(produit_id)} kgCO2/unité)")
+            produit_id = produits[int(io.input("Choisissez un produit : ")) - 1]
+            quantity = float(io.input(f"Quantité en unités ({index.noms[produit_id]}) : "))
+            total_co2 += quantity * index.co2(produit_id)
         except (ValueError, IndexError):
-            print("Entrée invalide, réessayez.")
-            return 0
+            io.print("Entrée invalide, réessayez.")
+            return 0, selected_categories
     return total_co2, selected_categories
 
-def get_user_selection_equipements(data):
+@traced("calculator")
+def get_user_selection_equipements(data, io=None):
     """
     Retourne le total de co2 émis par l'utilisateur en fonction des équipements qu'il utilise.
+    io fournit les entrées et sorties (la console par défaut, voir console.py).
     """
-    print("\n=== Sélection des Équipements ===")
+    io = io or CONSOLE
+    io.print("\n=== Sélection des Équipements ===")
     total_co2 = 0
     options = list(data['nom'])
     co2_values = list(data['CO2'])
 
     for idx, option in enumerate(options, 1):
-        print(f"{idx}. {option} ({co2_values[idx-1]} kgCO2)")
-    print("0. Terminer la sélection")
+        io.print(f"{idx}. {option} ({co2_values[idx-1]} kgCO2)")
+    io.print("0. Terminer la sélection")
 
     while True:
         try:
-            choice = int(input("Entrez le numéro de l'équipement ou 0 pour terminer : "))
+            choice = int(io.input("Entrez le numéro de l'équipement ou 0 pour terminer : "))
             if choice == 0:
                 break
             if 1 <= choice <= len(options):
                 total_co2 += co2_values[choice - 1]
             else:
-                print("Numéro invalide, réessayez.")
+                io.print("Numéro invalide, réessayez.")
         except ValueError:
-            print("Entrée invalide, réessayez.")
+            io.print("Entrée invalide, réessayez.")
     return total_co2
 
+@traced("calculator")
 def plot_pie_charts(aliments, total_aliments, total_equipements, total_energie, selected_categories):
     """
     Affiche 2 pie plots pour montrer le portions de CO2 de l'utilisateur.
+    Les bibliothèques graphiques ne sont importées qu'ici : elles restent optionnelles.
     """
+    try:
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+    except ImportError:
+        print("matplotlib et seaborn sont nécessaires pour afficher les graphiques.")
+        return
+
     #1er camembert : portion de chaque total
     labels_totals = ['Aliments', 'Equipements', "Energie"]
     values_totals = [total_aliments, total_equipements, total_energie]
@@ -153,23 +188,59 @@ def plot_pie_charts(aliments, total_aliments, total_equipements, total_energie,
     plt.tight_layout()
     plt.show()
 
-def main():
-    print("=== Bienvenue dans le Calculateur d'Empreinte Carbone ===")
-    aliments, equipements, energie = load_data()
+def run_session(index_aliments, equipements, energie, io=None):
+    """
+    Enchaîne les trois sélections puis affiche les résultats.
+    Retourne les totaux (aliments, équipements, énergie) et les catégories d'aliments choisies.
+    """
+    io = io or CONSOLE
+    total_energie = get_user_selection_energie(energie, io)
+    total_equipements = get_user_selection_equipements(equipements, io)
+    total_aliments, selected_categories = get_user_selection_aliments(index_aliments, io)
+
+    with stage("totaux", "calculator"):
+        total_co2 = total_aliments + total_equipements + total_energie
+
+    io.print("\n=== Résultats de votre Empreinte Carbone ===")
+    io.print(f"Aliments : {total_aliments:.2f} kgCO2")
+    io.print(f"Équipements : {total_equipements:.2f} kgCO2")
+    io.print(f"Énergie : {total_energie:.2f} kgCO2")
+    io.print("--------------------------------------------")
+    io.print(f"TOTAL : {total_co2:.2f} kgCO2")
+
+    return total_aliments, total_equipements, total_energie, selected_categories
 
-    total_energie = get_user_selection_energie(energie)
-    total_equipements = get_user_selection_equipements(equipements)
-    total_aliments, selected_categories = get_user_selection_aliments(aliments)
+def main(io=None):
+    """
+    Point d'entrée du calculateur (commande carbonsimulator).
+    Avec CARBONSIMULATOR_TRACE=trace.json, une trace des étapes est enregistrée (voir tracing.py).
+    Avec CARBONSIMULATOR_RECORD=sessions.jsonl, les réponses de la session sont ajoutées au fichier
+    pour être rejouées (voir replay.py).
+    """
+    trace_path = os.environ.get("CARBONSIMULATOR_TRACE")
+    record_path = os.environ.get("CARBONSIMULATOR_RECORD")
+    if record_path:
+        io = RecordingIO(io or CONSOLE)
+    if trace_path:
+        with tracing(trace_path):
+            _main(io)
+    else:
+        _main(io)
+    if record_path:
+        io.save(record_path)
+
+def _main(io=None):
+    io = io or CONSOLE
+    io.print("=== Bienvenue dans le Calculateur d'Empreinte Carbone ===")
+    aliments, equipements, energie = load_data()
+    with stage("FactorIndex", "calculator"):
+        index_aliments = FactorIndex(aliments)
 
-    total_co2 = total_aliments + total_equipements + total_energie
+    total_aliments, total_equipements, total_energie, selected_categories = run_session(
+        index_aliments, equipements, energie, io)
 
-    print("\n=== Résultats de votre Empreinte Carbone ===")
-    print(f"Aliments : {total_aliments:.2f} kgCO2")
-    print(f"Équipements : {total_equipements:.2f} kgCO2")
-    print(f"Énergie : {total_energie:.2f} kgCO2")
-    print("--------------------------------------------")
-    print(f"TOTAL : {total_co2:.2f} kgCO2")
+    if not HEADLESS:
+        plot_pie_charts(aliments, total_aliments, total_equipements, total_energie, selected_categories)
 
-    plot_pie_charts(aliments, total_aliments, total_equipements, total_energie, selected_categories)
 if __name__ == "__main__":
     main()
@@ -0,0 +1,283 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Colonnes texte converties en codes : valeurs très répétées (cru, surgelé, préemballé...)
+CATEGORY_COLUMNS = ['nom', 'french_name', 'french_attribut', 'main_type', 'sous_type', 'unit']
+
+# Nombre maximal de décimales pour stocker le CO2 en virgule fixe (entiers int32)
+MAX_DECIMALS = 6
+# Entier réservé aux valeurs manquantes en virgule fixe
+MISSING = np.iinfo(np.int32).min
+
+
+def code_dtype(n):
+    """
+    Retourne le plus petit type entier signé capable de coder n valeurs (-1 pour une valeur manquante).
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        if n < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+def fixed_point(values, max_decimals=MAX_DECIMALS):
+    """
+    Encode des valeurs en virgule fixe : retourne (entiers int32, nombre de décimales),
+    ou None si les valeurs ne sont pas exactement représentables avec max_decimals décimales
+    ou dépassent la capacité d'un int32. Les valeurs manquantes sont codées MISSING.
+    """
+    values = np.asarray(values, dtype=float)
+    missing = np.isnan(values)
+    present = values[~missing]
+    for decimals in range(max_decimals + 1):
+        scaled = np.round(present * 10**decimals)
+        if np.abs(scaled).max(initial=0) >= np.iinfo(np.int32).max:
+            return None
+        if np.allclose(scaled / 10**decimals, present, rtol=0, atol=1e-9):
+            encoded = np.full(len(values), MISSING, dtype=np.int32)
+            encoded[~missing] = scaled
+            return encoded, decimals
+    return None
+
+def compact_frame(data, columns=CATEGORY_COLUMNS, float32=False):
+    """
+    Retourne une copie compacte d'une table de facteurs : les colonnes texte de columns
+    deviennent des colonnes category (codes entiers et une seule copie de chaque chaîne).
+
+    Si float32 vaut True, le CO2 est aussi converti en float32 ; les valeurs sont alors
+    arrondies à la précision du float32 (environ 7 chiffres significatifs).
+    """
+    data = data.copy()
+    for col in data.columns:
+        if col in columns and not isinstance(data[col].dtype, pd.CategoricalDtype):
+            data[col] = data[col].astype('category')
+    if float32 and 'CO2' in data:
+        data['CO2'] = data['CO2'].astype(np.float32)
+    return data
+
+def memory_usage(data):
+    """
+    Retourne la mémoire occupée par une table (chaînes comprises), en octets.
+    """
+    if isinstance(data, CompactTable):
+        return data.nbytes()
+    return int(data.memory_usage(deep=True).sum())
+
+
+class FactorRecord:
+    """
+    Facteur d'émission d'une ligne de table, sans le coût d'une Series pandas.
+    """
+    __slots__ = ('id', 'nom', 'french_attribut', 'CO2', 'main_type', 'sous_type')
+
+    def __init__(self, id, nom, french_attribut, CO2, main_type, sous_type):
+        self.id = id
+        self.nom = nom
+        self.french_attribut = french_attribut
+        self.CO2 = CO2
+        self.main_type = main_type
+        self.sous_type = sous_type
+
+    def __repr__(self):
+        return (f"FactorRecord({self.id}, {self.nom!r}, {self.french_attribut!r}, {self.CO2}, "
+                f"{self.main_type!r}, {self.sous_type!r})")
+
+    def to_dict(self):
+        """
+        Retourne le facteur sous forme de dictionnaire.
+        """
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class ColumnView:
+    """
+    Vue en lecture seule sur une colonne d'une CompactTable : s'indexe comme une liste,
+    mais ne garde que les codes et les valeurs distinctes.
+    """
+    __slots__ = ('codes', 'categories')
+
+    def __init__(self, codes, categories):
+        self.codes = codes
+        self.categories = categories
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        code = self.codes[i]
+        return None if code < 0 else self.categories[code]
+
+    def __iter__(self):
+        categories = self.categories
+        for code in self.codes.tolist():
+            yield None if code < 0 else categories[code]
+
+
+class CO2View:
+    """
+    Vue en lecture seule sur le CO2 d'une CompactTable, décodé à la lecture.
+    """
+    __slots__ = ('table',)
+
+    def __init__(self, table):
+        self.table = table
+
+    def __len__(self):
+        return len(self.table)
+
+    def __getitem__(self, i):
+        return self.table.co2(i)
+
+    def __iter__(self):
+        return iter(self.table.co2_array().tolist())
+
+
+class CompactTable:
+    """
+    Table de facteurs stockée en tableaux numpy :
+
+    - chaque colonne texte est un tableau de codes (int8/int16/int32 selon le nombre de valeurs
+      distinctes) vers une liste de chaînes internées, -1 pour une valeur manquante ;
+    - le CO2 est stocké en virgule fixe (int32 et un nombre de décimales, MISSING pour une valeur
+      manquante) quand les valeurs le permettent sans perte, en float32 sinon.
+
+    Les lectures passent par des FactorRecord ou des vues sur les tableaux, jamais par des Series.
+    """
+
+    def __init__(self, codes, categories, co2, decimals=None):
+        self.codes = codes
+        self.categories = categories
+        self._co2 = co2
+        self.decimals = decimals
+        self._scale = None if decimals is None else 10.0**decimals
+
+    @classmethod
+    def from_frame(cls, data, columns=None):
+        """
+        Construit la table compacte d'une DataFrame de facteurs. Par défaut, toutes les colonnes
+        texte sont encodées ; la colonne CO2 est obligatoire.
+        """
+        if columns is None:
+            columns = [col for col in data.columns if col != 'CO2' and not pd.api.types.is_numeric_dtype(data[col])]
+        codes = {}
+        categories = {}
+        for col in columns:
+            values = data[col].astype('category') if not isinstance(data[col].dtype, pd.CategoricalDtype) else data[col]
+            cats = [sys.intern(str(v)) for v in values.cat.categories]
+            codes[col] = values.cat.codes.to_numpy().astype(code_dtype(len(cats)))
+            categories[col] = cats
+        return cls(codes, categories, *cls._encode_co2(data['CO2'].to_numpy(dtype=float)))
+
+    @classmethod
+    def from_store(cls, store, table):
+        """
+        Construit la table compacte d'une table du store compilé (voir store.py) sans passer par pandas :
+        seules les chaînes effectivement utilisées sont internées.
+        """
+        codes = {}
+        categories = {}
+        strings = store.strings()
+        for col in store.columns(table):
+            if not store.is_string(table, col):
+                continue
+            values = np.asarray(store.array(table, col))
+            used, inverse = np.unique(values, return_inverse=True)
+            missing = used < 0
+            cats = [sys.intern(s) for s in strings[used[~missing]].tolist()]
+            col_codes = inverse - int(missing.sum())
+            col_codes[values < 0] = -1
+            codes[col] = col_codes.astype(code_dtype(len(cats)))
+            categories[col] = cats
+        co2 = np.asarray(store.array(table, 'CO2'), dtype=float)
+        return cls(codes, categories, *cls._encode_co2(co2))
+
+    @staticmethod
+    def _encode_co2(values):
+        encoded = fixed_point(values)
+        if encoded is None:
+            return values.astype(np.float32), None
+        return encoded
+
+    def __len__(self):
+        return len(self._co2)
+
+    def nbytes(self):
+        """
+        Retourne la mémoire occupée par les tableaux et les chaînes distinctes, en octets.
+        """
+        total = self._co2.nbytes + sum(codes.nbytes for codes in self.codes.values())
+        total += sum(sys.getsizeof(s) for cats in self.categories.values() for s in cats)
+        return total
+
+    def co2(self, i):
+        """
+        Retourne le CO2 de la ligne i.
+        """
+        if self._scale is None:
+            return float(self._co2[i])
+        value = int(self._co2[i])
+        return float('nan') if value == MISSING else value / self._scale
+
+    def co2_array(self):
+        """
+        Retourne le CO2 de toutes les lignes (float64).
+        """
+        if self._scale is None:
+            return self._co2.astype(float)
+        return np.where(self._co2 == MISSING, np.nan, self._co2 / self._scale)
+
+    def set_co2(self, values):
+        """
+        Remplace le CO2 de toutes les lignes, réencodé en virgule fixe quand c'est possible.
+        """
+        values = np.asarray(values, dtype=float)
+        if len(values) != len(self):
+            raise ValueError("Le nombre de valeurs de CO2 ne correspond pas à la table")
+        self._co2, self.decimals = self._encode_co2(values)
+        self._scale = None if self.decimals is None else 10.0**self.decimals
+
+    def value(self, column, i):
+        """
+        Retourne la valeur d'une colonne texte à la ligne i (None si elle est manquante).
+        """
+        code = self.codes[column][i]
+        return None if code < 0 else self.categories[column][code]
+
+    def view(self, column):
+        """
+        Retourne une vue indexable sur une colonne (CO2 compris).
+        """
+        if column == 'CO2':
+            return CO2View(self)
+        return ColumnView(self.codes[column], self.categories[column])
+
+    def record(self, i):
+        """
+        Retourne la ligne i sous forme de FactorRecord. Les tables sans french_attribut
+        ou sans main_type/sous_type (énergie, équipements) ont ces champs à None.
+        """
+        nom_column = 'nom' if 'nom' in self.codes else 'french_name'
+        return FactorRecord(
+            i, self.value(nom_column, i),
+            self.value('french_attribut', i) if 'french_attribut' in self.codes else None,
+            self.co2(i),
+            self.value('main_type', i) if 'main_type' in self.codes else None,
+            self.value('sous_type', i) if 'sous_type' in self.codes else None,
+        )
+
+    def categorical(self, column):
+        """
+        Retourne une colonne texte sous forme de pd.Categorical, sans copier les chaînes.
+        """
+        return pd.Categorical.from_codes(self.codes[column], self.categories[column])
+
+    def to_frame(self, columns):
+        """
+        Reconstruit une DataFrame compacte (colonnes category, CO2 float64) avec les colonnes
+        dans l'ordre demandé.
+        """
+        return pd.DataFrame({
+            col: self.co2_array() if col == 'CO2' else self.categorical(col)
+            for col in columns
+        })
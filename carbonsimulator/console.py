@@ -0,0 +1,113 @@
+import builtins
+import json
+import time
+
+
+class SessionExhausted(EOFError):
+    """
+    Levée quand une session scriptée n'a plus de réponse à fournir (comme input() en fin de fichier).
+    """
+
+
+class ConsoleIO:
+    """
+    Entrées et sorties du calculateur sur le terminal : input() et print().
+    """
+
+    def input(self, prompt=""):
+        return builtins.input(prompt)
+
+    def print(self, *args, sep=" ", end="\n"):
+        builtins.print(*args, sep=sep, end=end)
+
+
+# Entrées/sorties utilisées quand aucune n'est fournie aux fonctions du calculateur
+CONSOLE = ConsoleIO()
+
+
+def prompt_key(prompt):
+    """
+    Réduit une question à sa partie fixe (sans le nom du produit entre parenthèses) pour regrouper les mesures.
+    """
+    return prompt.split(" (")[0].split(" :")[0].strip()
+
+
+class ScriptedIO:
+    """
+    Rejoue une liste de réponses à la place de l'utilisateur et capture la sortie.
+
+    Le temps écoulé entre deux questions (affichage du menu, calculs) est mesuré et rattaché
+    à la question qui suit : latencies associe à chaque question la liste de ses durées, en secondes.
+    Si capture vaut False, la sortie n'est pas conservée.
+    """
+
+    def __init__(self, answers, capture=True):
+        self.answers = list(answers)
+        self.position = 0
+        self.capture = capture
+        self.output = []
+        self.latencies = {}
+        self._last = time.perf_counter()
+
+    def input(self, prompt=""):
+        now = time.perf_counter()
+        self.latencies.setdefault(prompt_key(prompt), []).append(now - self._last)
+        if self.capture:
+            self.output.append(prompt)
+        if self.position >= len(self.answers):
+            raise SessionExhausted(f"Plus de réponse pour : {prompt!r}")
+        answer = self.answers[self.position]
+        self.position += 1
+        if self.capture:
+            self.output.append(answer + "\n")
+        self._last = time.perf_counter()
+        return answer
+
+    def print(self, *args, sep=" ", end="\n"):
+        if self.capture:
+            self.output.append(sep.join(str(a) for a in args) + end)
+
+    def remaining(self):
+        """
+        Retourne le nombre de réponses qui n'ont pas été utilisées.
+        """
+        return len(self.answers) - self.position
+
+    def transcript(self):
+        """
+        Retourne la sortie capturée, questions et réponses comprises, comme elle apparaîtrait dans le terminal.
+        """
+        return "".join(self.output)
+
+
+class RecordingIO:
+    """
+    Entrées et sorties d'une autre instance (la console par défaut) qui enregistrent les réponses
+    de l'utilisateur, pour rejouer la session plus tard.
+    """
+
+    def __init__(self, io=CONSOLE):
+        self.io = io
+        self.answers = []
+
+    def input(self, prompt=""):
+        answer = self.io.input(prompt)
+        self.answers.append(answer)
+        return answer
+
+    def print(self, *args, sep=" ", end="\n"):
+        self.io.print(*args, sep=sep, end=end)
+
+    def save(self, path):
+        """
+        Ajoute la session enregistrée (une ligne JSON) au fichier path.
+        """
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.answers, ensure_ascii=False) + "\n")
+
+def load_sessions(path):
+    """
+    Relit les sessions enregistrées par RecordingIO.save (une liste de réponses par ligne).
+    """
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
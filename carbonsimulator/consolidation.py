@@ -0,0 +1,159 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Normalisation des attributs : (motif, remplacement), appliqués en une seule passe de regex
+NORMALISATION_ATTRIBUTS = [
+    (r'\bcru(?:e|es|-[^\s]*| pousses pour salades)?\b', 'cru'),
+    (r'\bpréemballé(?:e|es|-[^\s]*| à réchauffer)?\b', 'préemballé'),
+    (r'\bsurgelé(?:e|es|-[^\s]*)?\b', 'surgelé'),
+    (r'\bséché(?:e|es|-[^\s]*)?\b', 'séché'),
+]
+
+# Noms courts des catégories
+RENOMMAGE_MAIN_TYPE = {
+    'Fruits, légumes, légumineuses et oléagineux': 'Fruits et Légumes',
+    'Entrées et plats composés': 'Plats composés',
+    'Lait et produits laitiers': 'Produits Laitiers',
+}
+
+# Règles de regroupement des aliments.
+# - groupe : famille de la règle (une fonction *_filtering de utils.py par groupe)
+# - match : colonne -> motif (regex insensible à la casse) ou valeur numérique exacte,
+#   toutes les conditions doivent être vraies
+# - CO2 : stratégie d'agrégation ('mean', 'mode' ou 'first')
+# - french_attribut : valeur fixe, ou 'join' pour concaténer les attributs distincts
+# - nom, main_type, sous_type : valeurs de la ligne produite
+# Une règle sans nom supprime les lignes qu'elle reconnaît sans rien produire.
+# Chaque ligne est attribuée à la première règle qui la reconnaît.
+CONSOLIDATION_RULES = [
+    {'groupe': 'glaces', 'match': {'main_type': r'^Glaces et sorbets$', 'nom': r'glac'},
+     'CO2': 'mean', 'nom': 'Glace', 'french_attribut': 'type sundae/à partager/bâtonnet-cône',
+     'main_type': 'Glaces et sorbets', 'sous_type': None},
+    {'groupe': 'glaces', 'match': {'main_type': r'^Glaces et sorbets$', 'nom': r'sorbet'},
+     'CO2': 'mean', 'nom': 'Sorbet', 'french_attribut': 'en bac/bâtonnet',
+     'main_type': 'Glaces et sorbets', 'sous_type': None},
+    {'groupe': 'glaces', 'match': {'main_type': r'^Glaces et sorbets$'}},
+
+    {'groupe': 'chocolat', 'match': {'main_type': r'^Produits sucrés$', 'nom': r'^Chocolat au lait'},
+     'CO2': 'mode', 'nom': 'Chocolat au lait', 'french_attribut': 'tout type',
+     'main_type': 'Produits sucrés', 'sous_type': 'Chocolat'},
+    {'groupe': 'chocolat', 'match': {'main_type': r'^Produits sucrés$', 'nom': r'^Chocolat noir'},
+     'CO2': 'mode', 'nom': 'Chocolat noir', 'french_attribut': 'tout type',
+     'main_type': 'Produits sucrés', 'sous_type': 'Chocolat'},
+    {'groupe': 'chocolat', 'match': {'main_type': r'^Produits sucrés$', 'nom': r'^Chocolat blanc'},
+     'CO2': 'mode', 'nom': 'Chocolat blanc', 'french_attribut': 'tout type',
+     'main_type': 'Produits sucrés', 'sous_type': 'Chocolat'},
+    {'groupe': 'chocolat',
+     'match': {'main_type': r'^Produits sucrés$', 'nom': r'Chocolat au lait|Chocolat noir|Chocolat blanc'}},
+
+    {'groupe': 'matieres_grasses', 'match': {'nom': r'Beurre'},
+     'CO2': 'mean', 'nom': 'Beurre (tous types)', 'french_attribut': 'join',
+     'main_type': 'Matières grasses', 'sous_type': None},
+    {'groupe': 'matieres_grasses', 'match': {'nom': r'Matière grasse végétale'},
+     'CO2': 'mean', 'nom': 'Matière grasse végétale (tous types)', 'french_attribut': 'join',
+     'main_type': 'Matières grasses', 'sous_type': None},
+    {'groupe': 'matieres_grasses', 'match': {'nom': r'Huile combinée'},
+     'CO2': 'mean', 'nom': 'Huile combinée', 'french_attribut': 'join',
+     'main_type': 'Matières grasses', 'sous_type': None},
+    {'groupe': 'matieres_grasses', 'match': {'nom': r'Matière grasse mélangée'},
+     'CO2': 'mean', 'nom': 'Matière grasse mélangée (végétale et laitière)', 'french_attribut': 'join',
+     'main_type': 'Matières grasses', 'sous_type': None},
+
+    {'groupe': 'the', 'match': {'nom': r'Thé', 'CO2': 0.04},
+     'CO2': 'first', 'nom': 'Thé (tous types)', 'french_attribut': 'join',
+     'main_type': 'Boissons', 'sous_type': None},
+]
+
+COLUMNS = ['nom', 'french_attribut', 'CO2', 'main_type', 'sous_type']
+
+
+def normalize_attributs(attributs, normalisation=NORMALISATION_ATTRIBUTS):
+    """
+    Remplace les variantes d'attributs (crue, crues, surgelée...) par leur forme courte
+    en un seul passage d'une regex combinant tous les motifs.
+    """
+    pattern = re.compile(
+        '|'.join(f'(?P<r{i}>{motif})' for i, (motif, _) in enumerate(normalisation)), re.IGNORECASE)
+    remplacements = {f'r{i}': remplacement for i, (_, remplacement) in enumerate(normalisation)}
+
+    return attributs.str.replace(pattern, lambda m: remplacements[m.lastgroup], regex=True)
+
+def merge_attributs(data):
+    """
+    Fusionne les attributs des aliments ayant le même nom et le même CO2.
+    Les attributs sont concaténés et séparés d'un '-', la ligne fusionnée ne garde pas de sous_type.
+    """
+    data = data.dropna(subset=['nom', 'CO2'])
+    sizes = data.groupby(['nom', 'CO2'])['nom'].transform('size')
+
+    singles = data[sizes == 1]
+    merged = data[sizes > 1].groupby(['nom', 'CO2'], as_index=False, sort=False).agg(
+        french_attribut=('french_attribut', '-'.join),
+        main_type=('main_type', 'first'),
+    )
+
+    # Même ordre que le groupby(['nom', 'CO2']) d'origine
+    result = pd.concat([singles, merged], ignore_index=True)
+    result = result.sort_values(['nom', 'CO2'], kind='mergesort').reset_index(drop=True)
+
+    return result[[col for col in COLUMNS if col in result]]
+
+def match_rules(data, rules):
+    """
+    Retourne, pour chaque ligne, l'indice de la première règle qui la reconnaît (-1 sinon).
+    """
+    rule_ids = np.full(len(data), -1)
+    # Parcours à l'envers pour que la première règle l'emporte
+    for rule_id in range(len(rules) - 1, -1, -1):
+        mask = np.ones(len(data), dtype=bool)
+        for col, condition in rules[rule_id]['match'].items():
+            if isinstance(condition, str):
+                mask &= data[col].str.contains(condition, case=False, na=False).to_numpy()
+            else:
+                mask &= (data[col] == condition).to_numpy()
+        rule_ids[mask] = rule_id
+    return rule_ids
+
+def apply_rules(data, rules=CONSOLIDATION_RULES):
+    """
+    Applique les règles de regroupement en une passe : chaque ligne est attribuée à une règle,
+    les lignes reconnues sont retirées et chaque règle produisant un aliment ajoute une ligne agrégée.
+    Les agrégations sont calculées par un seul groupby sur l'indice de règle.
+    """
+    rule_ids = match_rules(data, rules)
+    matched = data[rule_ids >= 0].assign(_regle=rule_ids[rule_ids >= 0])
+    by_rule = matched.groupby('_regle', sort=False)
+
+    co2 = {
+        'mean': by_rule['CO2'].mean(),
+        'first': by_rule['CO2'].first(),
+        # Valeur la plus fréquente, la plus petite en cas d'égalité (comme Series.mode)
+        'mode': matched.groupby(['_regle', 'CO2']).size().reset_index(name='n')
+                       .sort_values(['_regle', 'n', 'CO2'], ascending=[True, False, True])
+                       .drop_duplicates('_regle').set_index('_regle')['CO2'],
+    }
+    attributs = (matched.dropna(subset=['french_attribut'])
+                 .drop_duplicates(['_regle', 'french_attribut'])
+                 .groupby('_regle')['french_attribut'].agg(' / '.join))
+
+    rows = []
+    for rule_id, rule in enumerate(rules):
+        if 'nom' not in rule or rule_id not in co2['first'].index:
+            continue
+        rows.append({
+            'nom': rule['nom'],
+            'french_attribut': attributs.get(rule_id, '') if rule['french_attribut'] == 'join'
+                               else rule['french_attribut'],
+            'CO2': co2[rule['CO2']][rule_id],
+            'main_type': rule['main_type'],
+            'sous_type': rule['sous_type'],
+        })
+
+    result = pd.concat([data[rule_ids == -1], pd.DataFrame(rows, columns=COLUMNS)], ignore_index=True)
+
+    # Arrondir le CO2 à 2 chiffres après la virgule
+    result['CO2'] = result['CO2'].round(2)
+
+    return result
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+from carbonsimulator.batch import build_factor_table, resolve_ledger
+
+LEVELS = ['day', 'week', 'month']
+DIMENSIONS = ['restaurant', 'periode', 'source', 'main_type', 'sous_type']
+
+
+def period_start(dates, level):
+    """
+    Retourne le début de la période (jour, semaine commençant le lundi ou mois) de chaque date.
+    """
+    dates = pd.to_datetime(dates)
+    if level == 'day':
+        return dates.dt.normalize()
+    if level == 'week':
+        return dates.dt.to_period('W-SUN').dt.start_time
+    if level == 'month':
+        return dates.dt.to_period('M').dt.start_time
+    raise ValueError(f"Niveau inconnu : {level} (attendu : {', '.join(LEVELS)})")
+
+
+class FootprintCube:
+    """
+    Cube pré-agrégé des émissions : restaurant x période x source x main_type x sous_type,
+    maintenu aux niveaux jour, semaine et mois.
+
+    Les lignes brutes ne sont lues qu'une fois, à l'ajout : elles sont agrégées par jour puis
+    fusionnées dans chaque niveau. Les requêtes ne parcourent ensuite que le cube.
+    """
+
+    def __init__(self, aliments, equipements, energie):
+        self.factors = build_factor_table(aliments, equipements, energie)
+        self.levels = {level: None for level in LEVELS}
+
+    def append(self, ledger):
+        """
+        Ajoute des lignes au cube. Le registre contient les colonnes de batch.resolve_ledger
+        (restaurant, source, nom, french_attribut, quantite) et une colonne date.
+        """
+        resolved = resolve_ledger(ledger, self.factors)
+        resolved['main_type'] = resolved['main_type'].fillna('')
+        resolved['sous_type'] = resolved['sous_type'].fillna('')
+        resolved['periode'] = period_start(resolved['date'], 'day')
+        daily = resolved.groupby(DIMENSIONS)[['emission', 'quantite']].sum().reset_index()
+
+        for level in LEVELS:
+            # Les semaines et les mois sont agrégés à partir des jours, pas des lignes brutes
+            # ni du niveau précédent (une semaine peut chevaucher deux mois)
+            partial = daily.assign(periode=period_start(daily['periode'], level))
+            partial = partial.groupby(DIMENSIONS)[['emission', 'quantite']].sum()
+
+            current = self.levels[level]
+            if current is not None:
+                # Seules les cellules touchées par le nouvel ajout sont recalculées
+                partial = partial.add(current.reindex(partial.index), fill_value=0)
+                current = current[~current.index.isin(partial.index)]
+                partial = pd.concat([current, partial]).sort_index()
+            self.levels[level] = partial
+
+    def query(self, level='month', start=None, end=None, restaurants=None, by=('source',)):
+        """
+        Retourne les émissions par restaurant et par période entre start et end (inclus),
+        avec une colonne par combinaison des dimensions de by (source, main_type, sous_type).
+        """
+        cube = self.levels[level]
+        if cube is None:
+            return pd.DataFrame()
+
+        periodes = cube.index.get_level_values('periode')
+        mask = np.ones(len(cube), dtype=bool)
+        if start is not None:
+            mask &= periodes >= period_start(pd.Series([start]), level)[0]
+        if end is not None:
+            mask &= periodes <= pd.Timestamp(end)
+        if restaurants is not None:
+            mask &= cube.index.get_level_values('restaurant').isin(restaurants)
+
+        result = cube[mask].groupby(['restaurant', 'periode'] + list(by))['emission'].sum()
+        if by:
+            result = result.unstack(list(by), fill_value=0.0)
+        return result
+
+    def rolling(self, window, level='day', start=None, end=None, restaurants=None):
+        """
+        Retourne, pour chaque restaurant, la somme glissante des émissions sur window périodes.
+        Les périodes sans émission comptent pour 0.
+        """
+        totals = self.query(level, start, end, restaurants, by=()).unstack('restaurant', fill_value=0.0)
+        if totals.empty:
+            return totals
+
+        freq = {'day': 'D', 'week': 'W-MON', 'month': 'MS'}[level]
+        totals = totals.reindex(pd.date_range(totals.index.min(), totals.index.max(), freq=freq), fill_value=0.0)
+        return totals.rolling(window, min_periods=1).sum()
+
+    def save(self, path):
+        """
+        Enregistre le cube (sans les facteurs) dans un fichier pickle.
+        """
+        pd.to_pickle(self.levels, path)
+
+    def load(self, path):
+        """
+        Recharge un cube enregistré par save.
+        """
+        self.levels = pd.read_pickle(path)
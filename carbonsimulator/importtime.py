@@ -0,0 +1,53 @@
+import json
+import subprocess
+import sys
+
+# Budget d'import en secondes d'un module du package dans un processus neuf.
+# L'import de pandas représente à lui seul l'essentiel de ce temps.
+IMPORT_TIME_BUDGET = 0.6
+
+# Modules qui ne doivent pas être chargés par un simple import en mode headless
+FORBIDDEN_MODULES = ['matplotlib', 'seaborn']
+
+_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'elapsed': elapsed, 'modules': sorted({{m.split('.')[0] for m in sys.modules}})}}))
+"""
+
+
+def measure_import_time(module="carbonsimulator.calculator", repeat=5):
+    """
+    Mesure le temps d'import d'un module dans des processus Python neufs.
+    Retourne le meilleur temps (en secondes) et la liste des modules de premier niveau chargés.
+    """
+    timings = []
+    modules = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _SCRIPT.format(module=module)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output)
+        timings.append(result['elapsed'])
+        modules = result['modules']
+    return min(timings), modules
+
+def check_import_budget(module="carbonsimulator.calculator", budget=IMPORT_TIME_BUDGET, repeat=5):
+    """
+    Vérifie que l'import du module respecte le budget et ne charge aucune bibliothèque graphique.
+    Retourne True si c'est le cas, en affichant le détail de la mesure.
+    """
+    elapsed, modules = measure_import_time(module, repeat)
+    loaded = [m for m in FORBIDDEN_MODULES if m in modules]
+
+    print(f"Import de {module} : {elapsed * 1000:.0f} ms (budget : {budget * 1000:.0f} ms)")
+    if loaded:
+        print(f"Modules graphiques chargés à l'import : {', '.join(loaded)}")
+
+    return elapsed <= budget and not loaded
+
+if __name__ == "__main__":
+    sys.exit(0 if check_import_budget(*sys.argv[1:2]) else 1)
@@ -0,0 +1,86 @@
+from carbonsimulator.compact import CompactTable
+
+# Catégories dont les produits sont proposés directement, sans passer par les sous-types
+CATEGORIES_SANS_SOUS_TYPE = ['Glaces et sorbets', 'Matières grasses', 'Aliments infantiles']
+
+# Valeur par défaut de produits() : None est déjà la clé des sous-types manquants
+_TOUS = object()
+
+
+class FactorIndex:
+    """
+    Index hiérarchique des aliments construit une seule fois au chargement :
+    main_type -> sous_type -> produits.
+
+    Chaque produit reçoit un identifiant entier stable (sa position dans la table aliments_final),
+    ce qui permet de retrouver son CO2 et ses attributs en O(1) sans refiltrer la DataFrame.
+    Les sous-types manquants sont regroupés sous la clé None.
+
+    Les colonnes sont gardées dans une CompactTable (codes entiers et CO2 en virgule fixe) :
+    noms, attributs, co2_values, main_type_values et sous_type_values en sont des vues.
+    """
+
+    def __init__(self, aliments):
+        if isinstance(aliments, CompactTable):
+            self.table = aliments
+        else:
+            self.table = CompactTable.from_frame(
+                aliments.reset_index(drop=True), ['nom', 'french_attribut', 'main_type', 'sous_type'])
+
+        self.noms = self.table.view('nom')
+        self.attributs = self.table.view('french_attribut')
+        self.co2_values = self.table.view('CO2')
+        self.main_type_values = self.table.view('main_type')
+        self.sous_type_values = self.table.view('sous_type')
+
+        # Les dictionnaires gardent l'ordre d'apparition, comme unique()
+        self.tree = {}
+        self.by_main_type = {}
+        self.by_key = {}
+        rows = zip(self.main_type_values, self.sous_type_values, self.noms, self.attributs)
+        for produit_id, (main_type, sous_type, nom, attribut) in enumerate(rows):
+            self.tree.setdefault(main_type, {}).setdefault(sous_type, []).append(produit_id)
+            self.by_main_type.setdefault(main_type, []).append(produit_id)
+            self.by_key.setdefault((nom, attribut), produit_id)
+
+    def __len__(self):
+        return len(self.table)
+
+    def main_types(self):
+        """
+        Retourne la liste des main_type dans leur ordre d'apparition.
+        """
+        return list(self.tree)
+
+    def sous_types(self, main_type):
+        """
+        Retourne la liste des sous_type d'un main_type.
+        """
+        return list(self.tree[main_type])
+
+    def produits(self, main_type, sous_type=_TOUS):
+        """
+        Retourne les identifiants des produits d'un main_type, ou d'un couple (main_type, sous_type)
+        si sous_type est renseigné.
+        """
+        if sous_type is _TOUS:
+            return self.by_main_type[main_type]
+        return self.tree[main_type][sous_type]
+
+    def co2(self, produit_id):
+        """
+        Retourne le CO2 d'un produit.
+        """
+        return self.table.co2(produit_id)
+
+    def produit(self, produit_id):
+        """
+        Retourne les informations d'un produit sous forme de FactorRecord.
+        """
+        return self.table.record(produit_id)
+
+    def lookup(self, nom, french_attribut):
+        """
+        Retourne l'identifiant du produit (nom, french_attribut), ou None s'il n'existe pas.
+        """
+        return self.by_key.get((nom, french_attribut))
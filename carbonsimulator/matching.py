@@ -0,0 +1,254 @@
+import hashlib
+import os
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Poids de chaque champ dans la description d'un facteur
+FIELDS = {'nom': 1.0, 'french_attribut': 0.5, 'sous_type': 0.3}
+
+# Mots vides et unités fréquents dans les libellés de factures
+STOPWORDS = {
+    'a', 'au', 'aux', 'avec', 'd', 'de', 'des', 'du', 'en', 'et', 'l', 'la', 'le', 'les', 'ou', 'pour', 'sans', 'sur',
+    'g', 'gr', 'kg', 'l', 'cl', 'ml', 'pce', 'pcs', 'piece', 'pieces', 'lot', 'colis', 'carton', 'sachet', 'x',
+}
+
+# Séparateur des attributs regroupés par les règles de consolidation (« cru / surgelé / doux »)
+CONSOLIDATED_SEPARATOR = ' / '
+
+# Similarité minimale (Dice sur les trigrammes) entre un mot de facture et un mot de l'index
+MIN_TOKEN_SIMILARITY = 0.5
+# Confiance minimale pour qu'une ligne soit considérée comme reconnue
+MIN_CONFIDENCE = 0.3
+# Version du calcul des correspondances : un cache d'une autre version est ignoré
+CACHE_VERSION = 2
+
+
+def normalize(text):
+    """
+    Met un libellé en minuscules, sans accents ni ponctuation.
+    """
+    if not isinstance(text, str):
+        return ""
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+
+def tokenize(text):
+    """
+    Retourne les mots significatifs d'un libellé normalisé : sans mots vides ni quantités (5kg, x12, 1.5...).
+    """
+    return [t for t in text.split() if t not in STOPWORDS and not re.fullmatch(r"x?\d+[a-z]{0,2}", t)]
+
+def trigrams(token):
+    """
+    Retourne l'ensemble des trigrammes d'un mot, bordé d'espaces.
+    """
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def table_hash(aliments):
+    """
+    Empreinte sha256 des colonnes indexées : le cache de correspondances n'est valable que pour cette table.
+    """
+    digest = hashlib.sha256()
+    for col in FIELDS:
+        digest.update(pd.util.hash_pandas_object(aliments[col].fillna(''), index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class InvoiceMatcher:
+    """
+    Rapproche des libellés libres de factures fournisseurs des facteurs d'aliments_final.
+
+    L'index est construit une seule fois : chaque facteur est décrit par les mots de son nom,
+    de son french_attribut et de son sous_type (pondérés par FIELDS et par leur idf).
+    Un mot de facture est rapproché des mots de l'index par un index inversé de trigrammes,
+    ce qui tolère les fautes, pluriels et abréviations sans jamais comparer une facture à tous les facteurs ;
+    une occurrence exacte du mot l'emporte toujours sur un mot seulement proche.
+    La confiance d'une correspondance est le cosinus entre la ligne et le facteur (entre 0 et 1).
+    Pour un attribut consolidé (variantes séparées par CONSOLIDATED_SEPARATOR), seule la variante
+    la plus lourde compte dans la norme du facteur : il ne doit pas être pénalisé par le nombre de variantes.
+
+    Les correspondances sont mémorisées par libellé normalisé, et peuvent être conservées
+    d'une exécution à l'autre dans cache_path : le fichier n'est lu qu'une fois, à la construction,
+    puis le cache reste en mémoire pour tous les appels à match.
+    """
+
+    def __init__(self, aliments, cache_path=None, min_similarity=MIN_TOKEN_SIMILARITY):
+        self.aliments = aliments.reset_index(drop=True)
+        self.min_similarity = min_similarity
+        self.cache_path = cache_path
+        self.hash = table_hash(self.aliments)
+
+        # Poids de chaque (facteur, mot) : le poids du champ le plus important où le mot apparaît
+        weights = {}
+        variants = {}
+        for col, field_weight in FIELDS.items():
+            for row, value in enumerate(self.aliments[col].tolist()):
+                if isinstance(value, str) and CONSOLIDATED_SEPARATOR in value:
+                    variants.setdefault(row, []).extend(
+                        (field_weight, tokenize(normalize(v))) for v in value.split(CONSOLIDATED_SEPARATOR))
+                    continue
+                for token in tokenize(normalize(value)):
+                    key = (row, token)
+                    weights[key] = max(weights.get(key, 0.0), field_weight)
+        plain = set(weights)
+        for row, row_variants in variants.items():
+            for field_weight, variant in row_variants:
+                for token in variant:
+                    key = (row, token)
+                    weights[key] = max(weights.get(key, 0.0), field_weight)
+
+        self.vocabulary = sorted({token for _, token in weights})
+        token_ids = {token: i for i, token in enumerate(self.vocabulary)}
+        self._token_ids = token_ids
+        rows = np.fromiter((row for row, _ in weights), dtype=np.int64, count=len(weights))
+        tokens = np.fromiter((token_ids[token] for _, token in weights), dtype=np.int64, count=len(weights))
+        values = np.fromiter(weights.values(), dtype=float, count=len(weights))
+
+        # idf des mots, puis poids tf-idf et norme de chaque facteur
+        n_rows = len(self.aliments)
+        self.idf = np.log((1 + n_rows) / (1 + np.bincount(tokens, minlength=len(self.vocabulary)))) + 1
+        fields = values.copy()
+        values *= self.idf[tokens]
+        in_norm = np.fromiter((key in plain for key in weights), dtype=bool, count=len(weights))
+        squares = np.bincount(rows[in_norm], weights=values[in_norm]**2, minlength=n_rows)
+        for row, row_variants in variants.items():
+            # Mots propres aux variantes consolidées : seule la variante la plus lourde est comptée
+            squares[row] += max(
+                sum((field_weight * self.idf[token_ids[token]])**2 for token in set(variant)
+                    if (row, token) not in plain)
+                for field_weight, variant in row_variants)
+        self.row_norms = np.sqrt(squares)
+
+        # Index inversé mot -> facteurs, trié par mot
+        order = np.argsort(tokens, kind='stable')
+        self._postings_rows = rows[order]
+        self._postings_values = values[order]
+        self._postings_fields = fields[order]
+        self._postings_start = np.searchsorted(tokens[order], np.arange(len(self.vocabulary) + 1))
+
+        # Index inversé trigramme -> mots du vocabulaire
+        by_trigram = {}
+        for token_id, token in enumerate(self.vocabulary):
+            for trigram in trigrams(token):
+                by_trigram.setdefault(trigram, []).append(token_id)
+        self._trigrams = {k: np.asarray(v, dtype=np.int64) for k, v in by_trigram.items()}
+        self._trigram_counts = np.array([len(trigrams(token)) for token in self.vocabulary])
+
+        self._token_cache = {}
+        self.cache = self._load_cache()
+
+    def _load_cache(self):
+        if self.cache_path and os.path.exists(self.cache_path):
+            saved = pd.read_pickle(self.cache_path)
+            if saved.get('hash') == self.hash and saved.get('version') == CACHE_VERSION:
+                return saved['matches']
+        return {}
+
+    def save_cache(self):
+        """
+        Enregistre les correspondances déjà résolues dans cache_path.
+        """
+        if self.cache_path:
+            pd.to_pickle({'hash': self.hash, 'version': CACHE_VERSION, 'matches': self.cache}, self.cache_path)
+
+    def similar_tokens(self, token):
+        """
+        Retourne les mots du vocabulaire proches d'un mot (identifiants et similarités de Dice).
+        """
+        grams = trigrams(token)
+        candidates = [self._trigrams[g] for g in grams if g in self._trigrams]
+        if not candidates:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        common = np.bincount(np.concatenate(candidates), minlength=len(self.vocabulary))
+        ids = np.flatnonzero(common)
+        similarity = 2 * common[ids] / (len(grams) + self._trigram_counts[ids])
+        keep = similarity >= self.min_similarity
+        return ids[keep], similarity[keep]
+
+    def _token_scores(self, token):
+        """
+        Retourne, pour un mot de facture, les facteurs qui contiennent un mot proche, la contribution
+        de ce mot au produit scalaire avec chacun d'eux et le poids du mot dans la ligne.
+
+        Le poids du mot est son propre idf : celui du mot exact s'il est dans l'index, sinon celui
+        du mot le plus proche (l'idf maximal si aucun ne l'est), jamais celui de chaque voisin.
+        """
+        cached = self._token_cache.get(token)
+        if cached is not None:
+            return cached
+
+        ids, similarity = self.similar_tokens(token)
+        if len(ids) == 0:
+            # Mot inconnu : il compte dans la norme de la ligne avec l'idf maximal
+            result = (np.empty(0, dtype=np.int64), np.empty(0), self.idf.max())
+        else:
+            token_id = self._token_ids.get(token, ids[np.argmax(similarity)])
+            query_weight = self.idf[token_id]
+            starts, ends = self._postings_start[ids], self._postings_start[ids + 1]
+            lengths = ends - starts
+            positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+            # Un voisin compte au plus avec l'idf du mot de facture, pas avec le sien : un mot rare
+            # mais seulement proche (poule pour poulet) ne peut pas l'emporter sur une occurrence exacte
+            values = np.minimum(self._postings_values[positions], self._postings_fields[positions] * query_weight)
+            contributions = values * np.repeat(similarity, lengths) * query_weight
+            rows = self._postings_rows[positions]
+
+            # Un mot de facture ne compte qu'une fois par facteur : son meilleur rapprochement
+            order = np.lexsort((-contributions, rows))
+            rows, contributions = rows[order], contributions[order]
+            first = np.ones(len(rows), dtype=bool)
+            first[1:] = rows[1:] != rows[:-1]
+            result = (rows[first], contributions[first], query_weight)
+
+        self._token_cache[token] = result
+        return result
+
+    def match_one(self, text):
+        """
+        Retourne (identifiant du facteur, confiance) pour un libellé normalisé, (-1, 0.0) si aucun mot n'est reconnu.
+        """
+        scores = np.zeros(len(self.aliments))
+        norm = 0.0
+        for token in dict.fromkeys(tokenize(text)):
+            rows, contributions, weight = self._token_scores(token)
+            np.add.at(scores, rows, contributions)
+            norm += weight**2
+        if norm == 0 or not scores.any():
+            return -1, 0.0
+
+        confidence = scores / (np.sqrt(norm) * np.where(self.row_norms > 0, self.row_norms, 1.0))
+        best = int(np.argmax(confidence))
+        return best, float(min(confidence[best], 1.0))
+
+    def match(self, lignes, min_confidence=MIN_CONFIDENCE):
+        """
+        Rapproche une liste (ou Series) de libellés de factures des facteurs d'aliments.
+
+        Retourne une DataFrame alignée sur les libellés : le libellé, l'identifiant du facteur
+        (position dans aliments_final, -1 si non reconnu), la confiance et les colonnes du facteur.
+        Les libellés dont la confiance est inférieure à min_confidence ne sont pas rapprochés.
+        """
+        lignes = pd.Series(lignes, dtype=object).reset_index(drop=True)
+        codes, texts = pd.factorize(lignes.map(normalize))
+
+        # Chaque libellé distinct n'est rapproché qu'une fois, et seulement s'il n'est pas en cache.
+        # Seuls les libellés du lot sont cherchés dans le cache, qui n'est jamais parcouru en entier
+        resolved = []
+        for text in texts:
+            match = self.cache.get(text)
+            if match is None:
+                match = self.cache[text] = self.match_one(text)
+            resolved.append(match)
+
+        produit_ids = np.array([r[0] for r in resolved], dtype=np.int64)[codes]
+        confidences = np.array([r[1] for r in resolved], dtype=float)[codes]
+        produit_ids[confidences < min_confidence] = -1
+
+        factors = self.aliments.reindex(produit_ids).reset_index(drop=True)
+        result = pd.DataFrame({'ligne': lignes, 'produit_id': produit_ids, 'confiance': confidences.round(3)})
+        return pd.concat([result, factors], axis=1)
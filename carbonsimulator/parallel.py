@@ -0,0 +1,69 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from carbonsimulator.store import DATA_DIR
+from carbonsimulator.utils import (
+    aliments_filtering, aliments_final, consolidate_aliments, energie_filtering,
+    equipements_filtering, load_raw_data, write_if_changed)
+
+
+def partition_aliments(aliments):
+    """
+    Découpe les aliments bruts par main_type.
+    Toutes les étapes d'aliments_final regroupent par nom : un nom présent dans plusieurs main_type
+    est rattaché au main_type de sa première occurrence pour que chaque nom reste dans une seule partition.
+    """
+    partition = aliments.groupby('french_name', sort=False)['main_type'].transform('first').fillna('')
+    return [part for _, part in aliments.groupby(partition, sort=True)]
+
+def _aliments_stage(aliments):
+    return aliments_final(aliments_filtering(aliments))
+
+def submit_build(executor, aliments, equipements, energie):
+    """
+    Soumet au pool toutes les tâches de nettoyage d'un jeu de données
+    et retourne les futures (étapes des aliments, énergie, équipements).
+    """
+    stages = [executor.submit(_aliments_stage, part) for part in partition_aliments(aliments)]
+    return stages, executor.submit(energie_filtering, energie), executor.submit(equipements_filtering, equipements)
+
+def collect_build(stages, energie, equipements):
+    """
+    Fusionne dans un ordre déterministe les résultats soumis par submit_build
+    et retourne les tables (aliments_final, energie_filtered, equipements_filtered).
+    """
+    # Même ordre que le groupby(['nom', 'CO2']) d'aliments_final
+    stage = pd.concat([future.result() for future in stages], ignore_index=True)
+    stage = stage.sort_values(['nom', 'CO2'], kind='mergesort').reset_index(drop=True)
+
+    return consolidate_aliments(stage), energie.result(), equipements.result()
+
+def parallel_build_tables(aliments, equipements, energie, processes=None):
+    """
+    Équivalent parallèle de build_tables : les partitions d'aliments, l'énergie et les équipements
+    sont traités dans un pool de processus puis fusionnés dans un ordre déterministe.
+    Le résultat est identique à celui de build_tables.
+    """
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return collect_build(*submit_build(executor, aliments, equipements, energie))
+
+def parallel_rebuild(data_dirs=(DATA_DIR,), processes=None):
+    """
+    Reconstruit les tables de plusieurs jeux de données (un dossier par région par exemple)
+    avec un seul pool de processus partagé, et n'écrit que les fichiers dont le contenu a changé.
+    Retourne, pour chaque dossier, la liste des fichiers réécrits.
+    """
+    filenames = ["aliments_final.csv", "energie_filtered.csv", "equipements_filtered.csv"]
+    written = {}
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        # Toutes les tâches sont soumises avant d'attendre le premier résultat
+        pending = {data_dir: submit_build(executor, *load_raw_data(data_dir)) for data_dir in data_dirs}
+        for data_dir, futures in pending.items():
+            tables = collect_build(*futures)
+            written[data_dir] = [
+                filename for data, filename in zip(tables, filenames)
+                if write_if_changed(data, os.path.join(data_dir, filename))
+            ]
+    return written
@@ -0,0 +1,264 @@
+import numpy as np
+import pandas as pd
+
+from carbonsimulator.index import FactorIndex
+
+RECIPE_COLUMNS = ['recette', 'ingredient', 'french_attribut', 'quantite']
+# Colonne des aliments sans main_type dans les empreintes détaillées
+MAIN_TYPE_INCONNU = 'Inconnu'
+
+
+class RecipeBook:
+    """
+    Recettes et menus évalués sur les facteurs d'aliments_final.
+
+    Une recette liste des ingrédients avec leur quantité (en unité du facteur, le plus souvent le kg) :
+    chaque ingrédient est soit un aliment (nom et, éventuellement, french_attribut), soit une autre
+    recette (sauce, fond...), dont la quantité est alors exprimée en unités produites par cette recette.
+    Le rendement d'une recette est le nombre d'unités (portions, kg...) que produisent ses ingrédients.
+
+    Les recettes forment un graphe orienté sans cycle. L'empreinte d'une unité de chaque recette,
+    détaillée par main_type, est mémorisée : elle n'est recalculée que si la recette, une de ses
+    sous-recettes ou le facteur d'un de ses aliments change. Les aliments sans main_type sont
+    comptés dans la colonne MAIN_TYPE_INCONNU.
+    """
+
+    def __init__(self, aliments):
+        self.index = aliments if isinstance(aliments, FactorIndex) else FactorIndex(aliments)
+        table = self.index.table
+        self.co2 = np.nan_to_num(table.co2_array())
+        self.main_types = list(table.categories['main_type'])
+        codes = table.codes['main_type']
+        if (codes < 0).any():
+            codes = np.where(codes < 0, len(self.main_types), codes)
+            self.main_types.append(MAIN_TYPE_INCONNU)
+        self.main_type_codes = codes
+
+        # Premier produit de chaque nom, pour les ingrédients donnés sans attribut
+        self.by_nom = {}
+        for produit_id, nom in enumerate(self.index.noms):
+            self.by_nom.setdefault(nom, produit_id)
+
+        self.recipes = {}
+        self.rendements = {}
+        # Arêtes inverses du graphe : recettes qui utilisent un aliment ou une sous-recette
+        self._users = {}
+        self._parents = {}
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.recipes)
+
+    def __contains__(self, recette):
+        return recette in self.recipes
+
+    def _resolve(self, nom, french_attribut):
+        """
+        Retourne ('recette', nom) ou ('aliment', identifiant) pour un ingrédient.
+        """
+        if french_attribut is None or (isinstance(french_attribut, float) and np.isnan(french_attribut)):
+            if nom in self.recipes:
+                return 'recette', nom
+            produit_id = self.by_nom.get(nom)
+        else:
+            produit_id = self.index.lookup(nom, french_attribut)
+        if produit_id is None:
+            raise ValueError(f"Ingrédient inconnu : {nom!r} ({french_attribut!r})")
+        return 'aliment', produit_id
+
+    def add(self, recette, ingredients, rendement=1.0):
+        """
+        Ajoute ou remplace une recette. ingredients est une liste de tuples (nom, quantite)
+        ou (nom, french_attribut, quantite) ; un nom sans attribut désigne une recette
+        s'il en existe une de ce nom, sinon le premier aliment de ce nom.
+        Les sous-recettes doivent être ajoutées avant les recettes qui les utilisent.
+        """
+        if rendement <= 0:
+            raise ValueError(f"Rendement invalide pour {recette!r} : {rendement}")
+
+        resolved = []
+        for ingredient in ingredients:
+            if len(ingredient) == 2:
+                nom, quantite = ingredient
+                french_attribut = None
+            else:
+                nom, french_attribut, quantite = ingredient
+            kind, key = self._resolve(nom, french_attribut)
+            if kind == 'recette' and (key == recette or recette in self._sous_recettes(key)):
+                raise ValueError(f"Cycle de recettes : {recette!r} utilise {key!r}")
+            resolved.append((kind, key, float(quantite)))
+
+        if recette in self.recipes:
+            self._unlink(recette)
+            self.invalidate(recette)
+        self.recipes[recette] = resolved
+        self.rendements[recette] = float(rendement)
+        for kind, key, _ in resolved:
+            users = self._parents if kind == 'recette' else self._users
+            users.setdefault(key, set()).add(recette)
+
+    def _unlink(self, recette):
+        for kind, key, _ in self.recipes[recette]:
+            users = self._parents if kind == 'recette' else self._users
+            users.get(key, set()).discard(recette)
+
+    def _sous_recettes(self, recette):
+        """
+        Retourne les sous-recettes utilisées, directement ou non, par une recette.
+        """
+        seen = set()
+        stack = [recette]
+        while stack:
+            for kind, key, _ in self.recipes.get(stack.pop(), []):
+                if kind == 'recette' and key not in seen:
+                    seen.add(key)
+                    stack.append(key)
+        return seen
+
+    def remove(self, recette):
+        """
+        Supprime une recette qui n'est utilisée par aucune autre.
+        """
+        if self._parents.get(recette):
+            raise ValueError(f"{recette!r} est utilisée par : {sorted(self._parents[recette])}")
+        self.invalidate(recette)
+        self._unlink(recette)
+        del self.recipes[recette]
+        del self.rendements[recette]
+
+    def invalidate(self, recette):
+        """
+        Oublie l'empreinte mémorisée d'une recette et de toutes celles qui l'utilisent.
+        """
+        stack = [recette]
+        while stack:
+            current = stack.pop()
+            if self._cache.pop(current, None) is not None or current == recette:
+                stack.extend(self._parents.get(current, ()))
+
+    def set_factor(self, nom, french_attribut, co2):
+        """
+        Change le CO2 d'un aliment (dans l'index aussi) et invalide les recettes qui en dépendent.
+        """
+        _, produit_id = self._resolve(nom, french_attribut)
+        if self._set_co2(produit_id, co2):
+            values = self.index.table.co2_array()
+            values[produit_id] = co2
+            self.index.table.set_co2(values)
+
+    def _set_co2(self, produit_id, co2):
+        if self.co2[produit_id] == co2:
+            return False
+        self.co2[produit_id] = co2
+        for recette in self._users.get(produit_id, ()):
+            self.invalidate(recette)
+        return True
+
+    def update_factors(self, aliments):
+        """
+        Recharge les facteurs depuis une nouvelle table aliments_final (mêmes produits, dans le même ordre)
+        et n'invalide que les recettes dont un aliment a changé. Le CO2 de l'index est remplacé
+        par celui de la nouvelle table. Retourne le nombre de facteurs modifiés.
+        """
+        values = aliments['CO2'].to_numpy(dtype=float)
+        co2 = np.nan_to_num(values)
+        if len(co2) != len(self.co2):
+            raise ValueError("La nouvelle table ne contient pas les mêmes produits")
+        changed = np.flatnonzero(co2 != self.co2)
+        for produit_id in changed.tolist():
+            self._set_co2(produit_id, co2[produit_id])
+        if len(changed):
+            self.index.table.set_co2(values)
+        return len(changed)
+
+    def breakdown(self, recette):
+        """
+        Retourne l'empreinte d'une unité de la recette par main_type (tableau aligné sur main_types).
+        """
+        cached = self._cache.get(recette)
+        if cached is not None:
+            return cached
+
+        if recette not in self.recipes:
+            raise KeyError(f"Recette inconnue : {recette!r}")
+        result = np.zeros(len(self.main_types))
+        for kind, key, quantite in self.recipes[recette]:
+            if kind == 'recette':
+                result += quantite * self.breakdown(key)
+            else:
+                result[self.main_type_codes[key]] += quantite * self.co2[key]
+        result /= self.rendements[recette]
+        result.flags.writeable = False
+
+        self._cache[recette] = result
+        return result
+
+    def footprint(self, recette):
+        """
+        Retourne l'empreinte d'une unité de la recette, en kgCO2.
+        """
+        return float(self.breakdown(recette).sum())
+
+    def footprints(self):
+        """
+        Retourne l'empreinte d'une unité de chaque recette, par main_type et au total.
+        """
+        names = list(self.recipes)
+        matrix = np.vstack([self.breakdown(name) for name in names]) if names else np.zeros((0, len(self.main_types)))
+        result = pd.DataFrame(matrix, index=pd.Index(names, name='recette'), columns=self.main_types)
+        result['total'] = matrix.sum(axis=1)
+        return result
+
+    def menu(self, couverts):
+        """
+        Agrège l'empreinte d'un menu à partir des couverts vendus par plat (dictionnaire ou Series).
+        Retourne (total en kgCO2, émissions par main_type, émissions par plat).
+        """
+        couverts = pd.Series(couverts, dtype=float)
+        quantites = couverts.to_numpy()
+        matrix = np.vstack([self.breakdown(plat) for plat in couverts.index]) if len(couverts) else \
+            np.zeros((0, len(self.main_types)))
+
+        par_plat = pd.Series(matrix.sum(axis=1) * quantites, index=couverts.index)
+        par_main_type = pd.Series(quantites @ matrix, index=self.main_types)
+        return float(par_plat.sum()), par_main_type[par_main_type != 0], par_plat
+
+
+def load_recipes(aliments, recipes):
+    """
+    Construit un RecipeBook à partir d'une table de recettes (colonnes recette, ingredient,
+    french_attribut, quantite et, optionnellement, rendement). Les recettes peuvent être
+    dans n'importe quel ordre : les sous-recettes sont ajoutées avant les recettes qui les utilisent.
+    """
+    missing = set(RECIPE_COLUMNS).difference(recipes.columns)
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans les recettes : {sorted(missing)}")
+
+    book = RecipeBook(aliments)
+    grouped = {
+        recette: group for recette, group in recipes.groupby('recette', sort=False)
+    }
+
+    # Parcours en profondeur : une recette n'est ajoutée qu'après ses sous-recettes
+    added = set()
+    visiting = set()
+
+    def visit(recette):
+        if recette in added:
+            return
+        if recette in visiting:
+            raise ValueError(f"Cycle de recettes autour de {recette!r}")
+        visiting.add(recette)
+        group = grouped[recette]
+        for nom, attribut in zip(group['ingredient'], group['french_attribut']):
+            if pd.isna(attribut) and nom in grouped:
+                visit(nom)
+        rendement = group['rendement'].iloc[0] if 'rendement' in group else 1.0
+        book.add(recette, list(zip(group['ingredient'], group['french_attribut'], group['quantite'])),
+                 1.0 if pd.isna(rendement) else rendement)
+        visiting.discard(recette)
+        added.add(recette)
+
+    for recette in grouped:
+        visit(recette)
+    return book
@@ -0,0 +1,185 @@
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from carbonsimulator import tracing
+from carbonsimulator.calculator import load_data, run_session
+from carbonsimulator.console import ScriptedIO, SessionExhausted, load_sessions
+from carbonsimulator.index import CATEGORIES_SANS_SOUS_TYPE, FactorIndex
+
+# Étapes mesurées : fonctions instrumentées par tracing.traced
+STEPS = {
+    'get_user_selection_energie': 'energie',
+    'get_user_selection_equipements': 'equipements',
+    'get_user_selection_aliments': 'aliments',
+}
+
+
+def _quantity(rng):
+    return f"{rng.uniform(0.1, 50.0):.2f}"
+
+def _invalid(rng, n_options):
+    return rng.choice(["abc", "", str(n_options + 1 + int(rng.integers(0, 10))), "-1.5"])
+
+def generate_session(index, equipements, energie, rng, max_picks=5, special_rate=0.3, invalid_rate=0.0):
+    """
+    Génère les réponses d'une session complète : quelques énergies, équipements et aliments.
+
+    special_rate est la part des aliments choisis dans les catégories sans sous-type
+    (Glaces et sorbets, Matières grasses...), invalid_rate la probabilité de remplacer
+    une réponse par une saisie invalide.
+    """
+    answers = []
+
+    def answer(value, n_options):
+        answers.append(_invalid(rng, n_options) if invalid_rate and rng.random() < invalid_rate else value)
+
+    for _ in range(rng.integers(0, max_picks + 1)):
+        answer(str(rng.integers(1, len(energie) + 1)), len(energie))
+        answer(_quantity(rng), 0)
+    answers.append("0")
+
+    for _ in range(rng.integers(0, max_picks + 1)):
+        answer(str(rng.integers(1, len(equipements) + 1)), len(equipements))
+    answers.append("0")
+
+    categories = index.main_types()
+    speciales = [c for c in categories if c in CATEGORIES_SANS_SOUS_TYPE]
+    for _ in range(rng.integers(0, max_picks + 1)):
+        if speciales and rng.random() < special_rate:
+            categorie = speciales[rng.integers(0, len(speciales))]
+        else:
+            categorie = categories[rng.integers(0, len(categories))]
+        answer(str(categories.index(categorie) + 1), len(categories))
+
+        if categorie in CATEGORIES_SANS_SOUS_TYPE:
+            produits = index.produits(categorie)
+        else:
+            sous_types = index.sous_types(categorie)
+            choix = int(rng.integers(0, len(sous_types)))
+            answer(str(choix + 1), len(sous_types))
+            produits = index.produits(categorie, sous_types[choix])
+        answer(str(rng.integers(1, len(produits) + 1)), len(produits))
+        answer(_quantity(rng), 0)
+    answers.append("0")
+    return answers
+
+def generate_sessions(n, index, equipements, energie, seed=0, **kwargs):
+    """
+    Génère n sessions (voir generate_session).
+    """
+    rng = np.random.default_rng(seed)
+    return [generate_session(index, equipements, energie, rng, **kwargs) for _ in range(n)]
+
+def replay_session(answers, index, equipements, energie, capture=True):
+    """
+    Rejoue une session à travers les menus du calculateur et retourne son ScriptedIO
+    (sortie capturée, latences par question). Une session trop courte lève SessionExhausted.
+    """
+    io = ScriptedIO(answers, capture)
+    run_session(index, equipements, energie, io)
+    return io
+
+def _stats(durations):
+    durations = np.asarray(durations)
+    if not len(durations):
+        return {'n': 0}
+    p50, p95, p99 = np.percentile(durations, [50, 95, 99]) * 1000
+    return {'n': len(durations), 'moyenne_ms': durations.mean() * 1000,
+            'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99, 'max_ms': durations.max() * 1000}
+
+def replay(sessions, index, equipements, energie, capture=False):
+    """
+    Rejoue des sessions en mémoire, à la vitesse de la machine, et retourne un rapport :
+    débit en sessions par seconde, latences par étape (énergie, équipements, aliments)
+    et par question, nombre de sessions incomplètes et erreurs inattendues.
+
+    Les durées des étapes sont relevées par un hook du traceur actif (voir tracing.py) ;
+    s'il n'y en a pas, un traceur sans suivi mémoire est activé le temps du rejeu.
+    """
+    step_durations = {step: [] for step in STEPS.values()}
+    prompt_durations = {}
+    session_durations = []
+    incompletes = 0
+    unused = 0
+    errors = []
+
+    def hook(event):
+        step = STEPS.get(event['name'])
+        if step is not None:
+            step_durations[step].append(event['wall'])
+
+    tracer = tracing.current()
+    owned = tracer is None
+    if owned:
+        tracer = tracing.enable(memory=False)
+    tracer.add_hook(hook)
+    start = time.perf_counter()
+    try:
+        for number, answers in enumerate(sessions):
+            io = ScriptedIO(answers, capture)
+            session_start = time.perf_counter()
+            try:
+                run_session(index, equipements, energie, io)
+            except SessionExhausted:
+                incompletes += 1
+            except Exception as e:
+                errors.append({'session': number, 'erreur': f"{type(e).__name__}: {e}", 'reponses': list(answers)})
+            session_durations.append(time.perf_counter() - session_start)
+            unused += io.remaining()
+            for prompt, durations in io.latencies.items():
+                prompt_durations.setdefault(prompt, []).extend(durations)
+            if owned:
+                # Seules les durées relevées par le hook sont utiles : pas d'accumulation d'événements
+                tracer.events.clear()
+    finally:
+        tracer.remove_hook(hook)
+        if owned:
+            tracing.disable()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'sessions': len(session_durations),
+        'secondes': elapsed,
+        'sessions_par_seconde': len(session_durations) / elapsed if elapsed else None,
+        'incompletes': incompletes,
+        'reponses_inutilisees': unused,
+        'erreurs': errors,
+        'session': _stats(session_durations),
+        'etapes': {step: _stats(durations) for step, durations in step_durations.items()},
+        'questions': {prompt: _stats(durations) for prompt, durations in prompt_durations.items()},
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rejoue des sessions du calculateur pour mesurer débit et latences")
+    parser.add_argument("--sessions", type=int, default=1000, help="Nombre de sessions générées")
+    parser.add_argument("--from", dest="source", help="Sessions enregistrées (CARBONSIMULATOR_RECORD) à rejouer")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--special-rate", type=float, default=0.3)
+    parser.add_argument("--invalid-rate", type=float, default=0.0)
+    parser.add_argument("--compiled", action="store_true", help="Charge les facteurs depuis le store compilé")
+    parser.add_argument("--output", help="Fichier JSON du rapport (sortie standard par défaut)")
+    args = parser.parse_args()
+
+    aliments, equipements, energie = load_data(compiled=args.compiled)
+    index = FactorIndex(aliments)
+    if args.source:
+        sessions = load_sessions(args.source)
+    else:
+        sessions = generate_sessions(args.sessions, index, equipements, energie, args.seed,
+                                     special_rate=args.special_rate, invalid_rate=args.invalid_rate)
+
+    report = replay(sessions, index, equipements, energie)
+    print(f"{report['sessions']} sessions en {report['secondes']:.2f} s "
+          f"({report['sessions_par_seconde']:.0f} sessions/s), {len(report['erreurs'])} erreur(s)", file=sys.stderr)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+    sys.exit(1 if report['erreurs'] else 0)
@@ -0,0 +1,134 @@
+import hashlib
+import html
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from carbonsimulator.batch import SOURCES, file_key
+
+FORMATS = ['png', 'svg', 'html']
+MANIFEST = ".reports.json"
+LABELS_TOTALS = ['Aliments', 'Equipements', "Energie"]
+
+# Figure réutilisée par toutes les pages d'un même processus
+_FIGURE = None
+_COLORS = None
+
+
+def _init_worker():
+    """
+    Prépare un processus de rendu : backend non interactif et une seule figure réutilisée.
+    """
+    global _FIGURE, _COLORS
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    _FIGURE = plt.figure(figsize=(12, 6))
+    _COLORS = sns.color_palette('pastel')
+
+def _pie(ax, values, labels, title):
+    pairs = [(label, value) for label, value in zip(labels, values) if value > 0]
+    if pairs:
+        ax.pie([value for _, value in pairs], labels=[label for label, _ in pairs], colors=_COLORS)
+    else:
+        ax.text(0.5, 0.5, "Aucune émission", ha='center', va='center')
+        ax.axis('off')
+    ax.set_title(title)
+
+def _render(restaurant, totals, categories, paths):
+    """
+    Dessine les deux camemberts d'un restaurant sur la figure du processus et les écrit
+    dans chacun des formats demandés.
+    """
+    if _FIGURE is None:
+        _init_worker()
+    _FIGURE.clf()
+    ax_totals, ax_categories = _FIGURE.subplots(1, 2)
+
+    _pie(ax_totals, totals, LABELS_TOTALS, 'Portion de chaque source d\'émission de CO2')
+    _pie(ax_categories, list(categories.values()), list(categories),
+         "Portion des émissions par catégorie d'aliments")
+    _FIGURE.suptitle(f"Restaurant {restaurant}")
+    _FIGURE.tight_layout()
+
+    if 'png' in paths:
+        _FIGURE.savefig(paths['png'], format='png')
+    if 'svg' in paths or 'html' in paths:
+        # Le SVG n'est produit qu'une fois, même s'il sert aussi à la page HTML
+        buffer = io.StringIO()
+        _FIGURE.savefig(buffer, format='svg')
+        svg = buffer.getvalue()
+        if 'svg' in paths:
+            with open(paths['svg'], 'w', encoding='utf-8') as f:
+                f.write(svg)
+        if 'html' in paths:
+            with open(paths['html'], 'w', encoding='utf-8') as f:
+                f.write(_html_page(restaurant, totals, categories, svg))
+    return restaurant
+
+def _html_page(restaurant, totals, categories, svg):
+    rows = "".join(
+        f"<tr><td>{html.escape(str(label))}</td><td>{value:.2f}</td></tr>"
+        for label, value in list(zip(LABELS_TOTALS, totals)) + list(categories.items()))
+    return (
+        f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+        f"<title>Empreinte carbone - {html.escape(str(restaurant))}</title></head><body>\n"
+        f"<h1>Empreinte carbone - {html.escape(str(restaurant))}</h1>\n"
+        f"<p>Total : {sum(totals):.2f} kgCO2</p>\n"
+        f"<table><tr><th>Poste</th><th>kgCO2</th></tr>{rows}</table>\n"
+        f"{svg[svg.find('<svg'):]}\n</body></html>\n")
+
+def _input_hash(totals, categories, formats):
+    payload = json.dumps([totals, sorted(categories.items()), sorted(formats)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def render_reports(totaux, par_main_type, output_dir, formats=('png',), processes=None, force=False):
+    """
+    Écrit les rapports graphiques de chaque restaurant à partir des résultats de batch.compute_footprints.
+
+    Le rendu est fait dans un pool de processus avec le backend non interactif Agg.
+    Un rapport dont les données n'ont pas changé depuis le dernier rendu n'est pas redessiné
+    (sauf si force vaut True). Retourne le nombre de rapports rendus et ignorés.
+    """
+    unknown = set(formats).difference(FORMATS)
+    if unknown:
+        raise ValueError(f"Formats inconnus : {sorted(unknown)} (attendus : {', '.join(FORMATS)})")
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+
+    jobs = []
+    hashes = {}
+    skipped = 0
+    for restaurant, row in totaux[SOURCES].iterrows():
+        totals = [float(v) for v in row]
+        categories = {k: float(v) for k, v in par_main_type.loc[restaurant].items() if v > 0} \
+            if restaurant in par_main_type.index else {}
+
+        name = file_key(restaurant)
+        paths = {fmt: os.path.join(output_dir, f"{name}.{fmt}") for fmt in formats}
+        digest = _input_hash(totals, categories, formats)
+        hashes[name] = digest
+
+        if not force and manifest.get(name) == digest and all(os.path.exists(p) for p in paths.values()):
+            skipped += 1
+            continue
+        jobs.append((restaurant, totals, categories, paths))
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker) as executor:
+            for _ in executor.map(_render, *zip(*jobs), chunksize=max(1, len(jobs) // 64)):
+                pass
+
+    manifest.update(hashes)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+    return {'rendus': len(jobs), 'ignores': skipped}
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+from carbonsimulator.batch import SOURCES, build_factor_table
+
+
+class ScenarioEngine:
+    """
+    Évalue des milliers de scénarios d'un coup par produit matriciel.
+
+    Les éléments (aliments, équipements, énergies) sont numérotés dans l'ordre de build_factor_table.
+    Un scénario est une ligne d'une matrice de quantités (scénarios x éléments) : la multiplier
+    par la matrice des poids (éléments x colonnes de résultat) donne le total, le total par source
+    et le total par main_type de chaque scénario.
+    """
+
+    def __init__(self, aliments, equipements, energie):
+        self.factors = build_factor_table(aliments, equipements, energie)
+        self.co2 = np.nan_to_num(self.factors['CO2'].to_numpy(dtype=float))
+
+        sources = self.factors.index.get_level_values('source')
+        main_types = self.factors['main_type']
+        self.main_types = sorted(main_types.dropna().unique())
+        self.columns = ['total'] + SOURCES + self.main_types
+
+        # Poids d'un élément dans chaque colonne de résultat : son CO2 s'il y contribue, 0 sinon
+        masks = [np.ones(len(self.co2), dtype=bool)]
+        masks += [(sources == source) for source in SOURCES]
+        masks += [(main_types == main_type).to_numpy() for main_type in self.main_types]
+        self.masks = np.column_stack(masks).astype(float)
+        self.weights = self.masks * self.co2[:, None]
+
+    def __len__(self):
+        return len(self.co2)
+
+    def item_ids(self, source, noms, french_attributs=None):
+        """
+        Retourne les identifiants des éléments d'une source à partir de leurs noms (et attributs pour les aliments).
+        """
+        if french_attributs is None:
+            french_attributs = [''] * len(noms)
+        keys = pd.MultiIndex.from_arrays([[source] * len(noms), list(noms), list(french_attributs)])
+        ids = self.factors.index.get_indexer(keys)
+        if (ids == -1).any():
+            raise ValueError(f"Éléments inconnus : {list(keys[ids == -1])}")
+        return ids
+
+    def main_type_ids(self, main_type):
+        """
+        Retourne les identifiants de tous les aliments d'un main_type.
+        """
+        return np.flatnonzero((self.factors['main_type'] == main_type).to_numpy())
+
+    def quantities(self, lignes):
+        """
+        Construit un vecteur de quantités à partir d'un registre (colonnes source, nom, french_attribut, quantite).
+        """
+        attributs = lignes['french_attribut'].fillna('') if 'french_attribut' in lignes else [''] * len(lignes)
+        keys = pd.MultiIndex.from_arrays([lignes['source'], lignes['nom'], attributs])
+        ids = self.factors.index.get_indexer(keys)
+        if (ids == -1).any():
+            raise ValueError(f"Éléments inconnus : {list(keys[ids == -1])}")
+        return np.bincount(ids, weights=lignes['quantite'].to_numpy(dtype=float), minlength=len(self))
+
+    def evaluate(self, quantities):
+        """
+        Évalue une matrice de quantités (scénarios x éléments), ou un seul vecteur.
+        Retourne une DataFrame avec une ligne par scénario : total, total par source et par main_type.
+        """
+        quantities = np.atleast_2d(quantities)
+        return pd.DataFrame(quantities @ self.weights, columns=self.columns)
+
+    def substitution(self, base, source_ids, target_ids, fractions, ratio=1.0):
+        """
+        Construit une matrice de scénarios où, pour chaque fraction, cette part des quantités
+        des éléments source_ids est remplacée par les éléments target_ids.
+
+        La quantité retirée est multipliée par ratio (conversion d'unités, par exemple des litres
+        de fioul en kg de granulés à énergie égale) puis répartie sur les cibles au prorata
+        de leurs quantités de base, ou à parts égales si elles sont toutes nulles.
+        Une liste de cibles vide lève une ValueError.
+        """
+        base = np.asarray(base, dtype=float)
+        fractions = np.asarray(fractions, dtype=float)
+        source_ids = np.asarray(source_ids, dtype=np.int64)
+        target_ids = np.asarray(target_ids, dtype=np.int64)
+        if len(target_ids) == 0:
+            raise ValueError("substitution : target_ids est vide, aucun élément ne peut recevoir les quantités retirées")
+
+        target_base = base[target_ids]
+        if target_base.sum() > 0:
+            shares = target_base / target_base.sum()
+        else:
+            shares = np.full(len(target_ids), 1.0 / len(target_ids))
+
+        delta = np.zeros_like(base)
+        delta[source_ids] -= base[source_ids]
+        np.add.at(delta, target_ids, shares * base[source_ids].sum() * ratio)
+
+        return base[None, :] + fractions[:, None] * delta[None, :]
+
+    def monte_carlo(self, quantities, n, uncertainty=0.2, seed=None):
+        """
+        Évalue un vecteur de quantités sous n tirages de facteurs perturbés uniformément
+        dans une bande relative de ±uncertainty (un scalaire ou une valeur par élément).
+        """
+        rng = np.random.default_rng(seed)
+        quantities = np.asarray(quantities, dtype=float)
+        uncertainty = np.asarray(uncertainty, dtype=float)
+
+        # Seuls les éléments achetés sont perturbés : le bruit est tiré pour eux seuls
+        nonzero = np.flatnonzero(quantities)
+        if uncertainty.ndim:
+            uncertainty = uncertainty[nonzero]
+        noise = 1.0 + uncertainty * rng.uniform(-1.0, 1.0, size=(n, len(nonzero)))
+
+        # (quantités x facteurs perturbés) multipliées par le masque des colonnes de résultat
+        emissions = quantities[nonzero] * self.co2[nonzero]
+        return pd.DataFrame((noise * emissions) @ self.masks[nonzero], columns=self.columns)
+
+
+def percentiles(results, q=(5, 50, 95)):
+    """
+    Retourne les percentiles de chaque colonne de résultats de scénarios.
+    """
+    return results.quantile([p / 100 for p in q])
@@ -0,0 +1,355 @@
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import deque
+
+import pandas as pd
+
+from carbonsimulator.batch import SOURCES, aggregate_footprints, resolve_ledger
+from carbonsimulator.store import open_store
+
+MAX_BATCH = 512
+MAX_DELAY = 0.002
+QUEUE_SIZE = 10_000
+LATENCY_WINDOW = 10_000
+
+
+class ServiceOverloaded(Exception):
+    """
+    Levée lorsque la file d'attente du service est pleine.
+    """
+
+
+def validate_lignes(lignes):
+    """
+    Vérifie les lignes d'une requête avant qu'elle n'entre dans la file et les retourne normalisées
+    en tuples (source, nom, french_attribut, quantite). Une ligne est un dictionnaire ou une liste
+    (source, nom, french_attribut, quantite) ; french_attribut est facultatif dans un dictionnaire.
+    Une ligne invalide (source inconnue, quantité manquante ou non numérique) lève une ValueError :
+    elle ne doit pas faire échouer les autres requêtes du lot.
+    """
+    if not isinstance(lignes, list):
+        raise ValueError("'lignes' doit être une liste")
+    valid = []
+    for numero, ligne in enumerate(lignes, 1):
+        if isinstance(ligne, dict):
+            if 'quantite' not in ligne:
+                raise ValueError(f"ligne {numero} : quantite manquante")
+            ligne = (ligne.get('source'), ligne.get('nom'), ligne.get('french_attribut'), ligne['quantite'])
+        elif not isinstance(ligne, (list, tuple)) or len(ligne) != 4:
+            raise ValueError(f"ligne {numero} : attendu (source, nom, french_attribut, quantite)")
+        source, nom, attribut, quantite = ligne
+        if source not in SOURCES:
+            raise ValueError(f"ligne {numero} : source inconnue {source!r}")
+        if not isinstance(nom, str):
+            raise ValueError(f"ligne {numero} : nom manquant")
+        if attribut is not None and not isinstance(attribut, str):
+            raise ValueError(f"ligne {numero} : french_attribut doit être une chaîne")
+        if isinstance(quantite, bool) or not isinstance(quantite, (int, float)) or not math.isfinite(quantite):
+            raise ValueError(f"ligne {numero} : quantite non numérique {quantite!r}")
+        valid.append((source, nom, attribut or '', float(quantite)))
+    return valid
+
+def compute_batch(factors, requests):
+    """
+    Calcule en une seule jointure l'empreinte de plusieurs requêtes.
+    Chaque requête est une liste de lignes (source, nom, french_attribut, quantite) ;
+    retourne pour chacune un dictionnaire de totaux, ou une erreur si une ligne est inconnue.
+    """
+    frames = []
+    for request_id, lignes in enumerate(requests):
+        frame = pd.DataFrame(lignes, columns=['source', 'nom', 'french_attribut', 'quantite'])
+        frame['restaurant'] = request_id
+        frames.append(frame)
+    ledger = pd.concat(frames, ignore_index=True)
+
+    resolved = resolve_ledger(ledger, factors, errors='ignore')
+    expected = ledger.groupby('restaurant').size()
+    found = resolved.groupby('restaurant').size().reindex(expected.index, fill_value=0)
+    invalid = set(expected.index[expected != found])
+
+    totaux, par_main_type = aggregate_footprints(resolved[~resolved['restaurant'].isin(invalid)])
+    totaux = totaux.to_dict('index')
+    par_main_type = par_main_type.to_dict('index')
+
+    results = []
+    for request_id in range(len(requests)):
+        if request_id in invalid:
+            results.append({'erreur': "élément sans facteur d'émission"})
+        elif request_id in totaux:
+            result = dict(totaux[request_id])
+            result['par_main_type'] = {k: v for k, v in par_main_type[request_id].items() if v}
+            results.append(result)
+        else:
+            # Requête vide
+            result = dict.fromkeys(SOURCES + ['total'], 0.0)
+            result['par_main_type'] = {}
+            results.append(result)
+    return results
+
+
+class FootprintService:
+    """
+    Service de calcul d'empreinte : les requêtes sont placées dans une file bornée
+    et traitées par lots par une seule tâche, qui exécute le calcul dans un thread.
+
+    Les requêtes identiques en cours de traitement partagent le même résultat,
+    et une requête arrivant alors que la file est pleine est refusée (ServiceOverloaded).
+    """
+
+    def __init__(self, factors=None, max_batch=MAX_BATCH, max_delay=MAX_DELAY, queue_size=QUEUE_SIZE):
+        if factors is None:
+            factors = open_store().factor_table()
+        self.factors = factors
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.in_flight = {}
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.stats = {'requetes': 0, 'fusionnees': 0, 'refusees': 0, 'lots': 0}
+        self.started = time.perf_counter()
+        self._worker = None
+        self._stopping = asyncio.Event()
+
+    def start(self):
+        """
+        Démarre la tâche de traitement des lots (à appeler depuis la boucle asyncio).
+        """
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """
+        Arrête la tâche de traitement des lots, après avoir traité les requêtes déjà en file.
+        Les requêtes reçues ensuite sont refusées (ServiceOverloaded).
+        """
+        self._stopping.set()
+        if self._worker is not None:
+            await self._worker
+            self._worker = None
+
+    async def calculate(self, lignes):
+        """
+        Retourne l'empreinte d'une liste de lignes (voir validate_lignes).
+        """
+        start = time.perf_counter()
+        self.stats['requetes'] += 1
+        lignes = validate_lignes(lignes)
+
+        key = json.dumps(lignes, sort_keys=True, ensure_ascii=False)
+        future = self.in_flight.get(key)
+        if future is not None:
+            self.stats['fusionnees'] += 1
+        else:
+            if self._stopping.is_set():
+                self.stats['refusees'] += 1
+                raise ServiceOverloaded("service arrêté")
+            future = asyncio.get_running_loop().create_future()
+            try:
+                self.queue.put_nowait((lignes, future))
+            except asyncio.QueueFull:
+                self.stats['refusees'] += 1
+                raise ServiceOverloaded()
+            self.in_flight[key] = future
+            future.add_done_callback(lambda _: self.in_flight.pop(key, None))
+
+        result = await asyncio.shield(future)
+        self.latencies.append(time.perf_counter() - start)
+        return result
+
+    async def calculate_many(self, requetes):
+        """
+        Retourne l'empreinte de plusieurs requêtes. Elles sont toutes vérifiées avant d'entrer dans la file.
+        """
+        if not isinstance(requetes, list):
+            raise ValueError("'requetes' doit être une liste")
+        requetes = [validate_lignes(lignes) for lignes in requetes]
+        return await asyncio.gather(*(self.calculate(lignes) for lignes in requetes))
+
+    async def _next(self, timeout=None):
+        """
+        Retourne la prochaine requête de la file, ou None si le délai expire ou si le service
+        s'arrête et que la file est vide. L'arrêt est signalé par un événement plutôt qu'en annulant
+        la tâche : wait_for peut absorber une annulation (Python < 3.12) et bloquer stop().
+        """
+        if not self.queue.empty():
+            return self.queue.get_nowait()
+        if self._stopping.is_set():
+            return None
+        get = asyncio.ensure_future(self.queue.get())
+        stopping = asyncio.ensure_future(self._stopping.wait())
+        await asyncio.wait({get, stopping}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        stopping.cancel()
+        if get.done():
+            return get.result()
+        # La requête n'a pas été retirée de la file : elle sera lue au prochain appel
+        get.cancel()
+        return None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            request = await self._next()
+            if request is None:
+                break
+            batch = [request]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                request = await self._next(timeout)
+                if request is None:
+                    break
+                batch.append(request)
+
+            self.stats['lots'] += 1
+            try:
+                results = await loop.run_in_executor(
+                    None, compute_batch, self.factors, [lignes for lignes, _ in batch])
+            except Exception:
+                # Une requête en échec ne doit pas faire échouer les autres : chacune est recalculée seule
+                results = []
+                for lignes, _ in batch:
+                    try:
+                        results.append((await loop.run_in_executor(None, compute_batch, self.factors, [lignes]))[0])
+                    except Exception as e:
+                        results.append(e)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def report(self):
+        """
+        Retourne un rapport de débit et de latence (en millisecondes) sur les dernières requêtes.
+        """
+        elapsed = time.perf_counter() - self.started
+        report = dict(self.stats)
+        report['debit_par_seconde'] = self.stats['requetes'] / elapsed if elapsed else 0.0
+        report['taille_file'] = self.queue.qsize()
+        if self.latencies:
+            latencies = sorted(self.latencies)
+            for name, q in [('p50', 0.5), ('p95', 0.95), ('p99', 0.99)]:
+                report[f'latence_{name}_ms'] = latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+        return report
+
+    async def handle_json(self, payload):
+        """
+        Traite une requête JSON : {"lignes": [...]} pour un calcul, {"requetes": [[...], ...]} pour un lot.
+        """
+        if 'requetes' in payload:
+            return {'resultats': await self.calculate_many(payload['requetes'])}
+        if 'lignes' in payload:
+            return await self.calculate(payload['lignes'])
+        raise ValueError("La requête doit contenir 'lignes' ou 'requetes'")
+
+
+async def _respond(writer, status, body):
+    data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+    writer.write(
+        f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode()
+        + data)
+    await writer.drain()
+
+async def handle_http(service, reader, writer):
+    """
+    Sert une connexion HTTP/1.1 (keep-alive) :
+    POST /footprint, POST /batch et GET /stats.
+    """
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, path, _ = request_line.decode().split(' ', 2)
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode().strip()
+                    if not line:
+                        break
+                    name, value = line.split(':', 1)
+                    headers[name.lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                if length < 0:
+                    raise ValueError(length)
+            except ValueError:
+                # La suite du flux ne peut plus être découpée en requêtes : réponse puis fermeture
+                await _respond(writer, "400 Bad Request", {'erreur': "requête HTTP mal formée"})
+                break
+            body = await reader.readexactly(length)
+
+            if method == 'GET' and path == '/stats':
+                await _respond(writer, "200 OK", service.report())
+                continue
+            if method != 'POST' or path not in ('/footprint', '/batch'):
+                await _respond(writer, "404 Not Found", {'erreur': "route inconnue"})
+                continue
+            try:
+                await _respond(writer, "200 OK", await service.handle_json(json.loads(body)))
+            except ServiceOverloaded:
+                await _respond(writer, "503 Service Unavailable", {'erreur': "service surchargé"})
+            except (ValueError, KeyError, TypeError) as e:
+                await _respond(writer, "400 Bad Request", {'erreur': str(e)})
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def handle_unix(service, reader, writer):
+    """
+    Sert une connexion sur socket Unix : une requête JSON par ligne, une réponse JSON par ligne.
+    """
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                response = await service.handle_json(json.loads(line))
+            except ServiceOverloaded:
+                response = {'erreur': "service surchargé"}
+            except (ValueError, KeyError, TypeError) as e:
+                response = {'erreur': str(e)}
+            writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b"\n")
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def serve(host="127.0.0.1", port=8080, unix_path=None):
+    """
+    Démarre le service en HTTP, ou sur un socket Unix si unix_path est renseigné.
+    """
+    service = FootprintService()
+    service.start()
+    if unix_path:
+        server = await asyncio.start_unix_server(
+            lambda r, w: handle_unix(service, r, w), path=unix_path)
+    else:
+        server = await asyncio.start_server(
+            lambda r, w: handle_http(service, r, w), host=host, port=port)
+    print(f"Service démarré sur {unix_path or f'http://{host}:{port}'}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+        print(json.dumps(service.report(), ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Service local de calcul d'empreinte carbone")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix", help="Chemin d'un socket Unix à utiliser à la place de HTTP")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
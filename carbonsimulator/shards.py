@@ -0,0 +1,209 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from carbonsimulator.batch import aggregate_footprints, build_factor_table, file_key, resolve_ledger
+from carbonsimulator.store import DATA_DIR
+
+MANIFEST = "shards.json"
+PARTIAL_COLUMNS = ['restaurant', 'source', 'main_type', 'emission', 'lignes']
+
+# Table des facteurs du processus, construite une fois par _init_worker
+_FACTORS = None
+
+
+def _init_worker(aliments, equipements, energie):
+    global _FACTORS
+    _FACTORS = build_factor_table(aliments, equipements, energie)
+
+def factors_hash(aliments, equipements, energie):
+    """
+    Empreinte sha256 des trois tables de facteurs : un changement de facteur invalide tous les shards.
+    """
+    digest = hashlib.sha256()
+    for data in (aliments, equipements, energie):
+        digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def shard_hash(source, factors_digest):
+    """
+    Empreinte d'un shard : contenu de son registre (fichier ou DataFrame) et facteurs utilisés.
+    """
+    digest = hashlib.sha256(factors_digest.encode())
+    if isinstance(source, pd.DataFrame):
+        digest.update(pd.util.hash_pandas_object(source, index=False).to_numpy().tobytes())
+    else:
+        with open(source, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def shard_partial(source, factors=None):
+    """
+    Étape map : calcule le résultat partiel d'un shard à partir de son registre (chemin d'un CSV
+    ou DataFrame au format de batch.resolve_ledger).
+
+    Le résultat est une table longue (restaurant, source, main_type, emission, lignes) :
+    des sommes, donc fusionnables dans n'importe quel ordre par reduce_partials.
+    """
+    factors = _FACTORS if factors is None else factors
+    ledger = source if isinstance(source, pd.DataFrame) else pd.read_csv(source)
+    resolved = resolve_ledger(ledger, factors)
+    resolved['main_type'] = resolved['main_type'].fillna('')
+    resolved['lignes'] = 1
+    return resolved.groupby(['restaurant', 'source', 'main_type'], sort=True)[['emission', 'lignes']].sum().reset_index()
+
+def _partial_path(work_dir, shard):
+    return os.path.join(work_dir, file_key(shard) + ".pkl")
+
+def _save_manifest(work_dir, manifest):
+    path = os.path.join(work_dir, MANIFEST)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+def run_shards(shards, aliments, equipements, energie, work_dir, processes=None, force=False):
+    """
+    Calcule les résultats partiels des shards (dictionnaire identifiant -> registre) dans un pool de processus.
+
+    Chaque résultat est écrit dans work_dir avec l'empreinte de son registre et des facteurs :
+    seuls les shards nouveaux, modifiés ou en échec lors d'une exécution précédente sont recalculés
+    (tous si force vaut True). L'échec d'un shard n'interrompt pas les autres.
+    Retourne les shards calculés, réutilisés et en échec (avec le message d'erreur).
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    manifest_path = os.path.join(work_dir, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+
+    factors_digest = factors_hash(aliments, equipements, energie)
+    todo = {}
+    reused = []
+    for shard, source in shards.items():
+        key = str(shard)
+        digest = shard_hash(source, factors_digest)
+        if not force and manifest.get(key) == digest and os.path.exists(_partial_path(work_dir, shard)):
+            reused.append(shard)
+        else:
+            # L'ancien résultat ne doit pas être réduit si le nouveau calcul échoue
+            manifest.pop(key, None)
+            if os.path.exists(_partial_path(work_dir, shard)):
+                os.remove(_partial_path(work_dir, shard))
+            todo[shard] = (source, digest)
+
+    done = []
+    failed = {}
+    if todo:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(aliments, equipements, energie)) as executor:
+            futures = {executor.submit(shard_partial, source): shard for shard, (source, _) in todo.items()}
+            for future in as_completed(futures):
+                shard = futures[future]
+                try:
+                    partial = future.result()
+                except Exception as e:
+                    failed[shard] = f"{type(e).__name__}: {e}"
+                    continue
+                pd.to_pickle(partial, _partial_path(work_dir, shard))
+                manifest[str(shard)] = todo[shard][1]
+                done.append(shard)
+                # Le manifeste est écrit après chaque shard : une interruption ne perd pas le travail fait
+                _save_manifest(work_dir, manifest)
+
+    _save_manifest(work_dir, manifest)
+    return {'calcules': done, 'reutilises': reused, 'echecs': failed}
+
+def load_partials(work_dir, shards):
+    """
+    Relit les résultats partiels disponibles des shards demandés (les shards en échec n'en ont pas).
+    """
+    partials = {}
+    for shard in shards:
+        path = _partial_path(work_dir, shard)
+        if os.path.exists(path):
+            partials[shard] = pd.read_pickle(path)
+    return partials
+
+def merge_partials(partials):
+    """
+    Fusionne des résultats partiels (liste ou dictionnaire) en un seul, dans un ordre déterministe.
+    """
+    partials = list(partials.values()) if isinstance(partials, dict) else list(partials)
+    if not partials:
+        return pd.DataFrame(columns=PARTIAL_COLUMNS)
+    merged = pd.concat(partials, ignore_index=True)
+    return merged.groupby(['restaurant', 'source', 'main_type'], sort=True)[['emission', 'lignes']].sum().reset_index()
+
+def _totals(partial, keys, name):
+    """
+    Agrège un résultat partiel selon keys (une valeur par ligne) avec batch.aggregate_footprints.
+    """
+    totaux, par_main_type = aggregate_footprints(partial.assign(restaurant=keys))
+    totaux.index.name = name
+    par_main_type.index.name = name
+    return totaux, par_main_type.drop(columns='', errors='ignore')
+
+def reduce_partials(partials, regions=None):
+    """
+    Étape reduce : combine les résultats partiels en totaux par site, par région et pour la chaîne.
+
+    regions associe chaque restaurant à sa région ; les restaurants absents sont comptés
+    dans la région 'Sans région'. Chaque niveau est un couple (totaux, par_main_type)
+    au format de batch.compute_footprints.
+    """
+    merged = merge_partials(partials)
+    sites = _totals(merged, merged['restaurant'], 'restaurant')
+
+    region_keys = merged['restaurant'].map(regions or {}).fillna('Sans région')
+    return {
+        'sites': sites,
+        'regions': _totals(merged, region_keys, 'region'),
+        'chaine': _totals(merged, 'chaine', 'chaine'),
+    }
+
+def chain_close(shards, aliments, equipements, energie, work_dir, regions=None, processes=None, force=False):
+    """
+    Clôture d'une chaîne : recalcule les shards nouveaux, modifiés ou en échec,
+    puis réduit tous les résultats partiels disponibles. Retourne (rapport d'exécution, totaux).
+    """
+    report = run_shards(shards, aliments, equipements, energie, work_dir, processes, force)
+    return report, reduce_partials(load_partials(work_dir, shards), regions)
+
+if __name__ == "__main__":
+    from carbonsimulator.calculator import load_data
+
+    parser = argparse.ArgumentParser(description="Clôture d'une chaîne de restaurants, un registre CSV par shard")
+    parser.add_argument("ledgers", help="Dossier des registres (un fichier .csv par shard)")
+    parser.add_argument("--work-dir", required=True, help="Dossier des résultats partiels")
+    parser.add_argument("--regions", help="CSV restaurant,region")
+    parser.add_argument("--output", help="Dossier où écrire les totaux (CSV)")
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--force", action="store_true", help="Recalcule tous les shards")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    args = parser.parse_args()
+
+    shards = {os.path.splitext(os.path.basename(path))[0]: path
+              for path in sorted(glob.glob(os.path.join(args.ledgers, "*.csv")))}
+    regions = None
+    if args.regions:
+        regions = pd.read_csv(args.regions).set_index('restaurant')['region'].to_dict()
+
+    report, results = chain_close(shards, *load_data(data_dir=args.data_dir), args.work_dir,
+                                  regions, args.processes, args.force)
+    print(f"Shards calculés : {len(report['calcules'])}, réutilisés : {len(report['reutilises'])}, "
+          f"en échec : {len(report['echecs'])}")
+    for shard, error in report['echecs'].items():
+        print(f"  {shard} : {error}")
+    print(results['chaine'][0].to_string())
+
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+        for level, (totaux, par_main_type) in results.items():
+            totaux.to_csv(os.path.join(args.output, f"{level}_totaux.csv"))
+            par_main_type.to_csv(os.path.join(args.output, f"{level}_par_main_type.csv"))
@@ -0,0 +1,287 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+
+def default_data_dir():
+    """
+    Retourne le dossier des données : CARBONSIMULATOR_DATA_DIR s'il est défini, sinon le dossier data
+    du dépôt, sinon (package installé, sans les CSV) le dossier data du répertoire courant.
+    """
+    override = os.environ.get("CARBONSIMULATOR_DATA_DIR")
+    if override:
+        return os.path.abspath(override)
+    repo_data = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data"))
+    if os.path.isdir(repo_data):
+        return repo_data
+    return os.path.abspath("data")
+
+DATA_DIR = default_data_dir()
+STORE_DIR = os.path.join(DATA_DIR, ".store")
+
+# Âge à partir duquel un dossier temporaire de compilation est considéré comme abandonné (secondes)
+STALE_TMP_SECONDS = 3600
+
+# Tables compilées, dans l'ordre retourné par load_data
+SOURCE_FILES = {
+    'aliments': "aliments_final.csv",
+    'equipements': "equipements_filtered.csv",
+    'energie': "energie_filtered.csv",
+}
+
+
+def source_hash(data_dir=DATA_DIR):
+    """
+    Calcule l'empreinte sha256 du contenu des CSV sources.
+    Elle sert de clé au store compilé : toute modification d'un CSV invalide le store.
+    """
+    digest = hashlib.sha256()
+    for name, filename in SOURCE_FILES.items():
+        digest.update(name.encode())
+        with open(os.path.join(data_dir, filename), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def compile_store(data_dir=DATA_DIR, store_dir=STORE_DIR):
+    """
+    Compile les CSV sources en un store binaire et retourne son chemin.
+
+    Chaque colonne numérique est écrite dans un fichier .npy qui pourra être mappé en mémoire,
+    les colonnes texte sont remplacées par des codes int32 vers une table de chaînes partagée
+    entre les trois tables (-1 pour une valeur manquante).
+    """
+    import pandas as pd
+
+    digest = source_hash(data_dir)
+    target = os.path.join(store_dir, digest)
+    if os.path.isdir(target):
+        return target
+
+    os.makedirs(store_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=store_dir, prefix=".tmp-")
+
+    strings = {}
+    meta = {'hash': digest, 'tables': {}}
+    try:
+        for name, filename in SOURCE_FILES.items():
+            data = pd.read_csv(os.path.join(data_dir, filename))
+            columns = []
+            for col in data.columns:
+                values = data[col]
+                path = os.path.join(tmp_dir, f"{name}.{len(columns)}.npy")
+                if pd.api.types.is_numeric_dtype(values):
+                    np.save(path, values.to_numpy())
+                    columns.append([col, 'numeric'])
+                else:
+                    codes = [-1 if pd.isna(v) else strings.setdefault(v, len(strings)) for v in values]
+                    np.save(path, np.asarray(codes, dtype=np.int32))
+                    columns.append([col, 'string'])
+            meta['tables'][name] = {'rows': len(data), 'columns': columns}
+
+        # Table de chaînes : un bloc utf-8 et les positions de début/fin de chaque chaîne
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+        np.save(os.path.join(tmp_dir, "strings.npy"), np.frombuffer(b"".join(encoded), dtype=np.uint8))
+        np.save(os.path.join(tmp_dir, "offsets.npy"), offsets)
+
+        with open(os.path.join(tmp_dir, "meta.json"), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        # Un autre processus a pu compiler le même store entre-temps
+        try:
+            os.rename(tmp_dir, target)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    # Supprime les stores compilés à partir d'anciennes versions des CSV, ainsi que les dossiers
+    # temporaires abandonnés par une compilation interrompue (ceux d'une compilation en cours sont récents)
+    now = time.time()
+    for entry in os.listdir(store_dir):
+        path = os.path.join(store_dir, entry)
+        if entry.startswith(".tmp-"):
+            try:
+                stale = now - os.path.getmtime(path) > STALE_TMP_SECONDS
+            except OSError:
+                continue
+            if stale:
+                shutil.rmtree(path, ignore_errors=True)
+        elif entry != digest and not entry.startswith("."):
+            shutil.rmtree(path, ignore_errors=True)
+
+    return target
+
+def open_store(data_dir=DATA_DIR, store_dir=STORE_DIR):
+    """
+    Ouvre le store compilé correspondant aux CSV actuels, en le compilant s'il n'existe pas encore.
+    """
+    target = os.path.join(store_dir, source_hash(data_dir))
+    if not os.path.isdir(target):
+        target = compile_store(data_dir, store_dir)
+    return FactorStore(target)
+
+
+class FactorStore:
+    """
+    Store compilé des facteurs d'émission.
+
+    Les tableaux sont mappés en mémoire en lecture seule : plusieurs processus qui ouvrent
+    le même store partagent les mêmes pages. Les chaînes ne sont décodées qu'à la demande.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.hash = self.meta['hash']
+        self._blob = np.load(os.path.join(path, "strings.npy"), mmap_mode='r')
+        self._offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode='r')
+        self._strings = {}
+        self._decoded = None
+
+    def tables(self):
+        """
+        Retourne le nom des tables du store.
+        """
+        return list(self.meta['tables'])
+
+    def columns(self, table):
+        """
+        Retourne le nom des colonnes d'une table.
+        """
+        return [col for col, _ in self.meta['tables'][table]['columns']]
+
+    def array(self, table, column):
+        """
+        Retourne le tableau mappé d'une colonne : les valeurs pour une colonne numérique,
+        les codes de la table de chaînes pour une colonne texte.
+        """
+        position = self.columns(table).index(column)
+        return np.load(os.path.join(self.path, f"{table}.{position}.npy"), mmap_mode='r')
+
+    def is_string(self, table, column):
+        """
+        Indique si une colonne est une colonne texte.
+        """
+        return dict(self.meta['tables'][table]['columns'])[column] == 'string'
+
+    def string(self, code):
+        """
+        Retourne la chaîne correspondant à un code, None pour une valeur manquante.
+        """
+        if code < 0:
+            return None
+        if code not in self._strings:
+            start, end = self._offsets[code], self._offsets[code + 1]
+            self._strings[code] = bytes(self._blob[start:end]).decode('utf-8')
+        return self._strings[code]
+
+    def column(self, table, column):
+        """
+        Retourne les valeurs d'une colonne, décodées s'il s'agit d'une colonne texte.
+        """
+        values = self.array(table, column)
+        if self.is_string(table, column):
+            return [self.string(code) for code in values.tolist()]
+        return values
+
+    def compact_table(self, table):
+        """
+        Retourne une table sous forme de CompactTable (voir compact.py), sans construire de DataFrame.
+        """
+        from carbonsimulator.compact import CompactTable
+
+        return CompactTable.from_store(self, table)
+
+    def strings(self):
+        """
+        Retourne toute la table de chaînes décodée, sous forme de tableau object suivi d'un NaN :
+        indexé par les codes d'une colonne, il donne ses valeurs (le code -1 tombe sur le NaN).
+        """
+        if self._decoded is None:
+            blob = bytes(self._blob)
+            offsets = self._offsets.tolist()
+            decoded = np.empty(len(offsets), dtype=object)
+            decoded[:-1] = [blob[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+            decoded[-1] = np.nan
+            self._decoded = decoded
+        return self._decoded
+
+    def to_frames(self, compact=False):
+        """
+        Reconstruit les DataFrames (aliments, equipements, energie) retournées par load_data.
+        La table de chaînes est décodée une seule fois puis indexée par les codes de chaque colonne ;
+        si compact vaut True, les colonnes texte restent des colonnes category.
+        """
+        import pandas as pd
+
+        frames = []
+        for table in SOURCE_FILES:
+            compact_table = self.compact_table(table) if compact else None
+            data = {}
+            for col in self.columns(table):
+                if not self.is_string(table, col):
+                    data[col] = np.array(self.array(table, col))
+                elif compact:
+                    data[col] = compact_table.categorical(col)
+                else:
+                    data[col] = self.strings()[self.array(table, col)]
+            frames.append(pd.DataFrame(data))
+        return tuple(frames)
+
+    def factor_table(self):
+        """
+        Construit directement depuis les codes du store la table des facteurs de batch.build_factor_table
+        (indexée par source, nom, french_attribut), sans reconstruire les trois DataFrames :
+        c'est le chemin de démarrage rapide du service et des calculs par lots.
+        """
+        import pandas as pd
+
+        from carbonsimulator.batch import SOURCES
+
+        strings = self.strings()
+        # Niveaux de l'index : toute la table de chaînes, plus la chaîne vide des attributs absents
+        levels = pd.Index(strings[:-1])
+        empty = levels.get_indexer([''])[0]
+        if empty == -1:
+            levels = levels.append(pd.Index(['']))
+            empty = len(levels) - 1
+
+        parts = {'source': [], 'nom': [], 'french_attribut': [], 'CO2': [], 'main_type': [], 'sous_type': []}
+        for source, table in zip(SOURCES, SOURCE_FILES):
+            rows = self.meta['tables'][table]['rows']
+            columns = self.columns(table)
+            nom = 'nom' if 'nom' in columns else 'french_name'
+            parts['source'].append(np.full(rows, SOURCES.index(source), dtype=np.int32))
+            parts['nom'].append(np.asarray(self.array(table, nom)))
+            if 'french_attribut' in columns:
+                attributs = np.array(self.array(table, 'french_attribut'))
+                attributs[attributs < 0] = empty
+            else:
+                attributs = np.full(rows, empty, dtype=np.int32)
+            parts['french_attribut'].append(attributs)
+            parts['CO2'].append(np.asarray(self.array(table, 'CO2'), dtype=float))
+            for col in ('main_type', 'sous_type'):
+                parts[col].append(strings[self.array(table, col)] if col in columns
+                                  else np.full(rows, None, dtype=object))
+        parts = {col: np.concatenate(arrays) for col, arrays in parts.items()}
+
+        index = pd.MultiIndex(
+            levels=[SOURCES, levels, levels],
+            codes=[parts['source'], parts['nom'], parts['french_attribut']],
+            names=['source', 'nom', 'french_attribut'], verify_integrity=False)
+        factors = pd.DataFrame({
+            'CO2': parts['CO2'],
+            'main_type': parts['main_type'],
+            'sous_type': parts['sous_type'],
+        }, index=index)
+        # Une même clé ne doit correspondre qu'à un seul facteur
+        return factors[~index.duplicated()]
@@ -0,0 +1,244 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+# Traceur actif, None quand l'instrumentation est désactivée
+_TRACER = None
+
+
+def _rows(value):
+    """
+    Nombre de lignes d'une DataFrame, ou de plusieurs pour un tuple (None s'il n'y en a pas).
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    if isinstance(value, tuple):
+        frames = [v for v in value if isinstance(v, (pd.DataFrame, pd.Series))]
+        if frames:
+            return sum(len(v) for v in frames)
+    return None
+
+
+class Tracer:
+    """
+    Enregistre, pour chaque étape instrumentée : temps réel, temps CPU, pic de mémoire allouée
+    (si memory vaut True) et nombre de lignes en entrée et en sortie.
+
+    Chaque événement est aussi transmis aux hooks enregistrés avec add_hook.
+    """
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.events = []
+        self.hooks = []
+        self._origin = time.perf_counter()
+        # Pile des étapes ouvertes, propre à chaque thread : les étapes exécutées dans un thread
+        # (par exemple par le service) ne s'imbriquent pas dans celles d'un autre
+        self._local = threading.local()
+        self._started_tracemalloc = False
+
+    @property
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def add_hook(self, hook):
+        """
+        Ajoute une fonction appelée avec chaque événement (un dictionnaire) dès qu'il est enregistré.
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        """
+        Retire une fonction ajoutée avec add_hook.
+        """
+        self.hooks.remove(hook)
+
+    def start(self):
+        """
+        Démarre le suivi de la mémoire si demandé.
+        """
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def stop(self):
+        """
+        Arrête le suivi de la mémoire s'il a été démarré par ce traceur.
+        """
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def enter(self):
+        """
+        Ouvre une étape et retourne son état de départ, à passer à exit.
+        """
+        frame = {'wall': time.perf_counter(), 'cpu': time.process_time(), 'max_seen': 0, 'mem_start': 0}
+        if self.memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1]['max_seen'] = max(self._stack[-1]['max_seen'], peak)
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            frame['mem_start'] = current
+        self._stack.append(frame)
+        return frame
+
+    def exit(self, frame, name, category, rows_in=None, rows_out=None, args=None):
+        """
+        Ferme une étape ouverte par enter et enregistre l'événement correspondant.
+        """
+        wall_end = time.perf_counter()
+        cpu = time.process_time() - frame['cpu']
+        self._stack.pop()
+
+        peak_mb = None
+        if self.memory and tracemalloc.is_tracing():
+            peak = max(frame['max_seen'], tracemalloc.get_traced_memory()[1])
+            if self._stack:
+                self._stack[-1]['max_seen'] = max(self._stack[-1]['max_seen'], peak)
+            peak_mb = max(0, peak - frame['mem_start']) / 2**20
+
+        event = {
+            'name': name,
+            'category': category,
+            'start': frame['wall'] - self._origin,
+            'wall': wall_end - frame['wall'],
+            'cpu': cpu,
+            'peak_mb': peak_mb,
+            'rows_in': rows_in,
+            'rows_out': rows_out,
+            'depth': len(self._stack),
+            'thread': threading.get_ident(),
+        }
+        if args:
+            event.update(args)
+        self.events.append(event)
+        for hook in self.hooks:
+            hook(event)
+
+    def to_chrome_trace(self):
+        """
+        Retourne les événements au format Trace Event (chrome://tracing, Perfetto, speedscope).
+        """
+        pid = os.getpid()
+        trace_events = []
+        for event in self.events:
+            args = {k: v for k, v in event.items() if k not in ('name', 'category', 'start', 'wall', 'thread')}
+            trace_events.append({
+                'name': event['name'], 'cat': event['category'], 'ph': 'X',
+                'ts': event['start'] * 1e6, 'dur': event['wall'] * 1e6,
+                'pid': pid, 'tid': event['thread'], 'args': args,
+            })
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def save(self, path):
+        """
+        Écrit la trace JSON dans un fichier.
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+
+    def summary(self):
+        """
+        Retourne une DataFrame des événements, triée par temps réel décroissant.
+        """
+        return pd.DataFrame(self.events).sort_values('wall', ascending=False, ignore_index=True)
+
+
+def enable(memory=True):
+    """
+    Active l'instrumentation et retourne le traceur.
+    """
+    global _TRACER
+    _TRACER = Tracer(memory)
+    _TRACER.start()
+    return _TRACER
+
+def current():
+    """
+    Retourne le traceur actif, None si l'instrumentation est désactivée.
+    """
+    return _TRACER
+
+def disable():
+    """
+    Désactive l'instrumentation et retourne le traceur qui était actif.
+    """
+    global _TRACER
+    tracer, _TRACER = _TRACER, None
+    if tracer is not None:
+        tracer.stop()
+    return tracer
+
+class tracing:
+    """
+    Active l'instrumentation le temps d'un bloc with, et écrit la trace dans path si renseigné.
+
+        with tracing("trace.json") as tracer:
+            build_tables(*load_raw_data())
+    """
+
+    def __init__(self, path=None, memory=True):
+        self.path = path
+        self.memory = memory
+
+    def __enter__(self):
+        return enable(self.memory)
+
+    def __exit__(self, *exc):
+        tracer = disable()
+        if self.path:
+            tracer.save(self.path)
+        return False
+
+def traced(category):
+    """
+    Décorateur d'étape : sans traceur actif, la fonction est appelée directement.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _TRACER
+            if tracer is None:
+                return func(*args, **kwargs)
+            frame = tracer.enter()
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                tracer.exit(frame, func.__name__, category, _rows(args), _rows(result))
+        return wrapper
+    return decorator
+
+class stage:
+    """
+    Instrumente un bloc de code qui n'est pas une fonction entière.
+    Le nombre de lignes peut être renseigné avec rows_in et rows_out.
+    """
+
+    def __init__(self, name, category="bloc", rows_in=None):
+        self.name = name
+        self.category = category
+        self.rows_in = rows_in
+        self.rows_out = None
+        self._frame = None
+
+    def __enter__(self):
+        if _TRACER is not None:
+            self._frame = _TRACER.enter()
+        return self
+
+    def __exit__(self, *exc):
+        if _TRACER is not None and self._frame is not None:
+            _TRACER.exit(self._frame, self.name, self.category, self.rows_in, self.rows_out)
+        return False
@@ -1,17 +1,33 @@
 import os
 import pandas as pd
 
-def load_raw_data():
+from carbonsimulator.consolidation import (
+    CONSOLIDATION_RULES, RENOMMAGE_MAIN_TYPE, apply_rules, merge_attributs, normalize_attributs)
+from carbonsimulator.store import DATA_DIR
+from carbonsimulator.tracing import traced
+
+# Fichiers d'état de la reconstruction incrémentale
+CACHE_DIR = os.path.join(DATA_DIR, ".cache")
+
+# Colonnes brutes réellement utilisées par le nettoyage, les autres ne sont jamais lues en streaming
+ALIMENTS_COLUMNS = ['french_name', 'french_attribut', 'french_tag', 'CO2', 'main_type', 'sous_type']
+EQUIPEMENTS_COLUMNS = ['CO2', 'complete_name']
+ENERGIE_COLUMNS = ['french_name', 'unit', 'CO2']
+CHUNKSIZE = 100_000
+
+@traced("utils")
+def load_raw_data(data_dir=DATA_DIR):
     """
     Charge les données brutes
     """
 
-    aliments = pd.read_csv("../data/aliments.csv")
-    equipements = pd.read_csv("../data/equipements.csv")
-    energie = pd.read_csv("../data/energie.csv")
+    aliments = pd.read_csv(os.path.join(data_dir, "aliments.csv"))
+    equipements = pd.read_csv(os.path.join(data_dir, "equipements.csv"))
+    energie = pd.read_csv(os.path.join(data_dir, "energie.csv"))
 
     return aliments, equipements, energie
 
+@traced("utils")
 def equipements_filtering(equipements):
     """
     Filtre les données des équipements en supprimant les colonnes inutiles
@@ -24,20 +40,22 @@ def equipements_filtering(equipements):
 
     return equipements_filtered
 
+@traced("utils")
 def energie_filtering(energie):
     """
     Filtre les données des énergies en supprimant les colonnes inutiles
     """
 
+    # La colonne french_name est conservée : c'est elle que lit le calculateur
     energie_filtered = energie.drop(
     ['status', 'id', 'english_name', 'french_attribut', 'english_attribut', 'type',
     'french_tag', 'english_tag', 'validity_range', 'comment'], axis = 1
     )
-    energie_filtered = energie_filtered.rename(columns={"french_name" : "nom"})
 
     return energie_filtered
 
 
+@traced("utils")
 def aliments_filtering(aliments):
     """
     Filtre les données des aliments en supprimant les colonnes inutiles.
@@ -52,36 +70,18 @@ def aliments_filtering(aliments):
     aliments_filtered = aliments_filtered.drop_duplicates(
         subset=aliments_filtered.columns.difference(['id']))
 
-    # Supprime les colonnes inutiles
-    aliments_filtered = aliments_filtered.drop(
-        ['id', 'status', 'english_name', 'english_attribut', 'type', 'french_tag', 'english_tag',
-        'validity_range', 'comment', 'unit'], axis =1)
-
     # Filtre les lignes où 'french_tag' contient 'viandes cuites'
     aliments_filtered = aliments_filtered[~aliments_filtered['french_tag'].str.contains(
         'viandes cuites', case=False, na=False)]
 
+    # Supprime les colonnes inutiles
+    aliments_filtered = aliments_filtered.drop(
+        ['id', 'status', 'english_name', 'english_attribut', 'type', 'french_tag', 'english_tag',
+        'validity_range', 'comment', 'unit'], axis =1)
 
     return aliments_filtered
 
-def merge_attributs(group):
-    """
-    Fonction permettant de fusionner les attributs.
-    """
-    # Vérifie si le groupe contient plus d'une ligne
-    if len(group) > 1:
-        # Concatène les différents attributs en un, séparés d'un '-'
-        merged_attribut = "-".join(group['french_attribut'])
-
-        # Crée un DataFrame avec les valeurs consolidées
-        return pd.DataFrame({
-            'nom': [group['nom'].iloc[0]],
-            'french_attribut': [merged_attribut],
-            'CO2': [group['CO2'].iloc[0]],
-            'main_type': [group['main_type'].iloc[0]]
-        })
-    return pd.DataFrame(group)
-
+@traced("utils")
 def aliments_final(aliments_filtered):
     """
     Fonctions regroupant plusieurs opérations faites sur le nettoyage de la base de données aliments.
@@ -91,37 +91,33 @@ def aliments_final(aliments_filtered):
     aliments_grouped = aliments_filtered.groupby(
         ['nom', 'french_attribut', 'CO2'], as_index=False).first()
 
+    return aliments_final_from_grouped(aliments_grouped)
+
+@traced("utils")
+def aliments_final_from_grouped(aliments_grouped):
+    """
+    Suite du nettoyage d'aliments_final à partir des aliments déjà groupés par nom, attributs et CO2.
+    """
     # Effectue un seconde groupement par nom et leur attribut
     aliments_final = aliments_grouped.groupby(['nom', 'french_attribut'], as_index=False).agg({
-        'CO2': lambda x: round(x.mean(), 2), # Si plusieurs lignes existent on calcule la moyenne
+        'CO2': 'mean',         # Si plusieurs lignes existent on calcule la moyenne
         'main_type': 'first',  # Ici on garde la première valeur de main_type de façon arbitraire
         'sous_type': 'first'   # Ici on garde la première valeur de sous_type de façon arbitraire
     })
+    aliments_final['CO2'] = aliments_final['CO2'].round(2)
 
     # Filtre les lignes où les aliments sont cuits
     aliments_final = aliments_final[~aliments_final['french_attribut'].str.contains(
         r'\bcuit(?:e|es|s)?\b', case=False, na=False)]
 
     # Fusionne les attributs
-    aliments_final = aliments_final.groupby(['nom', 'CO2'], group_keys=False).apply(merge_attributs)
+    aliments_final = merge_attributs(aliments_final)
 
     # Remplace les différents attributs pour éviter les répetitions
-    aliments_final['french_attribut'] = aliments_final['french_attribut'].str.replace(
-        r'\bcru(?:e|es|-[^\s]*| pousses pour salades)?\b', 'cru', case=False, regex=True)
-    aliments_final['french_attribut'] = aliments_final['french_attribut'].str.replace(
-        r'\bpréemballé(?:e|es|-[^\s]*| à réchauffer)?\b', 'préemballé', case=False, regex=True)
-    aliments_final['french_attribut'] = aliments_final['french_attribut'].str.replace(
-        r'\bsurgelé(?:e|es|-[^\s]*)?\b', 'surgelé', case=False, regex=True)
-    aliments_final['french_attribut'] = aliments_final['french_attribut'].str.replace(
-        r'\bséché(?:e|es|-[^\s]*)?\b', 'séché', case=False, regex=True)
+    aliments_final['french_attribut'] = normalize_attributs(aliments_final['french_attribut'])
 
     # Remplace les differentes catégories pour éviter les répetitions
-    aliments_final['main_type'] = aliments_final['main_type'].replace(
-        'Fruits, légumes, légumineuses et oléagineux', 'Fruits et Légumes')
-    aliments_final['main_type'] = aliments_final['main_type'].replace(
-        'Entrées et plats composés', 'Plats composés')
-    aliments_final['main_type'] = aliments_final['main_type'].replace(
-        'Lait et produits laitiers', 'Produits Laitiers')
+    aliments_final['main_type'] = aliments_final['main_type'].replace(RENOMMAGE_MAIN_TYPE)
 
     # Ne garde que les différents plat légumes pour enfant
     aliments_final = aliments_final[
@@ -131,6 +127,7 @@ def aliments_final(aliments_filtered):
 
     return aliments_final
 
+@traced("utils")
 def glace_sorbets_filtering(aliments_final):
     """
     Fonction permettant de simplifier les items de type "Glaces et Sorbets".
@@ -138,179 +135,226 @@ def glace_sorbets_filtering(aliments_final):
     et 2 types de Sorbet avec le même CO2.
 
     Cette fonction permet de donner un aperçu sur le travail qui aurait pu être fait sur l'ensemble des données.
+    Les règles correspondantes sont dans consolidation.CONSOLIDATION_RULES.
     """
-    glaces_sorbets = aliments_final[aliments_final['main_type'] == 'Glaces et sorbets']
-
-    # Calculer la moyenne des glaces
-    glaces = glaces_sorbets.iloc[:3]  # Les trois premières lignes sont des glaces
-    glaces_avg = {
-        'nom': 'Glace',
-        'french_attribut': 'type sundae/à partager/bâtonnet-cône',
-        'CO2': glaces['CO2'].mean(),
-        'main_type': 'Glaces et sorbets'
-    }
-
-    # Calculer la moyenne des sorbets
-    sorbets = glaces_sorbets.iloc[3:]  # Les deux dernières lignes sont des sorbets
-    sorbets_avg = {
-        'nom': 'Sorbet',
-        'french_attribut': 'en bac/bâtonnet',
-        'CO2': sorbets['CO2'].mean(),
-        'main_type': 'Glaces et sorbets'
-    }
-
-    # Créer un nouveau DataFrame avec les moyennes calculées
-    glaces_sorbets_cleaned = pd.DataFrame([glaces_avg, sorbets_avg])
-
-    # Supprimer les anciennes entrées de glaces et sorbets dans la base originale
-    aliments_final = aliments_final[aliments_final['main_type'] != 'Glaces et sorbets']
-
-    # Ajouter les nouvelles entrées nettoyées
-    aliments_final = pd.concat([aliments_final, glaces_sorbets_cleaned], ignore_index=True)
-
-    # Arrondir le CO2 à 2 chiffres après la virgule
-    aliments_final['CO2'] = aliments_final['CO2'].round(2)
-
-    return aliments_final
+    return apply_rules(aliments_final, rules_of('glaces'))
 
+@traced("utils")
 def chocolat_filtering(aliments_final):
     """
     Fonction permettant de traiter les différents chocolats.
     La base de données présentait plusieurs chocolats sous différents formes avec à chaque fois le même CO2 émis.
     Le regroupement des chocolats permet donc de simplifier le choix de l'utilisateur.
     """
-    produits_sucres = aliments_final[aliments_final['main_type'] == 'Produits sucrés']
-
-    # Regrouper les différents types de chocolat
-    chocolat_types = ['Chocolat au lait', 'Chocolat noir', 'Chocolat blanc']
-    chocolat_grouped = []
-
-    for chocolat in chocolat_types:
-        # Filtrer les entrées correspondant à un type spécifique de chocolat, incluant les variantes
-        chocolat_entries = produits_sucres[produits_sucres['nom'].str.contains(
-            f'^{chocolat}', case=False, na=False)]
+    return apply_rules(aliments_final, rules_of('chocolat'))
 
-        if not chocolat_entries.empty:
-            # Vérifier si plusieurs valeurs de CO2 existent
-            if chocolat_entries['CO2'].nunique() > 1:
-                # Garder uniquement les entrées avec le CO2 le plus fréquent
-                correct_co2 = chocolat_entries['CO2'].mode()[0]
-                chocolat_entries = chocolat_entries[chocolat_entries['CO2'] == correct_co2]
+@traced("utils")
+def matieres_grasses_filtering(aliments_final):
+    """
+    Fonctions permettant de traiter les aliments de type Matières grasses.
+    Toujours dans l'optique de faciliter l'experience de l'utilisateur, certaines données ont été regroupées.
+    """
+    return apply_rules(aliments_final, rules_of('matieres_grasses'))
 
-            # Créer une entrée regroupée pour ce type de chocolat
-            chocolat_grouped.append({
-                'nom': chocolat,
-                'french_attribut': 'tout type',
-                'CO2': chocolat_entries['CO2'].iloc[0],
-                'main_type': 'Produits sucrés',
-                'sous_type': 'Chocolat'
+@traced("utils")
+def the_filtering(aliments_final):
+    """
+    Regroupe les différents thés infusés, qui ont tous le même CO2.
+    """
+    return apply_rules(aliments_final, rules_of('the'))
 
-            })
+def rules_of(groupe):
+    """
+    Retourne les règles de regroupement d'une famille.
+    """
+    return [rule for rule in CONSOLIDATION_RULES if rule['groupe'] == groupe]
 
-    # Supprimer toutes les anciennes entrées de chocolat dans la base originale
-    aliments_final = aliments_final[~((aliments_final['main_type'] == 'Produits sucrés') &
-                        (aliments_final['nom'].str.contains(
-                            '|'.join(chocolat_types), case=False, na=False)))]
+@traced("utils")
+def export_to_csv(aliments_final, energie_filtered, equipements_filtered, data_dir=DATA_DIR):
+    """
+    Fonction permettant d'exporter les nouvelles bases de données après leur différents traitements.
+    Par défaut, les fichiers sont écrits dans le dossier data du paquet, celui que lit load_data.
+    """
+    # Construire le chemin complet du fichier
+    aliment_path = os.path.join(data_dir, "aliments_final.csv")
+    energie_path = os.path.join(data_dir, "energie_filtered.csv")
+    equipements_path = os.path.join(data_dir, "equipements_filtered.csv")
 
-    # Ajouter les nouvelles entrées regroupées
-    aliments_final = pd.concat([aliments_final, pd.DataFrame(chocolat_grouped)], ignore_index=True)
+    try:
+        # Exporter la DataFrame en CSV
+        aliments_final.to_csv(aliment_path, index=False)
+        energie_filtered.to_csv(energie_path, index=False)
+        equipements_filtered.to_csv(equipements_path, index=False)
+        print(f"Fichier exporté avec succès : {aliment_path}")
+    except Exception as e:
+        print(f"Erreur lors de l'exportation : {e}")
 
-    return aliments_final
+@traced("utils")
+def consolidate_aliments(aliments_final):
+    """
+    Applique en une seule passe toutes les règles de regroupement par catégorie
+    (glaces et sorbets, chocolats, matières grasses, thés).
+    """
+    return apply_rules(aliments_final, CONSOLIDATION_RULES)
 
-def matieres_grasses_filtering(aliments_final):
+@traced("utils")
+def build_tables(aliments, equipements, energie):
     """
-    Fonctions permettant de traiter les aliments de type Matières grasses.
-    Toujours dans l'optique de faciliter l'experience de l'utilisateur, certaines données ont été regroupées.
+    Enchaîne toutes les étapes de nettoyage sur les données brutes
+    et retourne les tables (aliments_final, energie_filtered, equipements_filtered).
     """
-    beurre_group = aliments_final[aliments_final['nom'].str.contains('Beurre', case=False)]
-    beurre_aggregated = {
-        'nom': 'Beurre (tous types)',
-        'french_attribut': ' / '.join(set(beurre_group['french_attribut'])),
-        'CO2': beurre_group['CO2'].mean(),
-        'main_type': 'Matières grasses'
-    }
+    aliments_stage = aliments_final(aliments_filtering(aliments))
 
-    # Regrouper les matières grasses végétales
-    vegetal_group = aliments_final[aliments_final['nom'].str.contains(
-        'Matière grasse végétale', case=False)]
-    vegetal_aggregated = {
-        'nom': 'Matière grasse végétale (tous types)',
-        'french_attribut': ' / '.join(set(vegetal_group['french_attribut'])),
-        'CO2': vegetal_group['CO2'].mean(),
-        'main_type': 'Matières grasses'
+    return consolidate_aliments(aliments_stage), energie_filtering(energie), equipements_filtering(equipements)
 
-    }
+def row_hashes(aliments):
+    """
+    Retourne, pour chaque id brut, le nom de l'aliment et une empreinte du contenu de sa ligne.
+    """
+    return pd.DataFrame({
+        'id': aliments['id'].to_numpy(),
+        'nom': aliments['french_name'].to_numpy(),
+        'hash': pd.util.hash_pandas_object(aliments.drop(columns='id'), index=False).to_numpy(),
+    })
 
-    combined_group = aliments_final[aliments_final['nom'].str.contains(
-        'Huile combinée', case=False)]
-    combined_aggregated = {
-        'nom': 'Huile combinée',
-        'french_attribut': ' / '.join(set(combined_group['french_attribut'])),
-        'CO2': combined_group['CO2'].mean(),
-        'main_type': 'Matières grasses'
-    }
+def diff_raw_aliments(old_hashes, new_hashes):
+    """
+    Compare deux états (voir row_hashes) et retourne les ids ajoutés, supprimés et modifiés.
+    """
+    old = old_hashes.set_index('id')['hash']
+    new = new_hashes.set_index('id')['hash']
 
-    melangee_group = aliments_final[aliments_final['nom'].str.contains(
-        'Matière grasse mélangée', case=False)]
-    melangee_aggregated = {
-        'nom': 'Matière grasse mélangée (végétale et laitière)',
-        'french_attribut': ' / '.join(set(combined_group['french_attribut'])),
-        'CO2': melangee_group['CO2'].mean(),
-        'main_type': 'Matières grasses'
-    }
+    added = new.index.difference(old.index)
+    removed = old.index.difference(new.index)
+    common = new.index.intersection(old.index)
+    changed = common[new[common].to_numpy() != old[common].to_numpy()]
 
-    # Supprimer les anciennes entrées de beurre et matières grasses végétales
-    aliments_final = aliments_final[~aliments_final['nom'].str.contains(
-        'Beurre|Matière grasse végétale|Huile combinée|Matière grasse mélangée', case=False)]
+    return added, removed, changed
 
-    # Ajouter les nouvelles entrées regroupées
-    aliments_final = pd.concat([aliments_final, pd.DataFrame(
-        [beurre_aggregated, vegetal_aggregated, combined_aggregated, melangee_aggregated])],
-        ignore_index=True)
+def write_if_changed(data, path):
+    """
+    N'écrit la table que si son contenu diffère du fichier existant.
+    Retourne True si le fichier a été réécrit.
+    """
+    content = data.to_csv(index=False)
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+@traced("utils")
+def incremental_rebuild(data_dir=DATA_DIR, cache_dir=None):
+    """
+    Reconstruit les tables exportées en ne retraitant que les aliments touchés depuis la dernière exécution.
 
-    # Arrondir le CO2 à 2 chiffres après la virgule
-    aliments_final['CO2'] = aliments_final['CO2'].round(2)
+    Les lignes brutes sont suivies par leur id : on détecte les lignes ajoutées, supprimées ou modifiées,
+    puis on ne recalcule que les groupes des noms concernés. Toutes les étapes d'aliments_filtering
+    et d'aliments_final regroupent par nom, le résultat est donc identique à une reconstruction complète.
+    Les regroupements par catégorie sont ensuite réappliqués sur la table corrigée et seuls les fichiers
+    dont le contenu a changé sont réécrits.
 
-    return aliments_final
+    Le suivi est conservé dans cache_dir, par défaut le dossier .cache de data_dir.
 
-def the_filtering(aliments_final):
-    the_group = aliments_final[(aliments_final['nom'].str.contains(
-        'Thé', case=False)) & (aliments_final['CO2'] == 0.04)]
-
-    # Créer une entrée regroupée pour les thés
-    the_aggregated = {
-        'nom': 'Thé (tous types)',
-        'french_attribut': ' / '.join(set(the_group['french_attribut'])),
-        'CO2': 0.04,
-        'main_type': 'Boissons'
+    Retourne un résumé des changements détectés.
+    """
+    cache_dir = cache_dir or os.path.join(data_dir, ".cache")
+    aliments, equipements, energie = load_raw_data(data_dir)
+    new_hashes = row_hashes(aliments)
+
+    manifest_path = os.path.join(cache_dir, "aliments_manifest.pkl")
+    stage_path = os.path.join(cache_dir, "aliments_stage.pkl")
+
+    if os.path.exists(manifest_path) and os.path.exists(stage_path):
+        old_hashes = pd.read_pickle(manifest_path)
+        stage = pd.read_pickle(stage_path)
+        added, removed, changed = diff_raw_aliments(old_hashes, new_hashes)
+
+        # Noms touchés : les nouveaux noms des lignes ajoutées ou modifiées et les anciens noms
+        # des lignes supprimées ou modifiées
+        affected = set(new_hashes.loc[new_hashes['id'].isin(added.union(changed)), 'nom'])
+        affected |= set(old_hashes.loc[old_hashes['id'].isin(removed.union(changed)), 'nom'])
+
+        if affected:
+            subset = aliments[aliments['french_name'].isin(affected)]
+            filtered = aliments_filtering(subset)
+            stage = stage[~stage['nom'].isin(affected)]
+            if not filtered.empty:
+                stage = pd.concat([stage, aliments_final(filtered)], ignore_index=True)
+            # Même ordre que le groupby(['nom', 'CO2']) d'aliments_final
+            stage = stage.sort_values(['nom', 'CO2'], kind='mergesort').reset_index(drop=True)
+    else:
+        added, removed, changed = new_hashes['id'], [], []
+        affected = set(new_hashes['nom'])
+        stage = aliments_final(aliments_filtering(aliments)).reset_index(drop=True)
+
+    written = []
+    aliments_path = os.path.join(data_dir, "aliments_final.csv")
+    outputs = [
+        (consolidate_aliments(stage) if affected or not os.path.exists(aliments_path) else None,
+         "aliments_final.csv"),
+        (energie_filtering(energie), "energie_filtered.csv"),
+        (equipements_filtering(equipements), "equipements_filtered.csv"),
+    ]
+    for data, filename in outputs:
+        if data is not None and write_if_changed(data, os.path.join(data_dir, filename)):
+            written.append(filename)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    new_hashes.to_pickle(manifest_path)
+    stage.to_pickle(stage_path)
+
+    return {
+        'ajoutees': len(added),
+        'supprimees': len(removed),
+        'modifiees': len(changed),
+        'noms_recalcules': len(affected),
+        'fichiers_ecrits': written,
     }
 
-    # Supprimer les anciennes entrées de thés avec CO2 = 0.04
-    aliments_final = aliments_final[~((aliments_final['nom'].str.contains(
-        'Thé', case=False)) & (aliments_final['CO2'] == 0.04))]
-
-    # Ajouter la nouvelle entrée regroupée
-    aliments_final = pd.concat([aliments_final, pd.DataFrame([the_aggregated])], ignore_index=True)
-
-    return aliments_final
+@traced("utils")
+def stream_aliments_grouped(path, chunksize=CHUNKSIZE):
+    """
+    Lit le CSV brut des aliments par morceaux en ne gardant que les colonnes utiles.
 
-def export_to_csv(aliments_final, energie_filtered, equipements_filtered):
+    Chaque morceau est filtré (viandes cuites) puis réduit à une ligne par (nom, attributs, CO2),
+    et ces résultats partiels sont fusionnés au fur et à mesure : la mémoire dépend du nombre
+    d'aliments distincts et non du nombre de lignes du fichier.
     """
-    Fonction permettant d'exporter les nouvelles bases de données après leur différents traitements.
+    keys = ['nom', 'french_attribut', 'CO2']
+    grouped = None
+    for chunk in pd.read_csv(path, usecols=ALIMENTS_COLUMNS, chunksize=chunksize):
+        # Filtre les lignes où 'french_tag' contient 'viandes cuites'
+        chunk = chunk[~chunk['french_tag'].str.contains('viandes cuites', case=False, na=False)]
+        chunk = chunk.drop(columns='french_tag').rename(columns={"french_name" : "nom"})
+
+        partial = chunk.groupby(keys, as_index=False, sort=False).first()
+        if grouped is not None:
+            # 'first' reste correct tant que les morceaux sont fusionnés dans l'ordre du fichier
+            partial = pd.concat([grouped, partial], ignore_index=True).groupby(
+                keys, as_index=False, sort=False).first()
+        grouped = partial
+
+    return grouped.sort_values(keys, kind='mergesort').reset_index(drop=True)
+
+@traced("utils")
+def stream_build_tables(data_dir=DATA_DIR, chunksize=CHUNKSIZE):
+    """
+    Équivalent de build_tables(*load_raw_data()) lisant les exports bruts en streaming.
+    Retourne les tables (aliments_final, energie_filtered, equipements_filtered).
     """
-    # Store le path du dossier parent
-    parent_dir = os.path.join(os.path.dirname(os.getcwd()), "data")
+    aliments_grouped = stream_aliments_grouped(os.path.join(data_dir, "aliments.csv"), chunksize)
+    aliments = consolidate_aliments(aliments_final_from_grouped(aliments_grouped))
 
-    # Construire le chemin complet du fichier
-    aliment_path = os.path.join(parent_dir, "aliments_final.csv")
-    energie_path = os.path.join(parent_dir, "energie_filtered.csv")
-    equipements_path = os.path.join(parent_dir, "equipements_filtered.csv")
+    energie = pd.concat(pd.read_csv(
+        os.path.join(data_dir, "energie.csv"), usecols=ENERGIE_COLUMNS, chunksize=chunksize),
+        ignore_index=True)
 
-    try:
-        # Exporter la DataFrame en CSV
-        aliments_final.to_csv(aliment_path, index=False)
-        energie_filtered.to_csv(energie_path, index=False)
-        equipements_filtered.to_csv(equipements_path, index=False)
-        print(f"Fichier exporté avec succès : {aliment_path}")
-    except Exception as e:
-        print(f"Erreur lors de l'exportation : {e}")
+    # equipements_filtering ne garde que les premières lignes
+    equipements = pd.read_csv(
+        os.path.join(data_dir, "equipements.csv"), usecols=EQUIPEMENTS_COLUMNS, nrows=5
+        ).rename(columns={"complete_name" : "nom"})
+
+    return aliments, energie, equipements
@@ -0,0 +1,322 @@
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from carbonsimulator.batch import SOURCES, aggregate_footprints, build_factor_table, resolve_ledger
+from carbonsimulator.store import DATA_DIR
+from carbonsimulator.utils import build_tables, diff_raw_aliments, row_hashes
+
+HISTORY_DIR = os.path.join(DATA_DIR, ".versions")
+RELEASES = "releases.json"
+
+# Nombre de jours réservés à chaque clé dans l'index combiné (clé, date) : environ 2 800 ans à partir de 1900
+_SPAN = 2**20
+_EPOCH = np.datetime64('1900-01-01', 'D')
+
+MOIS = {
+    'janv': 1, 'jan': 1, 'fevr': 2, 'févr': 2, 'fev': 2, 'fév': 2, 'mars': 3, 'avr': 4, 'mai': 5, 'juin': 6,
+    'juil': 7, 'aout': 8, 'août': 8, 'sept': 9, 'oct': 10, 'nov': 11, 'dec': 12, 'déc': 12,
+}
+
+
+def parse_validity(value):
+    """
+    Convertit une valeur de validity_range en date de fin de validité :
+    '24/02/2026' -> 2026-02-24, 'Année 2023' -> 2023-12-31, 'déc-21' -> 2021-12-31.
+    Retourne NaT si le format n'est pas reconnu.
+    """
+    if not isinstance(value, str):
+        return pd.NaT
+    value = value.strip()
+    match = re.fullmatch(r"(\d{1,2})/(\d{1,2})/(\d{4})", value)
+    if match:
+        day, month, year = map(int, match.groups())
+        return pd.Timestamp(year, month, day)
+    match = re.fullmatch(r"(?:Année\s+)?(\d{4})", value)
+    if match:
+        return pd.Timestamp(int(match.group(1)), 12, 31)
+    match = re.fullmatch(r"([^\W\d_]+)\.?-(\d{2}|\d{4})", value)
+    if match and match.group(1).lower() in MOIS:
+        year = int(match.group(2))
+        year += 2000 if year < 100 else 0
+        return pd.Timestamp(year, MOIS[match.group(1).lower()], 1) + pd.offsets.MonthEnd(0)
+    return pd.NaT
+
+def _days(dates):
+    dates = pd.to_datetime(pd.Index(dates)) if len(dates) else pd.DatetimeIndex([])
+    return (dates.to_numpy().astype('datetime64[D]') - _EPOCH).astype(np.int64)
+
+
+class TemporalIndex:
+    """
+    Index (clé, date) -> version valide à cette date.
+
+    Chaque version d'une clé commence à une date et reste valide jusqu'à la version suivante
+    de la même clé ; une version de position -1 marque une suppression. Les couples (clé, début)
+    sont encodés en un seul entier trié : une recherche est une recherche dichotomique, en O(log n).
+    """
+
+    def __init__(self, keys, starts, positions):
+        keys = list(keys)
+        self.keys = pd.MultiIndex.from_tuples(list(dict.fromkeys(keys))) if keys else None
+        codes = self.keys.get_indexer(pd.MultiIndex.from_tuples(keys)) if keys else np.empty(0, dtype=np.int64)
+        combined = codes.astype(np.int64) * _SPAN + _days(starts)
+        order = np.argsort(combined, kind='stable')
+        self.combined = combined[order]
+        self.positions = np.asarray(positions, dtype=np.int64)[order]
+
+    def __len__(self):
+        return len(self.combined)
+
+    def lookup_many(self, keys, dates):
+        """
+        Retourne la position de la version valide de chaque clé à chaque date (-1 si aucune).
+        keys est une liste de tuples ou une MultiIndex, alignée sur dates.
+        """
+        keys = keys if isinstance(keys, pd.MultiIndex) else pd.MultiIndex.from_tuples(list(keys))
+        if self.keys is None:
+            return np.full(len(keys), -1, dtype=np.int64)
+        codes = self.keys.get_indexer(keys).astype(np.int64)
+        query = codes * _SPAN + _days(dates)
+        found = np.searchsorted(self.combined, query, side='right') - 1
+
+        valid = (codes >= 0) & (found >= 0)
+        # La version trouvée doit appartenir à la même clé
+        valid[valid] &= self.combined[found[valid]] // _SPAN == codes[valid]
+        positions = np.full(len(query), -1, dtype=np.int64)
+        positions[valid] = self.positions[found[valid]]
+        return positions
+
+    def lookup(self, key, date):
+        """
+        Retourne la position de la version de key valide à date, -1 si aucune.
+        """
+        return int(self.lookup_many([key], [date])[0])
+
+
+class FactorHistory:
+    """
+    Base de facteurs versionnée : conserve les éditions successives de la Base Carbone
+    (tables brutes aliments, équipements, énergie) sous forme de différences ligne à ligne.
+
+    Chaque édition est datée ; seules les lignes ajoutées ou modifiées depuis l'édition précédente
+    sont enregistrées, ainsi que les ids supprimés. Une version d'une ligne est valide de la date
+    de son édition jusqu'à l'édition suivante qui la modifie ou la supprime. La colonne validity_range
+    est conservée et convertie en date de fin de validité (valide_jusqu_au).
+    """
+
+    def __init__(self, path=HISTORY_DIR):
+        self.path = path
+        self.releases = []
+        self.rows = pd.DataFrame()
+        self.index = TemporalIndex([], [], [])
+        self._tables = {}
+
+        releases_path = os.path.join(path, RELEASES)
+        if os.path.exists(releases_path):
+            with open(releases_path, encoding='utf-8') as f:
+                self.releases = json.load(f)
+        self._reindex()
+
+    def _diff_path(self, release):
+        return os.path.join(self.path, f"{release['date']}.pkl")
+
+    def _reindex(self):
+        """
+        Reconstruit l'index temporel à partir des différences enregistrées.
+        """
+        frames, keys, starts, positions = [], [], [], []
+        offset = 0
+        for release in self.releases:
+            diff = pd.read_pickle(self._diff_path(release))
+            rows = diff['lignes']
+            if len(rows):
+                frames.append(rows)
+            keys += list(zip(rows['source'], rows['id']))
+            starts += [release['date']] * len(rows)
+            positions += list(range(offset, offset + len(rows)))
+            offset += len(rows)
+
+            keys += list(diff['supprimees'])
+            starts += [release['date']] * len(diff['supprimees'])
+            positions += [-1] * len(diff['supprimees'])
+
+        self.rows = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        self.index = TemporalIndex(keys, starts, positions)
+        self._tables = {}
+
+    def dates(self):
+        """
+        Retourne les dates des éditions, dans l'ordre.
+        """
+        return [pd.Timestamp(release['date']) for release in self.releases]
+
+    def release_at(self, date):
+        """
+        Retourne le numéro de l'édition en vigueur à une date (-1 si la date précède la première édition).
+        """
+        return int(np.searchsorted(np.array(self.dates(), dtype='datetime64[ns]'),
+                                   np.datetime64(pd.Timestamp(date), 'ns'), side='right')) - 1
+
+    def add_release(self, date, aliments, equipements, energie):
+        """
+        Enregistre une nouvelle édition (tables brutes de load_raw_data) datée de date,
+        postérieure à toutes les éditions existantes. Retourne le nombre de lignes ajoutées,
+        modifiées et supprimées.
+        """
+        date = pd.Timestamp(date).strftime('%Y-%m-%d')
+        if self.releases and date <= self.releases[-1]['date']:
+            raise ValueError(f"L'édition du {date} doit être postérieure à celle du {self.releases[-1]['date']}")
+
+        previous = self._current_rows(self.releases[-1]['date']) if self.releases else None
+        lignes = []
+        supprimees = []
+        counts = {'ajoutees': 0, 'modifiees': 0, 'supprimees': 0}
+        for source, new in zip(SOURCES, (aliments, equipements, energie)):
+            new_hashes = row_hashes(new)
+            if previous is None:
+                added, removed, changed = new_hashes['id'], [], []
+            else:
+                # Les empreintes enregistrées avec chaque version évitent de recomparer les anciennes lignes
+                added, removed, changed = diff_raw_aliments(previous[previous['source'] == source], new_hashes)
+            touched = new[new['id'].isin(pd.Index(added).union(pd.Index(changed)))].copy()
+            touched.insert(0, 'source', source)
+            touched['hash'] = new_hashes['hash'].to_numpy()[new['id'].isin(touched['id']).to_numpy()]
+            touched['valide_jusqu_au'] = touched['validity_range'].map(parse_validity) \
+                if 'validity_range' in touched else pd.NaT
+            lignes.append(touched)
+            supprimees += [(source, i) for i in removed]
+            counts['ajoutees'] += len(added)
+            counts['modifiees'] += len(changed)
+            counts['supprimees'] += len(removed)
+
+        os.makedirs(self.path, exist_ok=True)
+        release = {'date': date, **counts,
+                   'colonnes': {source: list(t.columns) for source, t in zip(SOURCES, (aliments, equipements, energie))}}
+        lignes = [touched for touched in lignes if len(touched)] or lignes[:1]
+        pd.to_pickle({'lignes': pd.concat(lignes, ignore_index=True), 'supprimees': supprimees},
+                     self._diff_path(release))
+        self.releases.append(release)
+        with open(os.path.join(self.path, RELEASES), 'w', encoding='utf-8') as f:
+            json.dump(self.releases, f, ensure_ascii=False, indent=1)
+
+        self._reindex()
+        return counts
+
+    def lookup(self, source, id, date):
+        """
+        Retourne la version de la ligne brute (source, id) valide à date, sous forme de Series, ou None.
+        """
+        position = self.index.lookup((source, id), date)
+        return None if position < 0 else self.rows.iloc[position]
+
+    def lookup_many(self, sources, ids, dates):
+        """
+        Retourne les versions valides d'une série de lignes brutes (source, id) à des dates,
+        avec une colonne trouve (False si la ligne n'existait pas à cette date).
+        """
+        positions = self.index.lookup_many(pd.MultiIndex.from_arrays([sources, ids]), dates)
+        result = self.rows.reindex(positions).reset_index(drop=True)
+        result['trouve'] = positions >= 0
+        return result
+
+    def _current_rows(self, date):
+        """
+        Retourne les versions de toutes les lignes brutes valides à une date.
+        """
+        keys = list(dict.fromkeys(zip(self.rows['source'], self.rows['id'])))
+        positions = self.index.lookup_many(keys, [date] * len(keys))
+        return self.rows.iloc[positions[positions >= 0]]
+
+    def snapshot(self, date, expired=True):
+        """
+        Reconstruit les tables brutes (aliments, equipements, energie) valides à une date.
+        Si expired vaut False, les lignes dont la validity_range est dépassée à cette date sont exclues.
+        """
+        if self.rows.empty:
+            return tuple(pd.DataFrame() for _ in SOURCES)
+        rows = self._current_rows(date)
+        if not expired:
+            rows = rows[~(rows['valide_jusqu_au'] < pd.Timestamp(date))]
+
+        # Colonnes de chaque source dans l'édition en vigueur à cette date
+        release = self.releases[max(self.release_at(date), 0)]
+        tables = []
+        for source in SOURCES:
+            table = rows[rows['source'] == source]
+            tables.append(table[release['colonnes'][source]].reset_index(drop=True))
+        return tuple(tables)
+
+    def factor_table(self, release):
+        """
+        Retourne la table de facteurs (voir batch.build_factor_table) d'une édition,
+        calculée une seule fois par édition.
+        """
+        if release not in self._tables:
+            date = self.releases[release]['date']
+            aliments, energie, equipements = build_tables(*self.snapshot(date))
+            self._tables[release] = build_factor_table(aliments, equipements, energie)
+        return self._tables[release]
+
+    def factor(self, source, nom, french_attribut, date):
+        """
+        Retourne le facteur (source, nom, french_attribut) des tables nettoyées valide à date, ou None.
+        """
+        release = self.release_at(date)
+        if release < 0:
+            return None
+        factors = self.factor_table(release)
+        key = (source, nom, french_attribut or '')
+        return factors.loc[key] if key in factors.index else None
+
+    def restate(self, ledger, errors='raise'):
+        """
+        Recalcule un registre daté (colonnes de batch.resolve_ledger et une colonne date)
+        avec, pour chaque ligne, les facteurs de l'édition en vigueur à sa date.
+        Chaque édition n'est nettoyée qu'une fois, quel que soit le nombre de dates du registre.
+        Retourne le registre résolu, dans l'ordre d'origine, avec une colonne edition.
+        """
+        dates = np.array(self.dates(), dtype='datetime64[ns]')
+        releases = np.searchsorted(dates, pd.to_datetime(ledger['date']).to_numpy(), side='right') - 1
+        if (releases < 0).any():
+            raise ValueError(f"{(releases < 0).sum()} ligne(s) antérieure(s) à la première édition")
+
+        parts = []
+        for release in np.unique(releases):
+            part = resolve_ledger(ledger[releases == release], self.factor_table(int(release)), errors=errors)
+            part['edition'] = self.releases[release]['date']
+            parts.append(part)
+        resolved = pd.concat(parts)
+        return resolved.loc[ledger.index[ledger.index.isin(resolved.index)]]
+
+    def restate_footprints(self, ledger, errors='raise'):
+        """
+        Comme restate, mais retourne les totaux par restaurant (voir batch.compute_footprints).
+        """
+        return aggregate_footprints(self.restate(ledger, errors))
+
+    def diff(self, before, after):
+        """
+        Compare deux éditions (numéros) et retourne les lignes brutes ajoutées, supprimées et modifiées
+        (versions de l'édition after pour les lignes ajoutées et modifiées, de before pour les supprimées).
+        """
+        date_before, date_after = self.releases[before]['date'], self.releases[after]['date']
+        old = pd.concat([t.assign(source=s) for s, t in zip(SOURCES, self.snapshot(date_before))], ignore_index=True)
+        new = pd.concat([t.assign(source=s) for s, t in zip(SOURCES, self.snapshot(date_after))], ignore_index=True)
+        old_keys = pd.MultiIndex.from_frame(old[['source', 'id']])
+        new_keys = pd.MultiIndex.from_frame(new[['source', 'id']])
+
+        common = new_keys.isin(old_keys)
+        old_positions = old_keys.get_indexer(new_keys[common])
+        columns = [c for c in new.columns if c in old.columns]
+        new_hash = pd.util.hash_pandas_object(new.loc[common, columns], index=False).to_numpy()
+        old_hash = pd.util.hash_pandas_object(old.iloc[old_positions][columns], index=False).to_numpy()
+
+        return {
+            'ajoutees': new[~common].reset_index(drop=True),
+            'supprimees': old[~old_keys.isin(new_keys)].reset_index(drop=True),
+            'modifiees': new[common][new_hash != old_hash].reset_index(drop=True),
+        }
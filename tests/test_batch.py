@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+from carbonsimulator.batch import compute_footprints
+from carbonsimulator.calculator import load_data
+
+ALIMENTS, EQUIPEMENTS, ENERGIE = load_data()
+
+
+def _ledger():
+    return pd.DataFrame({
+        'restaurant': ['R1', 'R1', 'R1', 'R2', 'R2'],
+        'source': ['aliments', 'aliments', 'energie', 'equipements', 'aliments'],
+        'nom': [ALIMENTS['nom'][0], ALIMENTS['nom'][40], ENERGIE['french_name'][1], EQUIPEMENTS['nom'][2],
+                ALIMENTS['nom'][0]],
+        'french_attribut': [ALIMENTS['french_attribut'][0], ALIMENTS['french_attribut'][40], None, None,
+                            ALIMENTS['french_attribut'][0]],
+        'quantite': [2.0, 0.5, 120.0, 1.0, 4.0],
+    })
+
+
+def test_compute_footprints_matches_a_manual_sum():
+    totaux, par_main_type = compute_footprints(_ledger(), ALIMENTS, EQUIPEMENTS, ENERGIE)
+
+    # Calcul ligne à ligne, comme les menus du calculateur
+    r1_aliments = 2.0 * ALIMENTS['CO2'][0] + 0.5 * ALIMENTS['CO2'][40]
+    assert totaux.loc['R1', 'aliments'] == pytest.approx(r1_aliments)
+    assert totaux.loc['R1', 'energie'] == pytest.approx(120.0 * ENERGIE['CO2'][1])
+    assert totaux.loc['R2', 'equipements'] == pytest.approx(EQUIPEMENTS['CO2'][2])
+    assert totaux.loc['R2', 'total'] == pytest.approx(EQUIPEMENTS['CO2'][2] + 4.0 * ALIMENTS['CO2'][0])
+    assert par_main_type.loc['R1'].sum() == pytest.approx(r1_aliments)
+    assert par_main_type.loc['R2', ALIMENTS['main_type'][0]] == pytest.approx(4.0 * ALIMENTS['CO2'][0])
+
+
+def test_unknown_items():
+    ledger = pd.concat([_ledger(), pd.DataFrame([{
+        'restaurant': 'R3', 'source': 'aliments', 'nom': "n'existe pas", 'quantite': 1.0}])], ignore_index=True)
+    with pytest.raises(ValueError, match="sans facteur"):
+        compute_footprints(ledger, ALIMENTS, EQUIPEMENTS, ENERGIE)
+
+    totaux, _ = compute_footprints(ledger, ALIMENTS, EQUIPEMENTS, ENERGIE, errors='ignore')
+    assert list(totaux.index) == ['R1', 'R2']
+    with pytest.raises(ValueError, match="quantite"):
+        compute_footprints(ledger.drop(columns='quantite'), ALIMENTS, EQUIPEMENTS, ENERGIE)
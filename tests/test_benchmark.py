@@ -0,0 +1,39 @@
+import pandas as pd
+
+from carbonsimulator.batch import compute_footprints
+from carbonsimulator.benchmark import compare, make_dataset, synthetic_ledger, synthetic_raw_aliments
+from carbonsimulator.calculator import load_data
+from carbonsimulator.importtime import FORBIDDEN_MODULES, measure_import_time
+from carbonsimulator.utils import build_tables, load_raw_data
+
+
+def test_synthetic_dataset_is_the_cleaned_raw_data(tmp_path):
+    make_dataset(2, str(tmp_path))
+    raw = load_raw_data(str(tmp_path))
+    assert len(raw[0]) == 2 * len(load_raw_data()[0])
+    pd.testing.assert_frame_equal(raw[0], synthetic_raw_aliments(load_raw_data()[0], 2), check_dtype=False)
+
+    aliments, equipements, energie = load_data(data_dir=str(tmp_path))
+    expected = build_tables(*raw)
+    assert len(aliments) == len(expected[0])
+    pd.testing.assert_series_equal(aliments['CO2'], expected[0]['CO2'].reset_index(drop=True))
+
+    ledger = synthetic_ledger(aliments, equipements, energie, 500, 10)
+    totaux, _ = compute_footprints(ledger, aliments, equipements, energie)
+    assert len(totaux) == 10
+    assert (totaux['energie'] > 0).all()
+
+
+def test_compare_reports_regressions():
+    baseline = {'results': [{'scale': 1, 'stage': 'a', 'seconds': 1.0}, {'scale': 1, 'stage': 'b', 'seconds': 1.0}]}
+    current = {'results': [{'scale': 1, 'stage': 'a', 'seconds': 1.1}, {'scale': 1, 'stage': 'b', 'seconds': 1.5},
+                           {'scale': 10, 'stage': 'a', 'seconds': 9.0}]}
+    regressions = compare(baseline, current, threshold=0.2)
+    assert [(r['scale'], r['stage']) for r in regressions] == [(1, 'b')]
+    assert regressions[0]['ratio'] == 1.5
+
+
+def test_headless_import_loads_no_plotting_library():
+    _, modules = measure_import_time("carbonsimulator.calculator", repeat=1)
+    assert 'pandas' in modules
+    assert not set(FORBIDDEN_MODULES) & set(modules)
@@ -0,0 +1,86 @@
+import os
+
+import pandas as pd
+import pytest
+
+from carbonsimulator import utils
+from carbonsimulator.consolidation import CONSOLIDATION_RULES, apply_rules
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# consolidation_input.csv : table d'aliments_final avant les regroupements par catégorie.
+# consolidation_baseline.csv : la même table passée dans les anciennes fonctions impératives
+# (glace_sorbets, chocolat, matieres_grasses puis the_filtering) avant le moteur de règles.
+# Leurs attributs joints suivaient l'ordre d'un set : seul leur contenu est comparé.
+JOINED = ['Beurre (tous types)', 'Matière grasse végétale (tous types)', 'Huile combinée',
+          'Matière grasse mélangée (végétale et laitière)', 'Thé (tous types)']
+PRODUCED = [rule['nom'] for rule in CONSOLIDATION_RULES if 'nom' in rule]
+
+
+@pytest.fixture(scope="module")
+def tables():
+    stage = pd.read_csv(os.path.join(FIXTURES, "consolidation_input.csv"))
+    baseline = pd.read_csv(os.path.join(FIXTURES, "consolidation_baseline.csv"))
+    return stage, baseline, utils.consolidate_aliments(stage)
+
+
+def _parts(value):
+    return set(value.split(' / ')) if isinstance(value, str) and value else set()
+
+
+def test_same_rows_and_factors_as_baseline(tables):
+    _, baseline, result = tables
+    assert result['nom'].tolist() == baseline['nom'].tolist()
+    assert result['CO2'].tolist() == baseline['CO2'].tolist()
+    assert result['main_type'].fillna('').tolist() == baseline['main_type'].fillna('').tolist()
+    assert result['sous_type'].fillna('').tolist() == baseline['sous_type'].fillna('').tolist()
+
+    # En dehors des attributs joints, les attributs sont identiques
+    other = ~result['nom'].isin(JOINED)
+    assert (result.loc[other, 'french_attribut'].fillna('').tolist()
+            == baseline.loc[other, 'french_attribut'].fillna('').tolist())
+
+
+def test_joined_attributes_keep_first_appearance_order(tables):
+    stage, baseline, result = tables
+    result = result.set_index('nom')
+    baseline = baseline.set_index('nom')
+    for nom in JOINED:
+        if nom == 'Matière grasse mélangée (végétale et laitière)':
+            continue
+        assert _parts(result.loc[nom, 'french_attribut']) == _parts(baseline.loc[nom, 'french_attribut'])
+
+    # Ordre de première apparition dans la table d'entrée
+    thes = stage[stage['nom'].str.contains('Thé', case=False) & (stage['CO2'] == 0.04)]
+    assert result.loc['Thé (tous types)', 'french_attribut'] == ' / '.join(
+        dict.fromkeys(thes['french_attribut'].dropna()))
+
+
+def test_mixed_fat_lists_its_own_attributes(tables):
+    stage, baseline, result = tables
+    nom = 'Matière grasse mélangée (végétale et laitière)'
+    own = stage.loc[stage['nom'].str.contains('Matière grasse mélangée', case=False), 'french_attribut']
+    result = result.set_index('nom')
+    baseline = baseline.set_index('nom')
+
+    # L'ancienne version reprenait par erreur les attributs d'Huile combinée
+    assert _parts(baseline.loc[nom, 'french_attribut']) == _parts(baseline.loc['Huile combinée', 'french_attribut'])
+    assert _parts(result.loc[nom, 'french_attribut']) == set(own.dropna())
+
+
+def test_produced_rows_have_none_sous_type(tables):
+    _, baseline, result = tables
+    produced = result[result['nom'].isin(PRODUCED) & ~result['nom'].str.startswith('Chocolat')]
+    # None (valeur de la règle) au lieu du NaN de l'ancienne version : identiques une fois exportés en CSV
+    assert produced['sous_type'].map(lambda v: v is None).all()
+    assert baseline.loc[baseline['nom'].isin(produced['nom']), 'sous_type'].isna().all()
+
+
+def test_group_filters_match_the_rule_engine(tables):
+    stage, _, result = tables
+    chained = stage
+    for step in (utils.glace_sorbets_filtering, utils.chocolat_filtering,
+                 utils.matieres_grasses_filtering, utils.the_filtering):
+        chained = step(chained)
+    pd.testing.assert_frame_equal(chained.reset_index(drop=True), result.reset_index(drop=True))
+    pd.testing.assert_frame_equal(apply_rules(stage), result)
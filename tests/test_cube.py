@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+from carbonsimulator.calculator import load_data
+from carbonsimulator.cube import FootprintCube
+
+DATA = load_data()
+
+
+def _ledger(dates):
+    return pd.DataFrame({
+        'restaurant': 'R1',
+        'source': 'energie',
+        'nom': 'Electricité',
+        'french_attribut': '',
+        'quantite': [1.0] * len(dates),
+        'date': dates,
+    })
+
+
+def test_months_are_rolled_up_from_days_at_month_boundaries():
+    cube = FootprintCube(*DATA)
+    # Le 2026-04-01 tombe dans la semaine du 2026-03-30, le 2026-01-01 dans celle du 2025-12-29
+    cube.append(_ledger(['2026-01-01', '2026-03-31', '2026-04-01', '2026-04-01']))
+
+    months = cube.levels['month'].groupby(level='periode')['quantite'].sum()
+    assert months.to_dict() == {
+        pd.Timestamp('2026-01-01'): 1.0,
+        pd.Timestamp('2026-03-01'): 1.0,
+        pd.Timestamp('2026-04-01'): 2.0,
+    }
+
+    weeks = cube.levels['week'].groupby(level='periode')['quantite'].sum()
+    assert weeks.to_dict() == {pd.Timestamp('2025-12-29'): 1.0, pd.Timestamp('2026-03-30'): 3.0}
+
+
+def test_append_merges_into_existing_months():
+    cube = FootprintCube(*DATA)
+    cube.append(_ledger(['2026-03-31']))
+    cube.append(_ledger(['2026-04-01', '2026-03-02']))
+
+    months = cube.levels['month'].groupby(level='periode')['emission'].sum()
+    assert months[pd.Timestamp('2026-03-01')] == pytest.approx(2 * 0.058)
+    assert months[pd.Timestamp('2026-04-01')] == pytest.approx(0.058)
@@ -0,0 +1,102 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from carbonsimulator import utils
+from carbonsimulator.store import DATA_DIR
+
+RAW_FILES = ["aliments.csv", "equipements.csv", "energie.csv"]
+OUTPUTS = ["aliments_final.csv", "energie_filtered.csv", "equipements_filtered.csv"]
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for filename in RAW_FILES:
+        shutil.copy(os.path.join(DATA_DIR, filename), tmp_path / filename)
+    return str(tmp_path)
+
+
+def _assert_same_as_full_build(data_dir):
+    expected = utils.build_tables(*utils.load_raw_data(data_dir))
+    for table, filename in zip(expected, OUTPUTS):
+        with open(os.path.join(data_dir, filename), encoding='utf-8') as f:
+            assert f.read() == table.to_csv(index=False), filename
+
+
+def _edit_aliments(data_dir, edit):
+    path = os.path.join(data_dir, "aliments.csv")
+    aliments = edit(pd.read_csv(path))
+    aliments.to_csv(path, index=False)
+
+
+def test_first_run_matches_full_build(data_dir):
+    summary = utils.incremental_rebuild(data_dir)
+    assert sorted(summary['fichiers_ecrits']) == sorted(OUTPUTS)
+    assert os.path.exists(os.path.join(data_dir, ".cache", "aliments_manifest.pkl"))
+    _assert_same_as_full_build(data_dir)
+
+
+def test_unchanged_data_rewrites_nothing(data_dir):
+    utils.incremental_rebuild(data_dir)
+    summary = utils.incremental_rebuild(data_dir)
+    assert summary['noms_recalcules'] == 0
+    assert summary['fichiers_ecrits'] == []
+    _assert_same_as_full_build(data_dir)
+
+
+def test_modified_rows(data_dir):
+    utils.incremental_rebuild(data_dir)
+
+    def edit(aliments):
+        # Un aliment ordinaire et un aliment regroupé par les règles de consolidation
+        aliments.loc[aliments['french_name'] == 'Abricot', 'CO2'] *= 2
+        aliments.loc[aliments['french_name'].str.startswith('Beurre', na=False), 'CO2'] += 1
+        return aliments
+
+    _edit_aliments(data_dir, edit)
+    summary = utils.incremental_rebuild(data_dir)
+    assert summary['modifiees'] > 0
+    assert summary['fichiers_ecrits'] == ["aliments_final.csv"]
+    _assert_same_as_full_build(data_dir)
+
+
+def test_added_removed_and_renamed_rows(data_dir):
+    utils.incremental_rebuild(data_dir)
+
+    def edit(aliments):
+        added = aliments[aliments['french_name'] == 'Abricot'].copy()
+        added['id'] = aliments['id'].max() + 1 + pd.RangeIndex(len(added))
+        added['french_name'] = 'Abricot nouveau'
+        aliments = aliments[aliments['french_name'] != 'Tomate']
+        aliments.loc[aliments['french_name'] == 'Carotte', 'french_name'] = 'Carotte renommée'
+        return pd.concat([aliments, added], ignore_index=True)
+
+    _edit_aliments(data_dir, edit)
+    summary = utils.incremental_rebuild(data_dir)
+    assert summary['ajoutees'] > 0 and summary['supprimees'] > 0 and summary['modifiees'] > 0
+    _assert_same_as_full_build(data_dir)
+
+    final = pd.read_csv(os.path.join(data_dir, "aliments_final.csv"))
+    assert 'Abricot nouveau' in set(final['nom'])
+    assert not {'Tomate', 'Carotte'} & set(final['nom'])
+
+
+def test_deleted_output_and_other_sources(data_dir):
+    utils.incremental_rebuild(data_dir)
+    os.remove(os.path.join(data_dir, "aliments_final.csv"))
+    energie = pd.read_csv(os.path.join(data_dir, "energie.csv"))
+    energie['CO2'] *= 1.5
+    energie.to_csv(os.path.join(data_dir, "energie.csv"), index=False)
+
+    summary = utils.incremental_rebuild(data_dir)
+    assert sorted(summary['fichiers_ecrits']) == ["aliments_final.csv", "energie_filtered.csv"]
+    _assert_same_as_full_build(data_dir)
+
+
+def test_cache_follows_data_dir(data_dir, tmp_path_factory):
+    cache_dir = str(tmp_path_factory.mktemp("cache"))
+    utils.incremental_rebuild(data_dir, cache_dir)
+    assert os.listdir(cache_dir)
+    assert not os.path.exists(os.path.join(data_dir, ".cache"))
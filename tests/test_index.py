@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from carbonsimulator.calculator import load_data
+from carbonsimulator.compact import CompactTable, fixed_point
+from carbonsimulator.index import FactorIndex
+
+ALIMENTS = load_data()[0]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return FactorIndex(ALIMENTS)
+
+
+def test_tree_matches_dataframe_filters(index):
+    # Filtres du calculateur d'origine, sur la DataFrame
+    assert index.main_types() == list(ALIMENTS['main_type'].unique())
+    for main_type in index.main_types():
+        rows = ALIMENTS[ALIMENTS['main_type'] == main_type]
+        assert index.produits(main_type) == rows.index.tolist()
+        assert index.sous_types(main_type) == [
+            None if pd.isna(s) else s for s in rows['sous_type'].unique()]
+        for sous_type in index.sous_types(main_type):
+            mask = rows['sous_type'].isna() if sous_type is None else rows['sous_type'] == sous_type
+            assert index.produits(main_type, sous_type) == rows.index[mask].tolist()
+
+
+def test_records_match_rows(index):
+    for produit_id in [0, 17, len(ALIMENTS) - 1]:
+        row = ALIMENTS.iloc[produit_id]
+        record = index.produit(produit_id)
+        assert (record.nom, record.main_type) == (row['nom'], row['main_type'])
+        assert record.CO2 == pytest.approx(row['CO2'])
+        assert index.lookup(row['nom'], row['french_attribut']) == produit_id
+    np.testing.assert_allclose(index.table.co2_array(), ALIMENTS['CO2'].to_numpy())
+    assert index.lookup("n'existe pas", None) is None
+
+
+def test_compact_table_round_trip():
+    table = CompactTable.from_frame(ALIMENTS)
+    frame = table.to_frame(list(ALIMENTS.columns))
+    pd.testing.assert_frame_equal(frame.astype(object).where(frame.notna(), None),
+                                  ALIMENTS.astype(object).where(ALIMENTS.notna(), None))
+
+    # CO2 non représentable en virgule fixe : stockage en float32
+    table.set_co2(np.full(len(table), 1 / 3))
+    assert table.decimals is None
+    assert table.co2(0) == pytest.approx(1 / 3)
+
+
+def test_fixed_point_is_exact():
+    encoded, decimals = fixed_point([0.1, 2.25, np.nan])
+    assert decimals == 2
+    assert encoded[:2].tolist() == [10, 225]
+    assert fixed_point([1 / 3]) is None
@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+from carbonsimulator.calculator import load_data
+from carbonsimulator.matching import InvoiceMatcher
+
+ALIMENTS = load_data()[0]
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return InvoiceMatcher(ALIMENTS)
+
+
+@pytest.mark.parametrize("ligne, nom", [
+    ("poulet", "Poulet"),
+    ("Filet de poulet", "Poulet"),
+    ("Tomate", "Tomate"),
+    ("Carotte", "Carotte"),
+    ("Pomme golden", "Pomme Golden"),
+    ("Lait demi-écrémé 1L", "Lait demi-écrémé"),
+])
+def test_exact_names_win_over_similar_words(matcher, ligne, nom):
+    result = matcher.match([ligne])
+    assert result.loc[0, 'nom'] == nom
+    assert result.loc[0, 'confiance'] >= 0.8
+
+
+def test_consolidated_attributes_do_not_sink_the_factor(matcher):
+    result = matcher.match(["Beurre doux 250g", "Beurre"])
+    assert (result['nom'] == "Beurre (tous types)").all()
+    assert (result['confiance'] >= 0.5).all()
+
+
+def test_plurals_match_with_bounded_confidence(matcher):
+    result = matcher.match(["Tomates", "tomates cerise"])
+    assert result['nom'].tolist() == ["Tomate", "Tomate cerise"]
+    assert (result['confiance'] < matcher.match(["Tomate cerise"])['confiance'][0]).all()
+
+
+def test_unknown_lines_are_not_matched(matcher):
+    result = matcher.match(["xyz", ""])
+    assert (result['produit_id'] == -1).all()
+
+
+def test_persisted_cache_is_loaded_once(tmp_path, monkeypatch):
+    path = str(tmp_path / "matches.pkl")
+    lignes = ["Filet de poulet", "Tomates", "xyz", "Filet de poulet"]
+    first = InvoiceMatcher(ALIMENTS, cache_path=path)
+    expected = first.match(lignes)
+    first.save_cache()
+
+    matcher = InvoiceMatcher(ALIMENTS, cache_path=path)
+    assert set(matcher.cache) == {"filet de poulet", "tomates", "xyz"}
+
+    def no_read(*args, **kwargs):
+        raise AssertionError("le cache ne doit être lu qu'à la construction")
+
+    monkeypatch.setattr(pd, "read_pickle", no_read)
+    monkeypatch.setattr(matcher, "match_one", no_read)
+    for _ in range(3):
+        pd.testing.assert_frame_equal(matcher.match(lignes), expected)
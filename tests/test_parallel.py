@@ -0,0 +1,37 @@
+import os
+import shutil
+
+import pandas as pd
+
+from carbonsimulator.parallel import parallel_build_tables, parallel_rebuild, partition_aliments
+from carbonsimulator.store import DATA_DIR
+from carbonsimulator.utils import build_tables, export_to_csv, load_raw_data
+
+RAW = load_raw_data()
+
+
+def test_names_stay_in_one_partition():
+    parts = partition_aliments(RAW[0])
+    assert sum(len(part) for part in parts) == len(RAW[0])
+    names = [name for part in parts for name in part['french_name'].unique()]
+    assert len(names) == len(set(names))
+
+
+def test_parallel_build_tables_matches_build_tables():
+    for got, expected in zip(parallel_build_tables(*RAW, processes=2), build_tables(*RAW)):
+        pd.testing.assert_frame_equal(got, expected.reset_index(drop=True))
+
+
+def test_parallel_rebuild_only_writes_changed_files(tmp_path):
+    data_dir = str(tmp_path)
+    for filename in ["aliments.csv", "equipements.csv", "energie.csv"]:
+        shutil.copy(os.path.join(DATA_DIR, filename), data_dir)
+    aliments, energie, equipements = build_tables(*RAW)
+    export_to_csv(aliments, energie, equipements, data_dir=data_dir)
+
+    assert parallel_rebuild([data_dir], processes=2) == {data_dir: []}
+
+    os.remove(os.path.join(data_dir, "energie_filtered.csv"))
+    assert parallel_rebuild([data_dir], processes=2) == {data_dir: ["energie_filtered.csv"]}
+    pd.testing.assert_frame_equal(pd.read_csv(os.path.join(data_dir, "energie_filtered.csv")),
+                                  pd.read_csv(os.path.join(DATA_DIR, "energie_filtered.csv")))
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from carbonsimulator.batch import compute_footprints
+from carbonsimulator.calculator import load_data
+from carbonsimulator.recipes import MAIN_TYPE_INCONNU, RecipeBook
+
+ALIMENTS, EQUIPEMENTS, ENERGIE = load_data()
+
+
+def _ingredients(ids, quantites):
+    return [(ALIMENTS['nom'][i], ALIMENTS['french_attribut'][i], q) for i, q in zip(ids, quantites)]
+
+
+def test_recipe_matches_compute_footprints():
+    book = RecipeBook(ALIMENTS)
+    book.add('sauce', _ingredients([0, 3], [0.2, 0.1]), rendement=2.0)
+    book.add('plat', _ingredients([10], [0.3]) + [('sauce', 0.5)])
+
+    ingredients = _ingredients([10, 0, 3], [0.3, 0.05, 0.025])
+    ledger = pd.DataFrame([('plat', 'aliments', *ingredient) for ingredient in ingredients],
+                          columns=['restaurant', 'source', 'nom', 'french_attribut', 'quantite'])
+    totaux, par_main_type = compute_footprints(ledger, ALIMENTS, EQUIPEMENTS, ENERGIE)
+
+    assert book.footprint('plat') == pytest.approx(totaux.loc['plat', 'total'])
+    detail = book.footprints().loc['plat']
+    for main_type, value in par_main_type.loc['plat'].items():
+        assert detail[main_type] == pytest.approx(value)
+
+
+def test_food_without_main_type_is_booked_as_unknown():
+    aliments = ALIMENTS.copy()
+    aliments.loc[0, 'main_type'] = np.nan
+    book = RecipeBook(aliments)
+    book.add('plat', _ingredients([0, 10], [1.0, 1.0]))
+
+    detail = book.footprints().loc['plat']
+    assert detail[MAIN_TYPE_INCONNU] == pytest.approx(ALIMENTS['CO2'][0])
+    assert detail[ALIMENTS['main_type'][10]] == pytest.approx(ALIMENTS['CO2'][10])
+    # Rien n'est compté dans une autre catégorie
+    assert detail.drop(['total', MAIN_TYPE_INCONNU]).sum() == pytest.approx(ALIMENTS['CO2'][10])
+
+
+def test_update_factors_patches_the_index():
+    book = RecipeBook(ALIMENTS)
+    book.add('plat', _ingredients([0, 10], [1.0, 2.0]))
+    book.footprint('plat')
+
+    aliments = ALIMENTS.copy()
+    aliments.loc[10, 'CO2'] = 1.2345678
+    assert book.update_factors(aliments) == 1
+    assert book.index.co2(10) == pytest.approx(1.2345678)
+    assert book.index.co2(0) == pytest.approx(ALIMENTS['CO2'][0])
+    assert book.footprint('plat') == pytest.approx(ALIMENTS['CO2'][0] + 2 * 1.2345678)
+
+    book.set_factor(ALIMENTS['nom'][0], ALIMENTS['french_attribut'][0], 4.5)
+    assert book.index.co2(0) == 4.5
+    assert book.index.produit(0).CO2 == 4.5
+    assert book.footprint('plat') == pytest.approx(4.5 + 2 * 1.2345678)
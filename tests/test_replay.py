@@ -0,0 +1,43 @@
+import pytest
+
+from carbonsimulator import calculator
+from carbonsimulator.calculator import load_data, run_session
+from carbonsimulator.console import ScriptedIO, load_sessions
+from carbonsimulator.index import FactorIndex
+from carbonsimulator.replay import generate_sessions, replay, replay_session
+
+ALIMENTS, EQUIPEMENTS, ENERGIE = load_data()
+INDEX = FactorIndex(ALIMENTS)
+
+
+def test_main_records_the_session_from_the_environment(tmp_path, monkeypatch):
+    path = tmp_path / "sessions.jsonl"
+    monkeypatch.setenv("CARBONSIMULATOR_RECORD", str(path))
+    monkeypatch.setattr(calculator, "HEADLESS", True)
+
+    answers = ["1", "2.5", "abc", "0", "1", "0", "0"]
+    for _ in range(2):
+        calculator.main(ScriptedIO(answers))
+
+    assert load_sessions(path) == [answers, answers]
+    io = replay_session(answers, INDEX, EQUIPEMENTS, ENERGIE)
+    expected = 2.5 * ENERGIE['CO2'][0] + EQUIPEMENTS['CO2'][0]
+    assert f"TOTAL : {expected:.2f} kgCO2" in io.transcript()
+    assert io.remaining() == 0
+
+
+def test_replay_matches_run_session():
+    sessions = generate_sessions(20, INDEX, EQUIPEMENTS, ENERGIE, seed=3, invalid_rate=0.1)
+    report = replay(sessions, INDEX, EQUIPEMENTS, ENERGIE)
+    assert report['sessions'] == 20
+    assert report['erreurs'] == [] and report['incompletes'] == 0
+
+    for answers in sessions[:5]:
+        totals = run_session(INDEX, EQUIPEMENTS, ENERGIE, ScriptedIO(answers))
+        io = replay_session(answers, INDEX, EQUIPEMENTS, ENERGIE)
+        assert f"TOTAL : {sum(totals[:3]):.2f} kgCO2" in io.transcript()
+
+
+def test_short_session_is_incomplete():
+    report = replay([["1"]], INDEX, EQUIPEMENTS, ENERGIE)
+    assert report['incompletes'] == 1 and report['erreurs'] == []
@@ -0,0 +1,46 @@
+import json
+import os
+
+import pandas as pd
+
+from carbonsimulator.batch import compute_footprints, file_key
+from carbonsimulator.calculator import load_data
+from carbonsimulator.reports import MANIFEST, render_reports
+
+
+def _footprints():
+    aliments, equipements, energie = load_data()
+    ledger = pd.DataFrame({
+        'restaurant': ['a/b', 'a_b', 'a_b'],
+        'source': ['aliments', 'energie', 'aliments'],
+        'nom': [aliments['nom'][0], 'Electricité', aliments['nom'][5]],
+        'french_attribut': [aliments['french_attribut'][0], '', aliments['french_attribut'][5]],
+        'quantite': [2.0, 10.0, 1.0],
+    })
+    return compute_footprints(ledger, aliments, equipements, energie)
+
+
+def test_file_key_has_no_collisions():
+    keys = ['a/b', 'a_b', 'a b', 'A', 'a', '', 1, '../x']
+    names = [file_key(key) for key in keys]
+    assert len(set(names)) == len(keys)
+    assert all(os.sep not in name and not name.startswith('.') for name in names)
+
+
+def test_one_report_per_restaurant(tmp_path):
+    totaux, par_main_type = _footprints()
+    summary = render_reports(totaux, par_main_type, str(tmp_path), formats=('svg', 'html'), processes=1)
+    assert summary == {'rendus': 2, 'ignores': 0}
+
+    for restaurant in ['a/b', 'a_b']:
+        with open(tmp_path / f"{file_key(restaurant)}.html", encoding='utf-8') as f:
+            page = f.read()
+        assert f"Empreinte carbone - {restaurant}" in page
+        assert f"Total : {totaux.loc[restaurant, 'total']:.2f} kgCO2" in page
+
+    with open(tmp_path / MANIFEST, encoding='utf-8') as f:
+        assert len(json.load(f)) == 2
+
+    # Données inchangées : rien n'est redessiné
+    assert render_reports(totaux, par_main_type, str(tmp_path), formats=('svg', 'html'), processes=1) == \
+        {'rendus': 0, 'ignores': 2}
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from carbonsimulator.batch import compute_footprints
+from carbonsimulator.calculator import load_data
+from carbonsimulator.scenarios import ScenarioEngine
+
+DATA = load_data()
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return ScenarioEngine(*DATA)
+
+
+@pytest.fixture(scope="module")
+def ledger():
+    aliments, equipements, energie = DATA
+    return pd.DataFrame({
+        'restaurant': 'R1',
+        'source': ['aliments', 'aliments', 'energie', 'equipements'],
+        'nom': [aliments['nom'][0], aliments['nom'][10], 'Electricité', equipements['nom'][0]],
+        'french_attribut': [aliments['french_attribut'][0], aliments['french_attribut'][10], '', ''],
+        'quantite': [2.0, 3.5, 100.0, 1.0],
+    })
+
+
+def test_evaluate_matches_compute_footprints(engine, ledger):
+    totaux, par_main_type = compute_footprints(ledger, *DATA)
+    result = engine.evaluate(engine.quantities(ledger)).iloc[0]
+    for col in totaux.columns:
+        assert result[col] == pytest.approx(totaux.loc['R1', col])
+    for main_type, value in par_main_type.loc['R1'].items():
+        assert result[main_type] == pytest.approx(value)
+
+
+def test_monte_carlo_without_uncertainty_is_the_evaluation(engine, ledger):
+    quantities = engine.quantities(ledger)
+    draws = engine.monte_carlo(quantities, 5, uncertainty=0.0, seed=1)
+    expected = engine.evaluate(quantities)
+    for i in range(5):
+        np.testing.assert_allclose(draws.iloc[i].to_numpy(), expected.iloc[0].to_numpy())
+
+    bounded = engine.monte_carlo(quantities, 200, uncertainty=0.1, seed=1)['total']
+    total = expected['total'][0]
+    assert ((bounded >= 0.9 * total - 1e-9) & (bounded <= 1.1 * total + 1e-9)).all()
+
+
+def test_substitution(engine, ledger):
+    quantities = engine.quantities(ledger)
+    source = engine.item_ids('energie', ['Electricité'])
+    target = engine.item_ids('energie', ['Fioul domestique'])
+    scenarios = engine.substitution(quantities, source, target, [0.0, 0.5, 1.0])
+
+    np.testing.assert_allclose(scenarios[0], quantities)
+    assert scenarios[2][source[0]] == 0.0
+    assert scenarios[2][target[0]] == pytest.approx(100.0)
+    assert scenarios[1][target[0]] == pytest.approx(50.0)
+
+
+def test_substitution_without_targets_is_an_error(engine, ledger):
+    quantities = engine.quantities(ledger)
+    source = engine.item_ids('energie', ['Electricité'])
+    with pytest.raises(ValueError, match="target_ids"):
+        engine.substitution(quantities, source, [], [0.5])
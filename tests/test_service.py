@@ -0,0 +1,125 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+from carbonsimulator.batch import build_factor_table, compute_footprints
+from carbonsimulator.calculator import load_data
+from carbonsimulator.service import FootprintService, ServiceOverloaded, compute_batch, handle_http
+
+FACTORS = build_factor_table(*load_data())
+
+
+def test_stop_under_load_processes_queued_requests():
+    async def scenario():
+        service = FootprintService(FACTORS, queue_size=5)
+        service.start()
+        # 50 requêtes distinctes : la file de 5 déborde
+        requetes = [[('energie', 'Electricité', '', float(i + 1))] for i in range(50)]
+        tasks = [asyncio.ensure_future(service.calculate(lignes)) for lignes in requetes]
+        await asyncio.sleep(0)
+        await asyncio.wait_for(service.stop(), timeout=5)
+        return await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), timeout=5)
+
+    results = asyncio.run(scenario())
+    refused = [r for r in results if isinstance(r, ServiceOverloaded)]
+    served = [r for r in results if isinstance(r, dict)]
+    assert refused
+    assert len(refused) + len(served) == 50
+    assert served[0]['total'] == pytest.approx(0.058)
+
+
+def test_calculate_after_stop_is_refused():
+    async def scenario():
+        service = FootprintService(FACTORS)
+        service.start()
+        result = await service.calculate([('energie', 'Electricité', '', 2.0)])
+        await asyncio.wait_for(service.stop(), timeout=5)
+        with pytest.raises(ServiceOverloaded):
+            await service.calculate([('energie', 'Electricité', '', 3.0)])
+        return result
+
+    assert asyncio.run(scenario())['total'] == pytest.approx(0.116)
+
+
+def test_invalid_request_does_not_fail_its_batch():
+    async def scenario():
+        service = FootprintService(FACTORS)
+        service.start()
+        valid = service.calculate([('energie', 'Electricité', '', 1.0)])
+        invalid = service.calculate([('energie', 'Electricité', '', 'abc')])
+        missing = service.calculate([{'source': 'energie', 'nom': 'Electricité'}])
+        results = await asyncio.gather(valid, invalid, missing, return_exceptions=True)
+        await service.stop()
+        return results
+
+    valid, invalid, missing = asyncio.run(scenario())
+    assert valid['total'] == pytest.approx(0.058)
+    assert isinstance(invalid, ValueError) and 'quantite' in str(invalid)
+    assert isinstance(missing, ValueError) and 'quantite' in str(missing)
+
+
+def test_failing_request_is_isolated_in_the_worker():
+    async def scenario():
+        service = FootprintService(FACTORS)
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in range(3)]
+        # Requête qui échoue dans compute_batch, placée directement dans la file avec deux requêtes valides
+        service.queue.put_nowait(([('energie', 'Electricité', '', 1.0)], futures[0]))
+        service.queue.put_nowait(([('energie', 'Electricité', '', 'abc')], futures[1]))
+        service.queue.put_nowait(([('energie', 'Electricité', '', 2.0)], futures[2]))
+        service.start()
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        await service.stop()
+        return service.stats['lots'], results
+
+    lots, (first, failed, third) = asyncio.run(scenario())
+    assert lots == 1
+    assert first['total'] == pytest.approx(0.058)
+    assert isinstance(failed, ValueError)
+    assert third['total'] == pytest.approx(0.116)
+
+
+@pytest.mark.parametrize("request_bytes", [
+    b"GARBAGE\r\n\r\n",
+    b"POST /footprint HTTP/1.1\r\nPas un en-tete\r\n\r\n",
+    b"POST /footprint HTTP/1.1\r\nContent-Length: abc\r\n\r\n",
+])
+def test_malformed_http_gets_400(request_bytes):
+    async def scenario():
+        service = FootprintService(FACTORS)
+        service.start()
+        server = await asyncio.start_server(lambda r, w: handle_http(service, r, w), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request_bytes)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout=5)
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        await service.stop()
+        return response
+
+    assert asyncio.run(scenario()).startswith(b"HTTP/1.1 400 Bad Request")
+
+
+def test_compute_batch_matches_compute_footprints():
+    aliments, equipements, energie = load_data()
+    requests = [
+        [('aliments', 'Abricot', 'dénoyauté', 2.0), ('energie', 'Electricité', '', 10.0)],
+        [(source, nom, '', 1.0) for source, nom in [('equipements', equipements['nom'][0])]],
+        [],
+    ]
+    ledger = pd.DataFrame(
+        [(i, *ligne) for i, lignes in enumerate(requests) for ligne in lignes],
+        columns=['restaurant', 'source', 'nom', 'french_attribut', 'quantite'])
+    totaux, par_main_type = compute_footprints(ledger, aliments, equipements, energie)
+
+    results = compute_batch(FACTORS, requests)
+    for i in (0, 1):
+        for col in totaux.columns:
+            assert results[i][col] == pytest.approx(totaux.loc[i, col])
+        assert results[i]['par_main_type'] == pytest.approx(
+            {k: v for k, v in par_main_type.loc[i].items() if v})
+    assert results[2]['total'] == 0.0
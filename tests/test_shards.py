@@ -0,0 +1,45 @@
+import os
+
+import pandas as pd
+import pytest
+
+from carbonsimulator.batch import compute_footprints
+from carbonsimulator.calculator import load_data
+from carbonsimulator.shards import chain_close
+
+DATA = load_data()
+
+
+def _ledger(restaurants, quantite):
+    aliments, equipements, _ = DATA
+    rows = []
+    for i, restaurant in enumerate(restaurants):
+        rows.append((restaurant, 'aliments', aliments['nom'][i], aliments['french_attribut'][i], quantite))
+        rows.append((restaurant, 'energie', 'Electricité', '', 10.0 * (i + 1)))
+        rows.append((restaurant, 'equipements', equipements['nom'][0], '', 1.0))
+    return pd.DataFrame(rows, columns=['restaurant', 'source', 'nom', 'french_attribut', 'quantite'])
+
+
+def test_chain_close_matches_compute_footprints(tmp_path):
+    # Deux shards dont les identifiants donnaient autrefois le même fichier
+    shards = {'a/b': _ledger(['R1', 'R2'], 2.0), 'a_b': _ledger(['R3'], 5.0)}
+    regions = {'R1': 'Nord', 'R2': 'Nord'}
+
+    report, results = chain_close(shards, *DATA, str(tmp_path), regions, processes=1)
+    assert sorted(report['calcules']) == ['a/b', 'a_b']
+    assert len([f for f in os.listdir(tmp_path) if f.endswith('.pkl')]) == 2
+
+    totaux, par_main_type = compute_footprints(pd.concat(shards.values(), ignore_index=True), *DATA)
+    sites, sites_main_type = results['sites']
+    pd.testing.assert_frame_equal(sites, totaux.rename_axis('restaurant'), check_dtype=False)
+    pd.testing.assert_frame_equal(sites_main_type, par_main_type.rename_axis('restaurant'), check_dtype=False)
+
+    chaine = results['chaine'][0]
+    assert chaine['total'].iloc[0] == pytest.approx(totaux['total'].sum())
+    regions_totaux = results['regions'][0]['total']
+    assert regions_totaux['Nord'] == pytest.approx(totaux.loc[['R1', 'R2'], 'total'].sum())
+    assert regions_totaux['Sans région'] == pytest.approx(totaux.loc['R3', 'total'])
+
+    # Registres inchangés : les résultats partiels sont réutilisés
+    report, _ = chain_close(shards, *DATA, str(tmp_path), regions, processes=1)
+    assert report['calcules'] == [] and sorted(report['reutilises']) == ['a/b', 'a_b']
@@ -0,0 +1,45 @@
+import os
+import shutil
+import time
+
+import pandas as pd
+
+from carbonsimulator.batch import build_factor_table
+from carbonsimulator.calculator import load_data
+from carbonsimulator.store import DATA_DIR, SOURCE_FILES, STALE_TMP_SECONDS, compile_store, open_store
+
+
+def _data_dir(tmp_path):
+    for filename in SOURCE_FILES.values():
+        shutil.copy(os.path.join(DATA_DIR, filename), tmp_path / filename)
+    return str(tmp_path)
+
+
+def test_compiled_frames_match_csv(tmp_path):
+    data_dir = _data_dir(tmp_path)
+    for expected, compiled in zip(load_data(data_dir=data_dir), load_data(compiled=True, data_dir=data_dir)):
+        pd.testing.assert_frame_equal(compiled, expected)
+    for expected, compiled in zip(load_data(data_dir=data_dir, compact=True),
+                                  load_data(compiled=True, data_dir=data_dir, compact=True)):
+        pd.testing.assert_frame_equal(compiled, expected, check_categorical=False)
+
+
+def test_factor_table_matches_build_factor_table(tmp_path):
+    data_dir = _data_dir(tmp_path)
+    expected = build_factor_table(*load_data(data_dir=data_dir))
+    factors = open_store(data_dir, os.path.join(data_dir, ".store")).factor_table()
+    assert factors.index.equals(expected.index)
+    pd.testing.assert_frame_equal(factors.reset_index(), expected.reset_index())
+
+
+def test_stale_builds_and_staging_dirs_are_removed(tmp_path):
+    data_dir = _data_dir(tmp_path)
+    store_dir = os.path.join(data_dir, ".store")
+    os.makedirs(os.path.join(store_dir, "ancien"))
+    os.makedirs(os.path.join(store_dir, ".tmp-abandonne"))
+    os.makedirs(os.path.join(store_dir, ".tmp-en-cours"))
+    old = time.time() - 2 * STALE_TMP_SECONDS
+    os.utime(os.path.join(store_dir, ".tmp-abandonne"), (old, old))
+
+    target = compile_store(data_dir, store_dir)
+    assert sorted(os.listdir(store_dir)) == sorted([".tmp-en-cours", os.path.basename(target)])
@@ -0,0 +1,61 @@
+import json
+import threading
+
+import pandas as pd
+
+from carbonsimulator import calculator, tracing, utils
+from carbonsimulator.console import ScriptedIO
+
+
+def test_spans_nest_per_thread():
+    barrier = threading.Barrier(2)
+
+    @tracing.traced("test")
+    def inner():
+        barrier.wait()
+
+    @tracing.traced("test")
+    def outer():
+        # Les deux threads ouvrent outer avant que l'un d'eux n'ouvre inner
+        barrier.wait()
+        inner()
+
+    with tracing.tracing(memory=False) as tracer:
+        threads = [threading.Thread(target=outer) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    depths = {(e['name'], e['thread'], e['depth']) for e in tracer.events}
+    idents = {e['thread'] for e in tracer.events}
+    assert len(idents) == 2
+    assert depths == {(name, ident, depth) for ident in idents for name, depth in [('outer', 0), ('inner', 1)]}
+
+
+def test_traced_build_tables_is_unchanged():
+    raw = utils.load_raw_data()
+    expected = utils.build_tables(*raw)
+    with tracing.tracing(memory=False) as tracer:
+        result = utils.build_tables(*raw)
+    for got, table in zip(result, expected):
+        pd.testing.assert_frame_equal(got, table)
+
+    events = {e['name']: e for e in tracer.events}
+    assert events['build_tables']['depth'] == 0
+    assert events['consolidate_aliments']['depth'] == 1
+    assert events['build_tables']['rows_out'] == sum(len(t) for t in expected)
+
+
+def test_main_writes_the_trace_from_the_environment(tmp_path, monkeypatch):
+    path = tmp_path / "trace.json"
+    monkeypatch.setenv("CARBONSIMULATOR_TRACE", str(path))
+    monkeypatch.setattr(calculator, "HEADLESS", True)
+
+    io = ScriptedIO(["1", "2", "0", "0", "0"])
+    calculator.main(io)
+
+    assert tracing.current() is None
+    names = {e['name'] for e in json.loads(path.read_text(encoding='utf-8'))['traceEvents']}
+    assert {'load_data', 'get_user_selection_energie', 'get_user_selection_aliments'} <= names
+    assert "TOTAL" in io.transcript()
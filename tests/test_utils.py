@@ -0,0 +1,31 @@
+import inspect
+
+import numpy as np
+import pandas as pd
+
+from carbonsimulator import utils
+from carbonsimulator.calculator import load_data
+from carbonsimulator.store import DATA_DIR
+
+TABLES = utils.build_tables(*utils.load_raw_data())
+
+
+def test_export_defaults_to_the_data_directory():
+    assert inspect.signature(utils.export_to_csv).parameters['data_dir'].default == DATA_DIR
+
+
+def test_exported_tables_are_read_back_by_load_data(tmp_path):
+    aliments, energie, equipements = TABLES
+    utils.export_to_csv(aliments, energie, equipements, data_dir=str(tmp_path))
+
+    lus = load_data(data_dir=str(tmp_path))
+    for expected, got in zip([aliments, equipements, energie], lus):
+        # Le CSV ne distingue pas None de NaN
+        expected = expected.reset_index(drop=True).replace({None: np.nan})
+        pd.testing.assert_frame_equal(got, expected, check_dtype=False)
+
+
+def test_stream_build_tables_matches_build_tables():
+    for streamed, expected in zip(utils.stream_build_tables(chunksize=500), TABLES):
+        pd.testing.assert_frame_equal(streamed.reset_index(drop=True), expected.reset_index(drop=True),
+                                      check_dtype=False)
@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+from carbonsimulator.batch import build_factor_table, compute_footprints
+from carbonsimulator.utils import build_tables, load_raw_data
+from carbonsimulator.versions import FactorHistory, parse_validity
+
+RAW = load_raw_data()
+
+
+def _edition_2024():
+    aliments = RAW[0].copy()
+    aliments.loc[0, 'CO2'] = aliments.loc[0, 'CO2'] * 2
+    return aliments.iloc[:-1], RAW[1], RAW[2]
+
+
+@pytest.fixture(scope="module")
+def history(tmp_path_factory):
+    history = FactorHistory(str(tmp_path_factory.mktemp("versions")))
+    assert history.add_release('2023-01-01', *RAW)['ajoutees'] == sum(len(t) for t in RAW)
+    assert history.add_release('2024-01-01', *_edition_2024()) == {'ajoutees': 0, 'modifiees': 1, 'supprimees': 1}
+    return history
+
+
+@pytest.mark.parametrize("value, expected", [
+    ('24/02/2026', '2026-02-24'), ('Année 2023', '2023-12-31'), ('déc-21', '2021-12-31'), ('?', None),
+])
+def test_parse_validity(value, expected):
+    result = parse_validity(value)
+    assert (pd.isna(result) if expected is None else result == pd.Timestamp(expected))
+
+
+@pytest.mark.parametrize("date, edition", [('2023-06-01', RAW), ('2024-06-01', _edition_2024())])
+def test_snapshot_rebuilds_each_edition(history, date, edition):
+    for got, expected in zip(history.snapshot(date), edition):
+        pd.testing.assert_frame_equal(got, expected.reset_index(drop=True), check_dtype=False)
+
+
+def test_history_is_persisted(history):
+    reopened = FactorHistory(history.path)
+    assert reopened.dates() == history.dates()
+    assert reopened.release_at('2022-12-31') == -1 and reopened.release_at('2024-01-01') == 1
+    assert len(reopened.diff(0, 1)['modifiees']) == 1
+
+
+def test_restate_matches_compute_footprints(history):
+    aliments = build_tables(*RAW)[0]
+    ledger = pd.DataFrame({
+        'restaurant': ['R1', 'R1', 'R2'],
+        'date': ['2023-03-01', '2024-03-01', '2024-03-01'],
+        'source': 'aliments',
+        'nom': [aliments['nom'][0], aliments['nom'][0], aliments['nom'][5]],
+        'french_attribut': [aliments['french_attribut'][0], aliments['french_attribut'][0],
+                            aliments['french_attribut'][5]],
+        'quantite': [1.0, 2.0, 3.0],
+    })
+    totaux, _ = history.restate_footprints(ledger)
+
+    expected = []
+    for date, raw in [('2023-03-01', RAW), ('2024-03-01', _edition_2024())]:
+        tables = build_tables(*raw)
+        pd.testing.assert_frame_equal(history.factor_table(history.release_at(date)),
+                                      build_factor_table(tables[0], tables[2], tables[1]))
+        expected.append(compute_footprints(ledger[ledger['date'] == date], tables[0], tables[2], tables[1])[0])
+    expected = pd.concat(expected).groupby(level=0).sum()
+    pd.testing.assert_series_equal(totaux['total'], expected['total'], check_names=False)